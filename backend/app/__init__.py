@@ -4,10 +4,10 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_mail import Mail
-from flasgger import Swagger
 from config import config
+from app.database import ENCABEZADO_PRIMARIO, RoutingSession, estadisticas_pool, init_replica
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 mail = Mail()
@@ -69,8 +69,17 @@ def create_app(config_name='default'):
     migrate.init_app(app, db)
     jwt.init_app(app)
     mail.init_app(app)
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
-    Swagger(app, template=swagger_template, config=swagger_config)
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=[ENCABEZADO_PRIMARIO])
+    
+    from app.utils.apispec import init_swagger
+    from app.utils.compression import init_compression
+    from app.utils.query_stats import init_query_stats
+    from app.utils.metrics import init_metrics
+    init_compression(app)
+    init_query_stats(app)
+    init_metrics(app, db)
+    init_replica(app)
+    init_swagger(app, swagger_template, swagger_config)
     
     # Register blueprints
     from app.routes.auth import auth_bp
@@ -93,8 +102,18 @@ def create_app(config_name='default'):
     app.register_blueprint(comentarios_bp, url_prefix='/api/comentarios')
     app.register_blueprint(reportes_bp, url_prefix='/api/reportes')
     
+    from app.cli import register_commands
+    register_commands(app)
+    
     @app.route('/api/health')
     def health_check():
-        return {'status': 'healthy', 'message': 'CECOALIMENTOS API running'}
+        return {
+            'status': 'healthy',
+            'message': 'CECOALIMENTOS API running',
+            'db_pools': {
+                key or 'default': estadisticas_pool(engine)
+                for key, engine in db.engines.items()
+            }
+        }
     
     return app
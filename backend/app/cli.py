@@ -0,0 +1,182 @@
+import json
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from app import db
+
+
+@click.command('explain-indices')
+@click.option('--min-filas', default=10000, show_default=True,
+              help='Tamaño desde el que un scan completo de una tabla cuenta como falla')
+@click.option('--forzar-indices', is_flag=True,
+              help='Sin datos a escala: deshabilitar seq scans y marcar cualquier tabla')
+@click.option('--verbose', '-v', is_flag=True, help='Mostrar el plan de cada consulta')
+@with_appcontext
+def explain_indices(min_filas, forzar_indices, verbose):
+    """Ejecutar las rutas, hacer EXPLAIN de su SQL y fallar si alguna recorre una tabla grande"""
+    from flask import current_app
+    from app.utils.explain import ErrorExplain, verificar_planes
+
+    try:
+        resultados = verificar_planes(
+            current_app._get_current_object(), min_filas=min_filas, forzar_indices=forzar_indices
+        )
+    except ErrorExplain as e:
+        raise click.ClickException(str(e))
+
+    fallas = set()
+    for endpoint, sql, plan, tablas in resultados:
+        estado = 'SEQ SCAN' if tablas else 'ok'
+        click.echo(f'[{estado:>8}] {endpoint}: {" ".join(sql.split())[:100]}')
+        if verbose or tablas:
+            click.echo('           ' + plan.replace('\n', '\n           '))
+        if tablas:
+            fallas.add(f'{endpoint} ({", ".join(tablas)})')
+
+    if fallas:
+        raise click.ClickException(f'{len(fallas)} consulta(s) con scan secuencial: {"; ".join(sorted(fallas))}')
+    click.echo(f'✅ Las {len(resultados)} consultas de las rutas usan índices')
+
+
+@click.command('seed-scale')
+@click.option('--usuarios', default=10000, show_default=True)
+@click.option('--proveedores', default=50, show_default=True)
+@click.option('--productos', default=2000, show_default=True)
+@click.option('--combos', default=30, show_default=True)
+@click.option('--compras', default=100000, show_default=True)
+@click.option('--comentarios', default=20000, show_default=True)
+@click.option('--pedidos', default=2000, show_default=True)
+@click.option('--dias', default=365, show_default=True, help='Días de historia hacia atrás')
+@click.option('--seed', default=42, show_default=True, help='Semilla para datos reproducibles')
+@click.option('--fecha-fin', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Último día de la historia (por defecto hoy); fijarlo hace la carga reproducible')
+@click.option('--batch-size', default=10000, show_default=True)
+@with_appcontext
+def seed_scale(**opciones):
+    """Poblar la base de datos con datos sintéticos a gran escala"""
+    from app.services.seed_scale import generar
+    generar(log=click.echo, **opciones)
+
+
+@click.command('purgar-idempotencia')
+@with_appcontext
+def purgar_idempotencia():
+    """Eliminar las claves de idempotencia vencidas (ejecutar periódicamente, ej. cron diario)"""
+    from app.models.idempotencia import ClaveIdempotencia
+
+    eliminadas = ClaveIdempotencia.query.filter(
+        ClaveIdempotencia.fecha_expiracion < datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f'✅ {eliminadas} clave(s) de idempotencia eliminadas')
+
+
+@click.command('escanear-pagos-duplicados')
+@with_appcontext
+def escanear_pagos_duplicados():
+    """Marcar pagos históricos con la misma referencia y banco (duplicado_de)"""
+    from app.services.pagos_duplicados import marcar_duplicados, duplicados_marcados
+
+    marcados = marcar_duplicados()
+    click.echo(f'{marcados} pago(s) nuevos marcados como duplicados')
+    for pago in duplicados_marcados():
+        click.echo(f'  pago #{pago.id} ({pago.estado}) duplica #{pago.duplicado_de}: '
+                   f'{pago.numero_referencia} / {pago.banco_origen or "-"}')
+
+
+@click.command('snapshot-inventario')
+@click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Día a cerrar (por defecto ayer, UTC)')
+@click.option('--dias', default=1, show_default=True, help='Cantidad de días hacia atrás desde --fecha')
+@with_appcontext
+def snapshot_inventario(fecha, dias):
+    """Guardar el stock al cierre del día (ejecutar a diario, ej. cron después de medianoche UTC)"""
+    from app.services.inventario import tomar_snapshot
+
+    ultimo = fecha.date() if fecha else datetime.utcnow().date() - timedelta(days=1)
+    for atras in range(dias - 1, -1, -1):
+        dia = ultimo - timedelta(days=atras)
+        filas = tomar_snapshot(dia)
+        db.session.commit()
+        click.echo(f'✅ Snapshot {dia.isoformat()}: {filas} producto(s)')
+
+
+@click.command('ajustar-pronosticos')
+@click.option('--completo', is_flag=True, help='Reajustar todos los modelos con la historia completa')
+@with_appcontext
+def ajustar_pronosticos(completo):
+    """Actualizar los pronósticos de demanda con las ventas hasta ayer (cron diario)"""
+    from app.services.pronostico import ajustar_pronosticos as ajustar
+
+    completos, incrementales = ajustar(completo=completo)
+    db.session.commit()
+    click.echo(f'✅ Pronósticos: {completos} ajuste(s) completo(s), {incrementales} incremental(es)')
+
+
+@click.command('importar-usuarios')
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--procesos', type=int, help='Procesos para bcrypt (por defecto IMPORTACION_PROCESOS)')
+@click.option('--lote', type=int, help='Filas por lote (por defecto IMPORTACION_LOTE)')
+@click.option('--reporte', type=click.Path(dir_okay=False), help='Guardar el reporte completo en JSON')
+@with_appcontext
+def importar_usuarios(archivo, procesos, lote, reporte):
+    """Importar miembros desde un CSV o XLSX"""
+    from flask import current_app
+    from app.services.importacion_usuarios import ErrorImportacion, importar_usuarios as importar, leer_filas
+    from app.utils.tablas import mensaje_codificacion
+
+    inicio = time.perf_counter()
+    with open(archivo, 'rb') as flujo:
+        try:
+            resultado = importar(
+                leer_filas(flujo, archivo),
+                procesos=procesos or current_app.config['IMPORTACION_PROCESOS'],
+                tamano_lote=lote or current_app.config['IMPORTACION_LOTE'],
+                log=click.echo
+            )
+        except UnicodeDecodeError as e:
+            raise click.ClickException(mensaje_codificacion(e))
+        except ErrorImportacion as e:
+            raise click.ClickException(str(e))
+
+    click.echo(f'✅ {resultado["creados"]} de {resultado["total"]} miembro(s) importado(s) '
+               f'en {time.perf_counter() - inicio:.1f}s; {len(resultado["errores"])} fila(s) con errores')
+    for error in resultado['errores'][:20]:
+        click.echo(f'  fila {error["fila"]}: ' + '; '.join(error['errores'].values()))
+    if reporte:
+        with open(reporte, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        click.echo(f'Reporte escrito en {reporte}')
+    elif resultado['credenciales']:
+        click.echo(f'⚠️  {len(resultado["credenciales"])} contraseña(s) generada(s): use --reporte para guardarlas')
+
+
+@click.command('apispec-build')
+@click.option('--output', '-o', help='Archivo destino (por defecto APISPEC_FILE o apispec.json)')
+@with_appcontext
+def apispec_build(output):
+    """Precompilar la especificación OpenAPI a un archivo estático"""
+    from flask import current_app
+    from app.utils.apispec import construir_apispec, ruta_apispec_precompilada
+
+    app = current_app._get_current_object()
+    if not hasattr(app, 'swag'):
+        raise click.ClickException('Swagger está deshabilitado (SWAGGER_ENABLED=false)')
+
+    destino = output or ruta_apispec_precompilada(app) or 'apispec.json'
+    cuerpo = construir_apispec(app)
+    with open(destino, 'wb') as f:
+        f.write(cuerpo)
+    click.echo(f'✅ Especificación escrita en {destino} ({len(cuerpo)} bytes)')
+
+
+def register_commands(app):
+    app.cli.add_command(explain_indices)
+    app.cli.add_command(seed_scale)
+    app.cli.add_command(apispec_build)
+    app.cli.add_command(purgar_idempotencia)
+    app.cli.add_command(escanear_pagos_duplicados)
+    app.cli.add_command(snapshot_inventario)
+    app.cli.add_command(ajustar_pronosticos)
+    app.cli.add_command(importar_usuarios)
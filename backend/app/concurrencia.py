@@ -0,0 +1,64 @@
+import threading
+import time
+from flask import current_app
+
+
+def gevent_activo():
+    """True si el proceso corre en un worker gevent (sockets parcheados)"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def ejecutar_bloqueante(funcion, *args, **kwargs):
+    """Ejecutar código CPU en C (bcrypt) sin bloquear el hub de gevent
+
+    Con workers gevent la llamada se envía al threadpool nativo del hub para que los
+    demás greenlets sigan atendiendo requests; con workers sync o gthread se ejecuta directo.
+    """
+    if gevent_activo():
+        import gevent
+        return gevent.get_hub().threadpool.apply(funcion, args, kwargs)
+    return funcion(*args, **kwargs)
+
+
+_pendientes = set()
+_pendientes_lock = threading.Lock()
+
+
+def en_segundo_plano(funcion, *args, **kwargs):
+    """Ejecutar una tarea fuera del request (SMTP) con su propio contexto de aplicación
+
+    Las tareas en curso quedan registradas para que el worker las espere al salir
+    (esperar_segundo_plano en el hook worker_exit de gunicorn) en lugar de cortarlas.
+    """
+    app = current_app._get_current_object()
+
+    def tarea():
+        try:
+            with app.app_context():
+                funcion(*args, **kwargs)
+        except Exception:
+            app.logger.exception(f'Error en tarea en segundo plano {funcion.__name__}')
+        finally:
+            with _pendientes_lock:
+                _pendientes.discard(hilo)
+
+    # Con gevent threading está parcheado y esto crea un greenlet
+    hilo = threading.Thread(target=tarea, daemon=True)
+    with _pendientes_lock:
+        _pendientes.add(hilo)
+    hilo.start()
+    return hilo
+
+
+def esperar_segundo_plano(timeout=None):
+    """Esperar las tareas en segundo plano en curso; retorna cuántas siguen sin terminar"""
+    with _pendientes_lock:
+        hilos = list(_pendientes)
+    limite = time.monotonic() + timeout if timeout is not None else None
+    for hilo in hilos:
+        hilo.join(None if limite is None else max(limite - time.monotonic(), 0))
+    return sum(1 for hilo in hilos if hilo.is_alive())
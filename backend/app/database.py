@@ -0,0 +1,199 @@
+import time
+from functools import wraps
+from threading import Lock
+from flask import g, has_app_context, request, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+COOKIE_PRIMARIO = 'db_primario_hasta'
+ENCABEZADO_PRIMARIO = 'X-DB-Primario-Hasta'
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+_lag_replicas = {}
+_escrituras_recientes = {}
+_lock = Lock()
+
+
+def bind_actual():
+    if has_app_context():
+        return g.get('db_bind')
+    return None
+
+
+def seleccionar_bind(clave):
+    """Dirigir las lecturas del request actual al engine `clave` de SQLALCHEMY_BINDS"""
+    g.db_bind = clave
+
+
+def usar_bind(clave):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            anterior = g.get('db_bind')
+            seleccionar_bind(clave)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                g.db_bind = anterior
+        return decorated_function
+    return decorator
+
+
+class RoutingSession(Session):
+    """Sesión que usa el engine elegido para el request; los flush siempre van al primario"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            clave = bind_actual()
+            if clave is not None and clave in self._db.engines:
+                return self._db.engines[clave]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def estadisticas_pool(engine):
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {'tipo': type(pool).__name__, 'estado': pool.status()}
+    return {
+        'tipo': type(pool).__name__,
+        'tamano': pool.size(),
+        'en_uso': pool.checkedout(),
+        'disponibles': pool.checkedin(),
+        'overflow': pool.overflow()
+    }
+
+
+# Réplicas de lectura
+
+def _medir_lag(engine):
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    with engine.connect() as conn:
+        lag = conn.execute(text(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+            "ELSE 0 END"
+        )).scalar()
+    return float(lag or 0)
+
+
+def lag_replica(clave):
+    """Retraso de la réplica en segundos, medido como máximo cada REPLICA_LAG_CHECK_INTERVAL"""
+    engine = current_app.extensions['sqlalchemy'].engines[clave]
+    intervalo = current_app.config['REPLICA_LAG_CHECK_INTERVAL']
+    ahora = time.monotonic()
+
+    with _lock:
+        medicion = _lag_replicas.get(clave)
+        if medicion and ahora - medicion[0] < intervalo:
+            return medicion[1]
+
+    try:
+        lag = _medir_lag(engine)
+    except Exception as e:
+        current_app.logger.warning(f"Réplica {clave} no disponible: {str(e)}")
+        lag = float('inf')
+
+    with _lock:
+        _lag_replicas[clave] = (ahora, lag)
+    return lag
+
+
+def _usuario_request():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def _marca_vigente(valor, ahora):
+    # Solo se acepta una marca dentro de la ventana: el cliente no puede fijarse al primario
+    try:
+        hasta = float(valor or 0)
+    except ValueError:
+        return False
+    return ahora < hasta <= ahora + current_app.config['REPLICA_STICKY_SECONDS']
+
+
+def requiere_primario():
+    """Read-your-writes: el cliente o usuario escribió hace menos de REPLICA_STICKY_SECONDS
+
+    La marca viaja en el encabezado X-DB-Primario-Hasta que el cliente devuelve (la SPA usa
+    Bearer desde otro origen y no envía cookies), o en la cookie para clientes del mismo
+    origen; ambas sirven en cualquier worker. El registro por usuario en memoria es solo un
+    respaldo del worker que atendió la escritura.
+    """
+    ahora = time.time()
+
+    if _marca_vigente(request.headers.get(ENCABEZADO_PRIMARIO), ahora):
+        return True
+    if _marca_vigente(request.cookies.get(COOKIE_PRIMARIO), ahora):
+        return True
+
+    usuario = _usuario_request()
+    if usuario is not None:
+        with _lock:
+            return _escrituras_recientes.get(usuario, 0) > ahora
+    return False
+
+
+def seleccionar_replica(clave='replica', respaldo=None):
+    """Leer de la réplica `clave` si existe, no supera el lag máximo y no hay escrituras recientes"""
+    engines = current_app.extensions['sqlalchemy'].engines
+
+    if clave in engines and not requiere_primario():
+        if lag_replica(clave) <= current_app.config['REPLICA_MAX_LAG_SECONDS']:
+            seleccionar_bind(clave)
+            return True
+
+    if respaldo is not None:
+        seleccionar_bind(respaldo)
+    return False
+
+
+def lectura_replica(clave='replica', respaldo=None):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            anterior = g.get('db_bind')
+            seleccionar_replica(clave, respaldo)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                g.db_bind = anterior
+        return decorated_function
+    return decorator
+
+
+def init_replica(app):
+    """Registrar las escrituras exitosas para mantener al cliente en el primario un momento
+
+    La respuesta lleva la marca en X-DB-Primario-Hasta (expuesto por CORS) y en una cookie.
+    """
+
+    app.config.setdefault('REPLICA_MAX_LAG_SECONDS', 5)
+    app.config.setdefault('REPLICA_LAG_CHECK_INTERVAL', 2)
+    app.config.setdefault('REPLICA_STICKY_SECONDS', 10)
+
+    @app.after_request
+    def marcar_escritura(response):
+        if request.method in METODOS_LECTURA or response.status_code >= 400:
+            return response
+
+        ventana = app.config['REPLICA_STICKY_SECONDS']
+        hasta = time.time() + ventana
+
+        usuario = _usuario_request()
+        if usuario is not None:
+            with _lock:
+                _escrituras_recientes[usuario] = hasta
+                if len(_escrituras_recientes) > 10000:
+                    ahora = time.time()
+                    for clave in [k for k, v in _escrituras_recientes.items() if v <= ahora]:
+                        del _escrituras_recientes[clave]
+
+        response.headers[ENCABEZADO_PRIMARIO] = f'{hasta:.3f}'
+        response.set_cookie(COOKIE_PRIMARIO, f'{hasta:.3f}', max_age=ventana, httponly=True, samesite='Lax')
+        return response
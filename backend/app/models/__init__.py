@@ -7,7 +7,9 @@ from app.models.compra import Compra
 from app.models.pago import Pago
 from app.models.retiro import Retiro
 from app.models.comentario import Comentario
-from app.models.inventario import Inventario
+from app.models.inventario import Inventario, MovimientoInventario, SnapshotInventario
+from app.models.idempotencia import ClaveIdempotencia
+from app.models.pronostico import PronosticoCombo
 
 __all__ = [
     'Usuario',
@@ -21,5 +23,9 @@ __all__ = [
     'Pago',
     'Retiro',
     'Comentario',
-    'Inventario'
+    'Inventario',
+    'MovimientoInventario',
+    'SnapshotInventario',
+    'ClaveIdempotencia',
+    'PronosticoCombo'
 ]
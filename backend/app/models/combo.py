@@ -46,6 +46,10 @@ class Combo(db.Model):
 
 class ComboProducto(db.Model):
     __tablename__ = 'combo_productos'
+    __table_args__ = (
+        db.Index('ix_combo_productos_combo_id', 'combo_id'),
+        db.Index('ix_combo_productos_producto_id', 'producto_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     combo_id = db.Column(db.Integer, db.ForeignKey('combos.id'), nullable=False)
@@ -4,6 +4,10 @@ from datetime import datetime
 
 class Comentario(db.Model):
     __tablename__ = 'comentarios'
+    __table_args__ = (
+        db.Index('ix_comentarios_estado_fecha_creacion', 'estado', 'fecha_creacion'),
+        db.Index('ix_comentarios_usuario_id_fecha_creacion', 'usuario_id', 'fecha_creacion'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
@@ -4,6 +4,10 @@ from datetime import datetime
 
 class Compra(db.Model):
     __tablename__ = 'compras'
+    __table_args__ = (
+        db.Index('ix_compras_usuario_id_estado', 'usuario_id', 'estado'),
+        db.Index('ix_compras_usuario_id_fecha_compra', 'usuario_id', 'fecha_compra'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
@@ -21,11 +25,10 @@ class Compra(db.Model):
     pago = db.relationship('Pago', backref='compra', uselist=False)
     retiro = db.relationship('Retiro', backref='compra', uselist=False)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, incluir_usuario=True):
+        data = {
             'id': self.id,
             'usuario_id': self.usuario_id,
-            'usuario_nombre': f"{self.usuario.nombre} {self.usuario.apellido}" if self.usuario else None,
             'combo_id': self.combo_id,
             'combo_nombre': self.combo.nombre if self.combo else None,
             'estado': self.estado,
@@ -34,6 +37,9 @@ class Compra(db.Model):
             'pago': self.pago.to_dict() if self.pago else None,
             'retiro': self.retiro.to_dict() if self.retiro else None
         }
+        if incluir_usuario:
+            data['usuario_nombre'] = f"{self.usuario.nombre} {self.usuario.apellido}" if self.usuario else None
+        return data
     
     def __repr__(self):
         return f'<Compra {self.id}>'
@@ -0,0 +1,31 @@
+from app import db
+from datetime import datetime
+
+
+class ClaveIdempotencia(db.Model):
+    """Respuesta guardada de un POST enviado con el encabezado Idempotency-Key"""
+    __tablename__ = 'claves_idempotencia'
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'endpoint', 'clave', name='uq_claves_idempotencia_usuario_endpoint_clave'),
+        db.Index('ix_claves_idempotencia_fecha_expiracion', 'fecha_expiracion'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    clave = db.Column(db.String(255), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+
+    # Hash del cuerpo del request: la misma clave con otro contenido es un error del cliente
+    huella_request = db.Column(db.String(64), nullable=False)
+
+    # Estado: en_proceso, completado
+    estado = db.Column(db.String(20), nullable=False, default='en_proceso')
+    status_code = db.Column(db.Integer)
+    respuesta = db.Column(db.Text)
+    content_type = db.Column(db.String(100))
+
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_expiracion = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ClaveIdempotencia {self.endpoint} {self.clave}>'
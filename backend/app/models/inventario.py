@@ -30,3 +30,61 @@ class Inventario(db.Model):
     
     def __repr__(self):
         return f'<Inventario producto={self.producto_id} cantidad={self.cantidad}>'
+
+
+class MovimientoInventario(db.Model):
+    """Registro inmutable de cada cambio de stock; solo se inserta"""
+    __tablename__ = 'inventario_movimientos'
+    __table_args__ = (
+        db.Index('ix_inventario_movimientos_producto_fecha', 'producto_id', 'fecha'),
+        db.Index('ix_inventario_movimientos_fecha', 'fecha'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    
+    # Tipo: inicial, entrada_pedido, salida_venta, ajuste
+    tipo = db.Column(db.String(20), nullable=False)
+    
+    # Diferencia aplicada al stock: positiva en entradas, negativa en salidas
+    cantidad = db.Column(db.Integer, nullable=False)
+    
+    # Origen del movimiento: pedido_proveedor, pago o producto (ajuste manual)
+    referencia_tipo = db.Column(db.String(30))
+    referencia_id = db.Column(db.Integer)
+    
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
+    motivo = db.Column(db.String(255))
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'producto_id': self.producto_id,
+            'tipo': self.tipo,
+            'cantidad': self.cantidad,
+            'referencia_tipo': self.referencia_tipo,
+            'referencia_id': self.referencia_id,
+            'usuario_id': self.usuario_id,
+            'motivo': self.motivo,
+            'fecha': self.fecha.isoformat() if self.fecha else None
+        }
+    
+    def __repr__(self):
+        return f'<MovimientoInventario producto={self.producto_id} {self.tipo} {self.cantidad}>'
+
+
+class SnapshotInventario(db.Model):
+    """Stock de cada producto al cierre (UTC) de un día"""
+    __tablename__ = 'inventario_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('fecha', 'producto_id', name='uq_inventario_snapshots_fecha_producto'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    cantidad = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<SnapshotInventario {self.fecha} producto={self.producto_id} cantidad={self.cantidad}>'
@@ -4,6 +4,16 @@ from datetime import datetime
 
 class Pago(db.Model):
     __tablename__ = 'pagos'
+    __table_args__ = (
+        db.Index('ix_pagos_estado_fecha_verificacion', 'estado', 'fecha_verificacion'),
+        db.Index(
+            'ix_pagos_pendientes_fecha_pago', 'fecha_pago',
+            postgresql_where=db.text("estado = 'pendiente'"),
+            sqlite_where=db.text("estado = 'pendiente'")
+        ),
+        db.Index('ix_pagos_compra_id', 'compra_id'),
+        db.Index('ix_pagos_numero_referencia', 'numero_referencia'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     compra_id = db.Column(db.Integer, db.ForeignKey('compras.id'), nullable=False)
@@ -27,10 +37,14 @@ class Pago(db.Model):
     
     fecha_pago = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Pago original con la misma referencia y banco (duplicados históricos, ver flask escanear-pagos-duplicados)
+    duplicado_de = db.Column(db.Integer, db.ForeignKey('pagos.id'))
+    
     # Relationship
     verificador = db.relationship('Usuario', foreign_keys=[verificado_por])
     
-    def to_dict(self):
+    def to_dict(self, referencia_repetida_en=None):
+        """`referencia_repetida_en`: otro pago con la misma referencia, calculado por la consulta"""
         return {
             'id': self.id,
             'compra_id': self.compra_id,
@@ -44,8 +58,25 @@ class Pago(db.Model):
             'verificador_nombre': f"{self.verificador.nombre} {self.verificador.apellido}" if self.verificador else None,
             'fecha_verificacion': self.fecha_verificacion.isoformat() if self.fecha_verificacion else None,
             'notas_verificacion': self.notas_verificacion,
-            'fecha_pago': self.fecha_pago.isoformat() if self.fecha_pago else None
+            'fecha_pago': self.fecha_pago.isoformat() if self.fecha_pago else None,
+            'duplicado_de': self.duplicado_de,
+            'referencia_repetida_en': referencia_repetida_en,
+            'posible_duplicado': self.duplicado_de is not None or referencia_repetida_en is not None
         }
     
     def __repr__(self):
         return f'<Pago {self.id} - {self.numero_referencia}>'
+
+
+# Una referencia bancaria solo puede pertenecer a un pago no rechazado: el registro de un
+# duplicado falla en el INSERT con una búsqueda en el índice, sin consultas previas.
+PAGOS_REFERENCIA_UNICA = db.text("estado <> 'rechazado' AND duplicado_de IS NULL")
+
+db.Index(
+    'ux_pagos_referencia_banco',
+    Pago.numero_referencia,
+    db.func.coalesce(Pago.banco_origen, ''),
+    unique=True,
+    postgresql_where=PAGOS_REFERENCIA_UNICA,
+    sqlite_where=PAGOS_REFERENCIA_UNICA
+)
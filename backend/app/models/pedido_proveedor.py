@@ -8,7 +8,7 @@ class PedidoProveedor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     proveedor_id = db.Column(db.Integer, db.ForeignKey('proveedores.id'), nullable=False)
     
-    # Estado: pendiente, confirmado, en_transito, recibido, cancelado
+    # Estado: borrador, pendiente, confirmado, en_transito, recibido, cancelado
     estado = db.Column(db.String(20), default='pendiente')
     
     total = db.Column(db.Numeric(10, 2), default=0)
@@ -36,7 +36,8 @@ class PedidoProveedor(db.Model):
             'fecha_entrega_real': self.fecha_entrega_real.isoformat() if self.fecha_entrega_real else None
         }
         if include_detalles:
-            data['detalles'] = [d.to_dict() for d in self.detalles]
+            detalles = self.detalles.options(db.joinedload(DetallePedidoProveedor.producto))
+            data['detalles'] = [d.to_dict() for d in detalles]
         return data
     
     def __repr__(self):
@@ -45,11 +46,16 @@ class PedidoProveedor(db.Model):
 
 class DetallePedidoProveedor(db.Model):
     __tablename__ = 'detalle_pedidos_proveedor'
+    __table_args__ = (
+        db.Index('ix_detalle_pedidos_proveedor_pedido_id', 'pedido_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos_proveedor.id'), nullable=False)
     producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
     cantidad = db.Column(db.Integer, nullable=False)
+    # Cantidad que llegó al recibir el pedido; None mientras no se ha recibido
+    cantidad_recibida = db.Column(db.Integer)
     precio_unitario = db.Column(db.Numeric(10, 2), nullable=False)
     subtotal = db.Column(db.Numeric(10, 2), nullable=False)
     
@@ -62,6 +68,7 @@ class DetallePedidoProveedor(db.Model):
             'producto_id': self.producto_id,
             'producto_nombre': self.producto.nombre if self.producto else None,
             'cantidad': self.cantidad,
+            'cantidad_recibida': self.cantidad_recibida,
             'precio_unitario': float(self.precio_unitario) if self.precio_unitario else 0,
             'subtotal': float(self.subtotal) if self.subtotal else 0
         }
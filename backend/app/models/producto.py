@@ -4,6 +4,11 @@ from datetime import datetime
 
 class Producto(db.Model):
     __tablename__ = 'productos'
+    __table_args__ = (
+        db.Index('ix_productos_activo_categoria', 'activo', 'categoria'),
+        db.Index('ix_productos_activo_nombre', 'activo', 'nombre'),
+        db.Index('ix_productos_proveedor_id', 'proveedor_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(150), nullable=False)
@@ -0,0 +1,31 @@
+from app import db
+from datetime import datetime
+
+
+class PronosticoCombo(db.Model):
+    """Estado del modelo de demanda diaria de un combo, actualizado cada noche"""
+    __tablename__ = 'pronosticos_combos'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    combo_id = db.Column(db.Integer, db.ForeignKey('combos.id', ondelete='CASCADE'), nullable=False, unique=True)
+    
+    # Suavizado exponencial sobre la serie sin efecto de día de semana
+    alpha = db.Column(db.Float, nullable=False)
+    nivel = db.Column(db.Float, nullable=False)
+    
+    # Índice multiplicativo por día de semana (lunes = 0), promedio 1
+    estacionalidad = db.Column(db.JSON, nullable=False)
+    
+    # Error absoluto medio a un día del modelo y de la media móvil de 7 días
+    error = db.Column(db.Float)
+    error_media_movil = db.Column(db.Float)
+    
+    # Último día incluido en el ajuste y fecha del último ajuste completo
+    fecha_ajuste = db.Column(db.Date, nullable=False)
+    fecha_ajuste_completo = db.Column(db.Date, nullable=False)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    combo = db.relationship('Combo')
+    
+    def __repr__(self):
+        return f'<PronosticoCombo combo={self.combo_id} nivel={self.nivel:.2f}>'
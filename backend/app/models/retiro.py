@@ -10,6 +10,10 @@ def generar_numero_retiro():
 
 class Retiro(db.Model):
     __tablename__ = 'retiros'
+    __table_args__ = (
+        db.Index('ix_retiros_fecha_retiro_programada', 'fecha_retiro_programada', 'numero_cola'),
+        db.Index('ix_retiros_compra_id', 'compra_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     compra_id = db.Column(db.Integer, db.ForeignKey('compras.id'), nullable=False)
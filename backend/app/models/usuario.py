@@ -1,6 +1,7 @@
 from app import db
 from datetime import datetime
 import bcrypt
+from app.concurrencia import ejecutar_bloqueante
 
 
 class Usuario(db.Model):
@@ -32,13 +33,15 @@ class Usuario(db.Model):
     comentarios = db.relationship('Comentario', backref='usuario', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(
+        self.password_hash = ejecutar_bloqueante(
+            bcrypt.hashpw,
             password.encode('utf-8'), 
             bcrypt.gensalt()
         ).decode('utf-8')
     
     def check_password(self, password):
-        return bcrypt.checkpw(
+        return ejecutar_bloqueante(
+            bcrypt.checkpw,
             password.encode('utf-8'), 
             self.password_hash.encode('utf-8')
         )
@@ -6,8 +6,10 @@ from flask_jwt_extended import (
     get_jwt_identity
 )
 from flasgger import swag_from
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.usuario import Usuario
+from app.services.usuarios import campos_de_integrity_error, campos_duplicados, respuesta_duplicados
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -39,7 +41,7 @@ auth_bp = Blueprint('auth', __name__)
     }],
     'responses': {
         201: {'description': 'Usuario registrado exitosamente'},
-        400: {'description': 'Error de validación'}
+        400: {'description': 'Error de validación; los duplicados se reportan todos en errores por campo'}
     }
 })
 def register():
@@ -50,14 +52,9 @@ def register():
         if field not in data:
             return jsonify({'error': f'Campo {field} es requerido'}), 400
     
-    if Usuario.query.filter_by(username=data['username']).first():
-        return jsonify({'error': 'El nombre de usuario ya existe'}), 400
-    
-    if Usuario.query.filter_by(email=data['email']).first():
-        return jsonify({'error': 'El email ya está registrado'}), 400
-    
-    if Usuario.query.filter_by(cedula=data['cedula']).first():
-        return jsonify({'error': 'La cédula ya está registrada'}), 400
+    duplicados = campos_duplicados({campo: data[campo] for campo in ('username', 'email', 'cedula')})
+    if duplicados:
+        return respuesta_duplicados(duplicados)
     
     usuario = Usuario(
         nombre=data['nombre'],
@@ -73,7 +70,14 @@ def register():
     usuario.set_password(data['password'])
     
     db.session.add(usuario)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        duplicados = campos_de_integrity_error(e)
+        if not duplicados:
+            raise
+        return respuesta_duplicados(duplicados)
     
     return jsonify({
         'message': 'Usuario registrado exitosamente',
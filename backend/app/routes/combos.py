@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required
 from flasgger import swag_from
 from app import db
+from app.database import lectura_replica
 from app.models.combo import Combo, ComboProducto
 from app.models.producto import Producto
+from app.services.precios import ErrorPrecios, analizar_combos, fijar_precios_combos, invalidar_precios
 from app.utils.decorators import logistica_required
 
 combos_bp = Blueprint('combos', __name__)
@@ -25,6 +27,7 @@ combos_bp = Blueprint('combos', __name__)
         200: {'description': 'Lista de combos'}
     }
 })
+@lectura_replica()
 def get_combos():
     solo_disponibles = request.args.get('disponibles', 'true').lower() == 'true'
     
@@ -40,6 +43,74 @@ def get_combos():
     }), 200
 
 
+@combos_bp.route('/precios', methods=['GET'])
+@jwt_required()
+@logistica_required
+@swag_from({
+    'tags': ['Combos'],
+    'summary': 'Costos, márgenes y precios sugeridos de todos los combos',
+    'description': 'Costo (Σ cantidad × precio_compra), valor de lista (Σ cantidad × precio_venta) y margen '
+                   'sobre el precio de venta, (precio - costo) / precio, de cada combo; marca los que se venden bajo costo, bajo el margen objetivo o por encima '
+                   'del valor de lista, y sugiere el precio para el margen objetivo. Solo Logística.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'margen_objetivo', 'in': 'query', 'type': 'number',
+         'description': 'Margen sobre el precio de venta, (precio - costo) / precio, entre 0 y 0.95 '
+                        '(por defecto PRECIOS_MARGEN_OBJETIVO)'},
+        {'name': 'redondeo', 'in': 'query', 'type': 'number',
+         'description': 'Múltiplo del precio sugerido (por defecto PRECIOS_REDONDEO)'}
+    ],
+    'responses': {
+        200: {'description': 'Resumen y combos ordenados de peor a mejor margen'},
+        400: {'description': 'Parámetros inválidos'}
+    }
+})
+def get_precios_combos():
+    margen_objetivo = request.args.get('margen_objetivo', current_app.config['PRECIOS_MARGEN_OBJETIVO'], type=float)
+    redondeo = request.args.get('redondeo', current_app.config['PRECIOS_REDONDEO'], type=float)
+    
+    if not 0 <= margen_objetivo <= 0.95:
+        return jsonify({'error': 'margen_objetivo debe estar entre 0 y 0.95'}), 400
+    if not 0 <= redondeo <= 100:
+        return jsonify({'error': 'redondeo debe estar entre 0 y 100'}), 400
+    
+    return jsonify(analizar_combos(margen_objetivo, redondeo)), 200
+
+
+@combos_bp.route('/precios', methods=['PUT'])
+@jwt_required()
+@logistica_required
+@swag_from({
+    'tags': ['Combos'],
+    'summary': 'Fijar el precio de varios combos',
+    'security': [{'Bearer': []}],
+    'parameters': [{
+        'name': 'body', 'in': 'body', 'required': True,
+        'schema': {'type': 'object', 'properties': {
+            'precios': {'type': 'array', 'items': {'type': 'object', 'properties': {
+                'combo_id': {'type': 'integer'},
+                'precio_total': {'type': 'number'}
+            }}}
+        }}
+    }],
+    'responses': {200: {'description': 'Precios actualizados'}, 400: {'description': 'Error de validación'}}
+})
+def put_precios_combos():
+    precios = (request.get_json(silent=True) or {}).get('precios')
+    if not isinstance(precios, list):
+        return jsonify({'error': 'precios (lista) es requerido'}), 400
+    
+    try:
+        actualizados = fijar_precios_combos(precios)
+    except ErrorPrecios as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    db.session.commit()
+    
+    return jsonify({'message': f'{actualizados} combo(s) actualizado(s)'}), 200
+
+
 @combos_bp.route('/<int:id>', methods=['GET'])
 @swag_from({
     'tags': ['Combos'],
@@ -48,6 +119,7 @@ def get_combos():
     'parameters': [{'name': 'id', 'in': 'path', 'type': 'integer', 'required': True}],
     'responses': {200: {'description': 'Combo con productos'}}
 })
+@lectura_replica()
 def get_combo(id):
     combo = Combo.query.get_or_404(id)
     return jsonify(combo.to_dict()), 200
@@ -120,6 +192,7 @@ def create_combo():
         db.session.add(combo_producto)
     
     db.session.commit()
+    invalidar_precios()
     
     return jsonify({
         'message': 'Combo creado exitosamente',
@@ -174,6 +247,7 @@ def update_combo(id):
             db.session.add(combo_producto)
     
     db.session.commit()
+    invalidar_precios()
     
     return jsonify({
         'message': 'Combo actualizado exitosamente',
@@ -195,6 +269,7 @@ def delete_combo(id):
     combo = Combo.query.get_or_404(id)
     combo.activo = False
     db.session.commit()
+    invalidar_precios()
     
     return jsonify({'message': 'Combo desactivado exitosamente'}), 200
 
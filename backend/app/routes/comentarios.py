@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flasgger import swag_from
 from app import db
+from app.database import lectura_replica
 from app.models.comentario import Comentario
 from app.utils.decorators import publicidad_required
 
@@ -20,6 +21,7 @@ comentarios_bp = Blueprint('comentarios', __name__)
     ],
     'responses': {200: {'description': 'Lista de comentarios aprobados'}}
 })
+@lectura_replica()
 def get_comentarios_publicos():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -2,18 +2,34 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from flasgger import swag_from
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.compra import Compra
 from app.models.pago import Pago
 from app.models.retiro import Retiro, generar_numero_retiro
 from app.models.combo import Combo, ComboProducto
-from app.models.inventario import Inventario
 from app.models.usuario import Usuario
 from app.utils.decorators import cobranza_required
+from app.utils.idempotencia import idempotente
+from app.utils.cache import CacheTTL
 from app.services.email_service import enviar_notificacion_pago
+from app.services.pagos_duplicados import (
+    es_referencia_duplicada, pagos_con_misma_referencia, referencia_repetida_en
+)
+from app.services.inventario import descontar_stock
+from app.utils.metrics import COMPRAS_INICIADAS, PAGOS_PROCESADOS, RETIROS_CREADOS
 
 pagos_bp = Blueprint('pagos', __name__)
 
+# Resumen de compras por usuario para el Dashboard (ver invalidar_resumen_compras)
+resumen_compras_cache = CacheTTL(ttl=30)
+
+
+def invalidar_resumen_compras(usuario_id):
+    resumen_compras_cache.invalidar(usuario_id)
+
 
 @pagos_bp.route('/comprar', methods=['POST'])
 @jwt_required()
@@ -22,12 +38,17 @@ pagos_bp = Blueprint('pagos', __name__)
     'summary': 'Iniciar compra de combo',
     'description': 'Seleccionar combo para comprar (HU-07). Solo un combo a la vez.',
     'security': [{'Bearer': []}],
-    'parameters': [{'name': 'body', 'in': 'body', 'required': True, 'schema': {
-        'type': 'object', 'required': ['combo_id'],
-        'properties': {'combo_id': {'type': 'integer', 'example': 1}}
-    }}],
+    'parameters': [
+        {'name': 'body', 'in': 'body', 'required': True, 'schema': {
+            'type': 'object', 'required': ['combo_id'],
+            'properties': {'combo_id': {'type': 'integer', 'example': 1}}
+        }},
+        {'name': 'Idempotency-Key', 'in': 'header', 'type': 'string', 'required': False,
+         'description': 'Clave única por operación; los reintentos devuelven la respuesta original'}
+    ],
     'responses': {201: {'description': 'Compra iniciada con instrucciones de pago'}}
 })
+@idempotente()
 def realizar_compra():
     current_user_id = int(get_jwt_identity())
     data = request.get_json()
@@ -59,6 +80,8 @@ def realizar_compra():
     
     db.session.add(compra)
     db.session.commit()
+    COMPRAS_INICIADAS.inc()
+    invalidar_resumen_compras(current_user_id)
     
     return jsonify({
         'message': 'Compra iniciada. Proceda con el pago.',
@@ -89,9 +112,14 @@ def realizar_compra():
             'telefono_pago': {'type': 'string'},
             'monto': {'type': 'number', 'example': 15.00}
         }
-    }}],
-    'responses': {201: {'description': 'Pago registrado, pendiente verificación'}}
+    }}, {'name': 'Idempotency-Key', 'in': 'header', 'type': 'string', 'required': False,
+        'description': 'Clave única por operación; los reintentos devuelven la respuesta original'}],
+    'responses': {
+        201: {'description': 'Pago registrado, pendiente verificación'},
+        409: {'description': 'Ya existe un pago con la misma referencia y banco'}
+    }
 })
+@idempotente()
 def registrar_pago():
     current_user_id = int(get_jwt_identity())
     data = request.get_json()
@@ -117,7 +145,7 @@ def registrar_pago():
     pago = Pago(
         compra_id=compra.id,
         metodo_pago=data['metodo_pago'],
-        numero_referencia=data['numero_referencia'],
+        numero_referencia=str(data['numero_referencia']).strip(),
         banco_origen=data.get('banco_origen'),
         telefono_pago=data.get('telefono_pago'),
         monto=data['monto'],
@@ -127,7 +155,14 @@ def registrar_pago():
     compra.estado = 'pago_verificando'
     
     db.session.add(pago)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if not es_referencia_duplicada(e):
+            raise
+        return jsonify({'error': 'Ya existe un pago registrado con ese número de referencia y banco'}), 409
+    invalidar_resumen_compras(current_user_id)
     
     return jsonify({
         'message': 'Pago registrado. Pendiente de verificación.',
@@ -141,7 +176,9 @@ def registrar_pago():
 @swag_from({
     'tags': ['Pagos'],
     'summary': 'Listar pagos pendientes',
-    'description': 'Pagos pendientes de verificación (HU-09) - Solo Cobranza',
+    'description': 'Pagos pendientes de verificación (HU-09) - Solo Cobranza. '
+                   'posible_duplicado indica que otro pago (de cualquier banco o estado) usa la '
+                   'misma referencia; referencia_repetida_en es el primero de ellos.',
     'security': [{'Bearer': []}],
     'parameters': [
         {'name': 'page', 'in': 'query', 'type': 'integer', 'default': 1},
@@ -157,14 +194,124 @@ def get_pagos_pendientes():
         Pago.fecha_pago.asc()
     ).paginate(page=page, per_page=per_page, error_out=False)
     
+    repetidas = dict(db.session.query(Pago.id, referencia_repetida_en()).filter(
+        Pago.id.in_([p.id for p in pagos.items])
+    ).all()) if pagos.items else {}
+    
     return jsonify({
-        'pagos': [p.to_dict() for p in pagos.items],
+        'pagos': [p.to_dict(referencia_repetida_en=repetidas.get(p.id)) for p in pagos.items],
         'total': pagos.total,
         'pages': pagos.pages,
         'current_page': page
     }), 200
 
 
+@pagos_bp.route('/cola', methods=['GET'])
+@jwt_required()
+@cobranza_required
+@swag_from({
+    'tags': ['Pagos'],
+    'summary': 'Cola de verificación',
+    'description': 'Pagos pendientes con comprador y combo en una sola consulta, con filtros - Solo Cobranza. '
+                   'posible_duplicado se calcula en la misma consulta: otro pago usa la referencia.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'page', 'in': 'query', 'type': 'integer', 'default': 1},
+        {'name': 'per_page', 'in': 'query', 'type': 'integer', 'default': 20},
+        {'name': 'metodo_pago', 'in': 'query', 'type': 'string', 'enum': ['pago_movil', 'transferencia']},
+        {'name': 'banco', 'in': 'query', 'type': 'string'},
+        {'name': 'monto_min', 'in': 'query', 'type': 'number'},
+        {'name': 'monto_max', 'in': 'query', 'type': 'number'},
+        {'name': 'orden', 'in': 'query', 'type': 'string', 'enum': ['antiguos', 'recientes'], 'default': 'antiguos'}
+    ],
+    'responses': {200: {'description': 'Página de la cola con datos de compra, usuario y combo'}}
+})
+def get_cola_pagos():
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    metodo_pago = request.args.get('metodo_pago')
+    banco = request.args.get('banco')
+    monto_min = request.args.get('monto_min', type=float)
+    monto_max = request.args.get('monto_max', type=float)
+    orden = request.args.get('orden', 'antiguos')
+    
+    if orden not in ['antiguos', 'recientes']:
+        return jsonify({'error': 'orden debe ser antiguos o recientes'}), 400
+    
+    # Proyección de columnas con joins y total por función de ventana: una consulta por página
+    query = db.session.query(
+        Pago.id, Pago.compra_id, Pago.metodo_pago, Pago.numero_referencia, Pago.banco_origen,
+        Pago.telefono_pago, Pago.monto, Pago.estado, Pago.fecha_pago, Pago.duplicado_de,
+        referencia_repetida_en().label('referencia_repetida_en'),
+        Compra.estado.label('compra_estado'), Compra.monto_total, Compra.fecha_compra,
+        Usuario.id.label('usuario_id'), Usuario.nombre.label('usuario_nombre'),
+        Usuario.apellido.label('usuario_apellido'), Usuario.cedula, Usuario.tipo_usuario,
+        Combo.id.label('combo_id'), Combo.nombre.label('combo_nombre'), Combo.tipo.label('combo_tipo'),
+        func.count().over().label('total')
+    ).join(Compra, Compra.id == Pago.compra_id).join(
+        Usuario, Usuario.id == Compra.usuario_id
+    ).join(
+        Combo, Combo.id == Compra.combo_id
+    ).filter(Pago.estado == 'pendiente')
+    
+    if metodo_pago:
+        query = query.filter(Pago.metodo_pago == metodo_pago)
+    if banco:
+        query = query.filter(Pago.banco_origen == banco)
+    if monto_min is not None:
+        query = query.filter(Pago.monto >= monto_min)
+    if monto_max is not None:
+        query = query.filter(Pago.monto <= monto_max)
+    
+    if orden == 'antiguos':
+        query = query.order_by(Pago.fecha_pago.asc(), Pago.id.asc())
+    else:
+        query = query.order_by(Pago.fecha_pago.desc(), Pago.id.desc())
+    
+    filas = query.limit(per_page).offset((page - 1) * per_page).all()
+    total = filas[0].total if filas else 0
+    ahora = datetime.utcnow()
+    
+    return jsonify({
+        'pagos': [{
+            'id': f.id,
+            'compra_id': f.compra_id,
+            'metodo_pago': f.metodo_pago,
+            'numero_referencia': f.numero_referencia,
+            'banco_origen': f.banco_origen,
+            'telefono_pago': f.telefono_pago,
+            'monto': float(f.monto) if f.monto else 0,
+            'estado': f.estado,
+            'fecha_pago': f.fecha_pago.isoformat() if f.fecha_pago else None,
+            'antiguedad_minutos': int((ahora - f.fecha_pago).total_seconds() // 60) if f.fecha_pago else None,
+            'duplicado_de': f.duplicado_de,
+            'referencia_repetida_en': f.referencia_repetida_en,
+            'posible_duplicado': f.duplicado_de is not None or f.referencia_repetida_en is not None,
+            'compra': {
+                'id': f.compra_id,
+                'estado': f.compra_estado,
+                'monto_total': float(f.monto_total) if f.monto_total else 0,
+                'fecha_compra': f.fecha_compra.isoformat() if f.fecha_compra else None
+            },
+            'usuario': {
+                'id': f.usuario_id,
+                'nombre': f.usuario_nombre,
+                'apellido': f.usuario_apellido,
+                'cedula': f.cedula,
+                'tipo_usuario': f.tipo_usuario
+            },
+            'combo': {
+                'id': f.combo_id,
+                'nombre': f.combo_nombre,
+                'tipo': f.combo_tipo
+            }
+        } for f in filas],
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'current_page': page
+    }), 200
+
+
 @pagos_bp.route('/<int:id>/verificar', methods=['POST'])
 @jwt_required()
 @cobranza_required
@@ -178,10 +325,13 @@ def get_pagos_pendientes():
         {'name': 'body', 'in': 'body', 'schema': {'type': 'object', 'properties': {
             'accion': {'type': 'string', 'enum': ['aprobar', 'rechazar']},
             'notas': {'type': 'string'}
-        }}}
+        }}},
+        {'name': 'Idempotency-Key', 'in': 'header', 'type': 'string', 'required': False,
+         'description': 'Clave única por operación; los reintentos devuelven la respuesta original'}
     ],
     'responses': {200: {'description': 'Pago procesado, retiro creado si aprobado'}}
 })
+@idempotente()
 def verificar_pago(id):
     current_user_id = int(get_jwt_identity())
     data = request.get_json()
@@ -195,6 +345,18 @@ def verificar_pago(id):
     if accion not in ['aprobar', 'rechazar']:
         return jsonify({'error': 'Acción debe ser aprobar o rechazar'}), 400
     
+    # En vivo: cubre también los duplicados que entraron por un camino permitido por el índice.
+    # Solo bloquea el pago anterior (el original) o uno ya verificado, no la copia del que se aprueba
+    repetidos = pagos_con_misma_referencia(pago)
+    if accion == 'aprobar':
+        original = next((
+            otro for otro in repetidos
+            if otro.estado != 'rechazado' and (otro.banco_origen or '') == (pago.banco_origen or '')
+            and (otro.id < pago.id or otro.estado == 'verificado')
+        ), None)
+        if original:
+            return jsonify({'error': f'Este pago repite la referencia del pago #{original.id}'}), 400
+    
     pago.verificado_por = current_user_id
     pago.fecha_verificacion = datetime.utcnow()
     pago.notas_verificacion = data.get('notas')
@@ -203,14 +365,10 @@ def verificar_pago(id):
         pago.estado = 'verificado'
         pago.compra.estado = 'pagado'
         
-        combo = pago.compra.combo
-        for combo_producto in combo.productos:
-            inventario = Inventario.query.filter_by(producto_id=combo_producto.producto_id).first()
-            if inventario:
-                inventario.cantidad -= combo_producto.cantidad
-                if inventario.cantidad < 0:
-                    inventario.cantidad = 0
-                inventario.ultima_salida = datetime.utcnow()
+        salidas = {}
+        for combo_producto in pago.compra.combo.productos:
+            salidas[combo_producto.producto_id] = salidas.get(combo_producto.producto_id, 0) + combo_producto.cantidad
+        descontar_stock(salidas, referencia_tipo='pago', referencia_id=pago.id, usuario_id=current_user_id)
         
         usuario = pago.compra.usuario
         fecha_retiro = datetime.utcnow() + timedelta(days=1)
@@ -250,20 +408,25 @@ def verificar_pago(id):
             print(f"Error enviando email: {e}")
         
         db.session.commit()
+        PAGOS_PROCESADOS.labels('verificado').inc()
+        invalidar_resumen_compras(pago.compra.usuario_id)
+        RETIROS_CREADOS.inc()
         
         return jsonify({
             'message': 'Pago verificado exitosamente',
-            'pago': pago.to_dict(),
+            'pago': pago.to_dict(referencia_repetida_en=repetidos[0].id if repetidos else None),
             'retiro': retiro.to_dict()
         }), 200
     else:
         pago.estado = 'rechazado'
         pago.compra.estado = 'pendiente_pago'
         db.session.commit()
+        PAGOS_PROCESADOS.labels('rechazado').inc()
+        invalidar_resumen_compras(pago.compra.usuario_id)
         
         return jsonify({
             'message': 'Pago rechazado',
-            'pago': pago.to_dict()
+            'pago': pago.to_dict(referencia_repetida_en=repetidos[0].id if repetidos else None)
         }), 200
 
 
@@ -272,17 +435,69 @@ def verificar_pago(id):
 @swag_from({
     'tags': ['Pagos'],
     'summary': 'Mis compras',
-    'description': 'Obtener historial de compras del usuario',
+    'description': 'Obtener historial de compras del usuario (paginado, más recientes primero)',
     'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'page', 'in': 'query', 'type': 'integer', 'default': 1},
+        {'name': 'per_page', 'in': 'query', 'type': 'integer', 'default': 20}
+    ],
     'responses': {200: {'description': 'Lista de compras del usuario'}}
 })
 def get_mis_compras():
     current_user_id = int(get_jwt_identity())
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
     
-    compras = Compra.query.filter_by(usuario_id=current_user_id).order_by(
-        Compra.fecha_compra.desc()
-    ).all()
+    # combo, pago (con verificador) y retiro en el mismo SELECT; el usuario es el del token
+    compras = Compra.query.options(
+        joinedload(Compra.combo).load_only(Combo.nombre),
+        joinedload(Compra.pago).joinedload(Pago.verificador),
+        joinedload(Compra.retiro)
+    ).filter_by(usuario_id=current_user_id).order_by(
+        Compra.fecha_compra.desc(), Compra.id.desc()
+    ).paginate(page=page, per_page=per_page, error_out=False)
     
     return jsonify({
-        'compras': [c.to_dict() for c in compras]
+        'compras': [c.to_dict(incluir_usuario=False) for c in compras.items],
+        'total': compras.total,
+        'pages': compras.pages,
+        'current_page': page
     }), 200
+
+
+@pagos_bp.route('/mis-compras/resumen', methods=['GET'])
+@jwt_required()
+@swag_from({
+    'tags': ['Pagos'],
+    'summary': 'Resumen de mis compras',
+    'description': 'Cantidad de compras por estado y última compra del usuario (Dashboard)',
+    'security': [{'Bearer': []}],
+    'responses': {200: {'description': 'Resumen de compras del usuario'}}
+})
+def get_resumen_mis_compras():
+    current_user_id = int(get_jwt_identity())
+    
+    def calcular():
+        por_estado = dict(db.session.query(
+            Compra.estado, func.count(Compra.id)
+        ).filter(Compra.usuario_id == current_user_id).group_by(Compra.estado).all())
+        
+        ultima = db.session.query(
+            Compra.id, Compra.estado, Compra.monto_total, Compra.fecha_compra, Combo.nombre
+        ).join(Combo, Combo.id == Compra.combo_id).filter(
+            Compra.usuario_id == current_user_id
+        ).order_by(Compra.fecha_compra.desc(), Compra.id.desc()).first()
+        
+        return {
+            'total': sum(por_estado.values()),
+            'por_estado': por_estado,
+            'ultima_compra': {
+                'id': ultima.id,
+                'estado': ultima.estado,
+                'monto_total': float(ultima.monto_total) if ultima.monto_total else 0,
+                'fecha_compra': ultima.fecha_compra.isoformat() if ultima.fecha_compra else None,
+                'combo_nombre': ultima.nombre
+            } if ultima else None
+        }
+    
+    return jsonify(resumen_compras_cache.obtener(current_user_id, calcular)), 200
@@ -1,13 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
 from flasgger import swag_from
 from app import db
-from app.models.pedido_proveedor import PedidoProveedor, DetallePedidoProveedor
+from app.models.pedido_proveedor import PedidoProveedor
 from app.models.proveedor import Proveedor
-from app.models.producto import Producto
-from app.models.inventario import Inventario
 from app.utils.decorators import admin_required
+from app.services.pedidos import ErrorPedido, cambiar_estado, crear_pedido, leer_csv
+from app.services.reposicion import agrupar_por_proveedor, generar_borradores, planificar
 
 pedidos_bp = Blueprint('pedidos', __name__)
 
@@ -22,7 +21,7 @@ pedidos_bp = Blueprint('pedidos', __name__)
     'parameters': [
         {'name': 'page', 'in': 'query', 'type': 'integer', 'default': 1},
         {'name': 'per_page', 'in': 'query', 'type': 'integer', 'default': 10},
-        {'name': 'estado', 'in': 'query', 'type': 'string', 'enum': ['pendiente', 'confirmado', 'en_transito', 'recibido', 'cancelado']},
+        {'name': 'estado', 'in': 'query', 'type': 'string', 'enum': ['borrador', 'pendiente', 'confirmado', 'en_transito', 'recibido', 'cancelado']},
         {'name': 'proveedor_id', 'in': 'query', 'type': 'integer'}
     ],
     'responses': {200: {'description': 'Lista de pedidos'}}
@@ -106,44 +105,60 @@ def create_pedido():
     if not proveedor:
         return jsonify({'error': 'Proveedor no encontrado'}), 404
     
-    fecha_entrega = datetime.utcnow() + timedelta(days=proveedor.tiempo_entrega_dias)
+    try:
+        pedido = crear_pedido(proveedor, data['detalles'], data.get('notas'), current_user_id)
+    except ErrorPedido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
     
-    pedido = PedidoProveedor(
-        proveedor_id=data['proveedor_id'],
-        notas=data.get('notas'),
-        fecha_entrega_esperada=fecha_entrega,
-        creado_por=current_user_id
-    )
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Pedido creado exitosamente',
+        'pedido': pedido.to_dict()
+    }), 201
+
+
+@pedidos_bp.route('/csv', methods=['POST'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Pedidos'],
+    'summary': 'Crear pedido desde CSV',
+    'description': 'Crear un pedido grande desde un archivo CSV con columnas producto_id,cantidad',
+    'security': [{'Bearer': []}],
+    'consumes': ['multipart/form-data'],
+    'parameters': [
+        {'name': 'archivo', 'in': 'formData', 'type': 'file', 'required': True},
+        {'name': 'proveedor_id', 'in': 'formData', 'type': 'integer', 'required': True},
+        {'name': 'notas', 'in': 'formData', 'type': 'string'}
+    ],
+    'responses': {201: {'description': 'Pedido creado'}}
+})
+def create_pedido_csv():
+    current_user_id = int(get_jwt_identity())
+    archivo = request.files.get('archivo')
+    proveedor_id = request.form.get('proveedor_id', type=int)
+    
+    if not archivo:
+        return jsonify({'error': 'archivo es requerido'}), 400
+    
+    if not proveedor_id:
+        return jsonify({'error': 'proveedor_id es requerido'}), 400
+    
+    proveedor = Proveedor.query.get(proveedor_id)
+    if not proveedor:
+        return jsonify({'error': 'Proveedor no encontrado'}), 404
+    
+    try:
+        detalles = leer_csv(archivo)
+        pedido = crear_pedido(proveedor, detalles, request.form.get('notas'), current_user_id)
+    except UnicodeDecodeError:
+        return jsonify({'error': 'El archivo debe estar codificado en UTF-8'}), 400
+    except ErrorPedido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
     
-    db.session.add(pedido)
-    db.session.flush()
-    
-    total = 0
-    for detalle_data in data['detalles']:
-        producto = Producto.query.get(detalle_data['producto_id'])
-        if not producto:
-            db.session.rollback()
-            return jsonify({'error': f'Producto {detalle_data["producto_id"]} no encontrado'}), 404
-        
-        if producto.proveedor_id != proveedor.id:
-            db.session.rollback()
-            return jsonify({'error': f'Producto {producto.nombre} no pertenece al proveedor seleccionado'}), 400
-        
-        cantidad = detalle_data['cantidad']
-        precio = float(producto.precio_compra)
-        subtotal = cantidad * precio
-        total += subtotal
-        
-        detalle = DetallePedidoProveedor(
-            pedido_id=pedido.id,
-            producto_id=producto.id,
-            cantidad=cantidad,
-            precio_unitario=precio,
-            subtotal=subtotal
-        )
-        db.session.add(detalle)
-    
-    pedido.total = total
     db.session.commit()
     
     return jsonify({
@@ -152,50 +167,115 @@ def create_pedido():
     }), 201
 
 
+PARAMETROS_REPOSICION = [
+    {'name': 'ventana_dias', 'in': 'query', 'type': 'integer', 'description': 'Días de ventas usados para estimar la demanda'},
+    {'name': 'cobertura_dias', 'in': 'query', 'type': 'integer', 'description': 'Días a cubrir después de la entrega'},
+    {'name': 'nivel_servicio', 'in': 'query', 'type': 'number', 'description': 'Probabilidad de no quebrar stock (0.5 - 0.999)'}
+]
+
+
+def _parametros_reposicion():
+    config = current_app.config
+    ventana = request.args.get('ventana_dias', config['REPOSICION_VENTANA_DIAS'], type=int)
+    cobertura = request.args.get('cobertura_dias', config['REPOSICION_COBERTURA_DIAS'], type=int)
+    nivel = request.args.get('nivel_servicio', config['REPOSICION_NIVEL_SERVICIO'], type=float)
+    if not 1 <= ventana <= 365 or not 0 <= cobertura <= 90 or not 0.5 <= nivel < 1:
+        raise ErrorPedido('Parámetros inválidos: ventana_dias 1-365, cobertura_dias 0-90, nivel_servicio 0.5-0.999')
+    return {'ventana_dias': ventana, 'cobertura_dias': cobertura, 'nivel_servicio': nivel}
+
+
+@pedidos_bp.route('/reposicion', methods=['GET'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Pedidos'],
+    'summary': 'Plan de reposición',
+    'description': 'Cantidad sugerida por producto según demanda reciente de combos, stock, pedidos abiertos '
+                   'y tiempo de entrega del proveedor, agrupada por proveedor. No crea pedidos.',
+    'security': [{'Bearer': []}],
+    'parameters': PARAMETROS_REPOSICION,
+    'responses': {200: {'description': 'Plan por proveedor'}, 400: {'description': 'Parámetros inválidos'}}
+})
+def get_plan_reposicion():
+    try:
+        parametros = _parametros_reposicion()
+    except ErrorPedido as e:
+        return jsonify({'error': str(e)}), e.status
+    
+    return jsonify({
+        'parametros': parametros,
+        'proveedores': agrupar_por_proveedor(planificar(**parametros))
+    }), 200
+
+
+@pedidos_bp.route('/reposicion', methods=['POST'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Pedidos'],
+    'summary': 'Generar pedidos en borrador',
+    'description': 'Calcula el plan de reposición y crea un pedido en estado borrador por proveedor, reemplazando '
+                   'los borradores anteriores. Un borrador se confirma cambiando su estado a pendiente.',
+    'security': [{'Bearer': []}],
+    'parameters': PARAMETROS_REPOSICION,
+    'responses': {201: {'description': 'Borradores creados'}, 400: {'description': 'Parámetros inválidos'}}
+})
+def generar_plan_reposicion():
+    current_user_id = int(get_jwt_identity())
+    try:
+        parametros = _parametros_reposicion()
+        pedidos = generar_borradores(planificar(**parametros), current_user_id)
+    except ErrorPedido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
+    
+    db.session.commit()
+    
+    return jsonify({
+        'message': f'{len(pedidos)} pedido(s) en borrador generados',
+        'parametros': parametros,
+        'pedidos': [p.to_dict() for p in pedidos]
+    }), 201
+
+
 @pedidos_bp.route('/<int:id>/estado', methods=['PUT'])
 @jwt_required()
 @admin_required
 @swag_from({
     'tags': ['Pedidos'],
     'summary': 'Actualizar estado del pedido',
-    'description': 'Cambiar estado y actualizar inventario al recibir',
+    'description': 'Cambiar estado y actualizar inventario al recibir. Al recibir se puede indicar la cantidad '
+                   'recibida por detalle; las líneas omitidas se reciben completas. Un pedido recibido no cambia de estado.',
     'security': [{'Bearer': []}],
     'parameters': [
         {'name': 'id', 'in': 'path', 'type': 'integer', 'required': True},
         {'name': 'body', 'in': 'body', 'schema': {'type': 'object', 'properties': {
-            'estado': {'type': 'string', 'enum': ['pendiente', 'confirmado', 'en_transito', 'recibido', 'cancelado']}
+            'estado': {'type': 'string', 'enum': ['borrador', 'pendiente', 'confirmado', 'en_transito', 'recibido', 'cancelado']},
+            'recepcion': {'type': 'array', 'items': {'type': 'object', 'properties': {
+                'detalle_id': {'type': 'integer'},
+                'cantidad_recibida': {'type': 'integer'}
+            }}}
         }}}
     ],
-    'responses': {200: {'description': 'Estado actualizado'}}
+    'responses': {
+        200: {'description': 'Estado actualizado'},
+        400: {'description': 'Estado o recepción inválidos'},
+        409: {'description': 'El pedido ya fue recibido'}
+    }
 })
 def update_estado_pedido(id):
-    pedido = PedidoProveedor.query.get_or_404(id)
-    data = request.get_json()
-    
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
     nuevo_estado = data.get('estado')
-    estados_validos = ['pendiente', 'confirmado', 'en_transito', 'recibido', 'cancelado']
-    
-    if nuevo_estado not in estados_validos:
-        return jsonify({'error': f'Estado inválido. Debe ser uno de: {", ".join(estados_validos)}'}), 400
-    
-    if nuevo_estado == 'recibido':
-        pedido.fecha_entrega_real = datetime.utcnow()
-        
-        for detalle in pedido.detalles:
-            inventario = Inventario.query.filter_by(producto_id=detalle.producto_id).first()
-            if inventario:
-                inventario.cantidad += detalle.cantidad
-                inventario.ultima_entrada = datetime.utcnow()
-            else:
-                inventario = Inventario(
-                    producto_id=detalle.producto_id,
-                    cantidad=detalle.cantidad,
-                    ultima_entrada=datetime.utcnow()
-                )
-                db.session.add(inventario)
-    
-    pedido.estado = nuevo_estado
+    
+    try:
+        cambiar_estado(id, nuevo_estado, data.get('recepcion'), current_user_id)
+    except ErrorPedido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
+    
     db.session.commit()
+    pedido = PedidoProveedor.query.get(id)
     
     return jsonify({
         'message': f'Estado actualizado a {nuevo_estado}',
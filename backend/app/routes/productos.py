@@ -1,11 +1,16 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from flasgger import swag_from
 from app import db
+from app.database import lectura_replica
 from app.models.producto import Producto
-from app.models.inventario import Inventario
+from app.models.inventario import Inventario, MovimientoInventario, SnapshotInventario
 from app.models.proveedor import Proveedor
-from app.utils.decorators import admin_required
+from app.utils.decorators import admin_required, logistica_required
+from app.services.inventario import ajustar_stock, registrar_movimientos
+from app.services.busqueda import filtrar_productos
+from app.services.precios import ErrorPrecios, actualizar_precios, invalidar_precios
+from app.utils.tablas import leer_tabla
 
 productos_bp = Blueprint('productos', __name__)
 
@@ -19,11 +24,14 @@ productos_bp = Blueprint('productos', __name__)
     'parameters': [
         {'name': 'page', 'in': 'query', 'type': 'integer', 'default': 1},
         {'name': 'per_page', 'in': 'query', 'type': 'integer', 'default': 10},
+        {'name': 'q', 'in': 'query', 'type': 'string',
+         'description': 'Buscar en nombre, descripción y categoría sin importar acentos ni errores de tipeo; ordena por relevancia'},
         {'name': 'categoria', 'in': 'query', 'type': 'string'},
         {'name': 'proveedor_id', 'in': 'query', 'type': 'integer'}
     ],
     'responses': {200: {'description': 'Lista de productos'}}
 })
+@lectura_replica()
 def get_productos():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -44,7 +52,13 @@ def get_productos():
     if proveedor_id:
         query = query.filter_by(proveedor_id=proveedor_id)
     
-    productos = query.order_by(Producto.nombre).paginate(
+    busqueda = (request.args.get('q') or '').strip()
+    if busqueda:
+        query = filtrar_productos(query, busqueda)
+    else:
+        query = query.order_by(Producto.nombre)
+    
+    productos = query.paginate(
         page=page, per_page=per_page, error_out=False
     )
     
@@ -126,6 +140,10 @@ def create_producto():
         cantidad_minima=data.get('cantidad_minima', 10)
     )
     db.session.add(inventario)
+    registrar_movimientos(
+        {producto.id: inventario.cantidad}, 'inicial', referencia_tipo='producto',
+        referencia_id=producto.id, usuario_id=int(get_jwt_identity())
+    )
     
     db.session.commit()
     
@@ -135,6 +153,63 @@ def create_producto():
     }), 201
 
 
+@productos_bp.route('/masivo', methods=['POST'])
+@jwt_required()
+@logistica_required
+@swag_from({
+    'tags': ['Productos'],
+    'summary': 'Actualizar precios y estado de muchos productos',
+    'description': 'JSON {"productos": [{"id", "precio_compra", "precio_venta", "activo"}]} o archivo CSV/XLSX '
+                   'con esas columnas (id o producto_id). Los campos vacíos no cambian. Retorna el antes/después '
+                   'de cada producto y el margen de cada combo afectado; con simular=true no guarda nada.',
+    'security': [{'Bearer': []}],
+    'consumes': ['application/json', 'multipart/form-data'],
+    'parameters': [
+        {'name': 'simular', 'in': 'query', 'type': 'boolean', 'default': False},
+        {'name': 'archivo', 'in': 'formData', 'type': 'file'},
+        {'name': 'body', 'in': 'body', 'schema': {'type': 'object', 'properties': {
+            'productos': {'type': 'array', 'items': {'type': 'object'}}
+        }}}
+    ],
+    'responses': {
+        200: {'description': 'Resumen: actualizados, sin cambios, errores por fila, diferencias y márgenes de combos'},
+        400: {'description': 'Archivo o cuerpo inválido'}
+    }
+})
+def actualizar_masivo():
+    simular = request.args.get('simular', 'false').lower() == 'true'
+    archivo = request.files.get('archivo')
+    
+    try:
+        if archivo:
+            columnas, filas = leer_tabla(archivo.stream, archivo.filename or '')
+            if 'id' not in columnas and 'producto_id' not in columnas:
+                return jsonify({'error': 'El archivo debe tener la columna id o producto_id'}), 400
+        else:
+            productos = (request.get_json(silent=True) or {}).get('productos')
+            if not isinstance(productos, list):
+                return jsonify({'error': 'productos (lista) o archivo es requerido'}), 400
+            filas = enumerate((p if isinstance(p, dict) else {} for p in productos), start=1)
+        resumen = actualizar_precios(filas)
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'El archivo debe estar codificado en UTF-8'}), 400
+    except ErrorPrecios as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    if simular:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    
+    return jsonify({
+        'message': f'{resumen["actualizados"]} producto(s) {"cambiarían" if simular else "actualizado(s)"}',
+        'simulado': simular,
+        **resumen
+    }), 200
+
+
 @productos_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 @admin_required
@@ -167,6 +242,7 @@ def update_producto(id):
     producto.activo = data.get('activo', producto.activo)
     
     db.session.commit()
+    invalidar_precios()
     
     return jsonify({
         'message': 'Producto actualizado exitosamente',
@@ -198,12 +274,29 @@ def delete_producto(id):
 @swag_from({
     'tags': ['Productos'],
     'summary': 'Eliminar producto permanentemente',
+    'description': 'Solo para productos sin movimientos de inventario ni snapshots; los demás se desactivan',
     'security': [{'Bearer': []}],
     'parameters': [{'name': 'id', 'in': 'path', 'type': 'integer', 'required': True}],
-    'responses': {200: {'description': 'Producto eliminado'}, 400: {'description': 'Error'}}
+    'responses': {
+        200: {'description': 'Producto eliminado'},
+        400: {'description': 'Error'},
+        409: {'description': 'El producto tiene historial de inventario; debe desactivarse'}
+    }
 })
 def eliminar_producto(id):
     producto = Producto.query.get_or_404(id)
+    
+    # El libro de movimientos y los snapshots no se borran: el stock histórico depende de ellos
+    con_historial = db.session.query(
+        db.session.query(MovimientoInventario.id).filter_by(producto_id=producto.id).exists()
+    ).scalar() or db.session.query(
+        db.session.query(SnapshotInventario.id).filter_by(producto_id=producto.id).exists()
+    ).scalar()
+    if con_historial:
+        return jsonify({
+            'error': 'El producto tiene movimientos de inventario registrados. Desactívelo en lugar de eliminarlo.'
+        }), 409
+    
     try:
         inventario = Inventario.query.filter_by(producto_id=producto.id).first()
         if inventario:
@@ -216,6 +309,86 @@ def eliminar_producto(id):
         return jsonify({'error': 'No se puede eliminar. Tiene registros asociados.'}), 400
 
 
+@productos_bp.route('/<int:id>/inventario', methods=['PUT'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Productos'],
+    'summary': 'Ajustar inventario',
+    'description': 'Fijar el stock contado del producto; la diferencia queda registrada como movimiento de ajuste',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'id', 'in': 'path', 'type': 'integer', 'required': True},
+        {'name': 'body', 'in': 'body', 'required': True, 'schema': {
+            'type': 'object',
+            'required': ['cantidad', 'motivo'],
+            'properties': {
+                'cantidad': {'type': 'integer', 'minimum': 0},
+                'motivo': {'type': 'string'}
+            }
+        }}
+    ],
+    'responses': {200: {'description': 'Inventario ajustado'}, 400: {'description': 'Datos inválidos'}}
+})
+def ajustar_inventario(id):
+    producto = Producto.query.get_or_404(id)
+    data = request.get_json() or {}
+    
+    cantidad = data.get('cantidad')
+    motivo = (data.get('motivo') or '').strip()
+    if not isinstance(cantidad, int) or isinstance(cantidad, bool) or cantidad < 0:
+        return jsonify({'error': 'La cantidad debe ser un entero mayor o igual a 0'}), 400
+    if not motivo:
+        return jsonify({'error': 'El motivo del ajuste es requerido'}), 400
+    
+    inventario, diferencia = ajustar_stock(producto.id, cantidad, int(get_jwt_identity()), motivo[:255])
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Inventario ajustado',
+        'diferencia': diferencia,
+        'inventario': inventario.to_dict()
+    }), 200
+
+
+@productos_bp.route('/<int:id>/movimientos', methods=['GET'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Productos'],
+    'summary': 'Movimientos de inventario del producto',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'id', 'in': 'path', 'type': 'integer', 'required': True},
+        {'name': 'tipo', 'in': 'query', 'type': 'string', 'enum': ['inicial', 'entrada_pedido', 'salida_venta', 'ajuste']},
+        {'name': 'page', 'in': 'query', 'type': 'integer', 'default': 1},
+        {'name': 'per_page', 'in': 'query', 'type': 'integer', 'default': 20}
+    ],
+    'responses': {200: {'description': 'Movimientos del más reciente al más antiguo'}}
+})
+@lectura_replica()
+def get_movimientos(id):
+    producto = Producto.query.get_or_404(id)
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 20, type=int), 100)
+    tipo = request.args.get('tipo')
+    
+    query = MovimientoInventario.query.filter_by(producto_id=producto.id)
+    if tipo:
+        query = query.filter_by(tipo=tipo)
+    
+    movimientos = query.order_by(MovimientoInventario.fecha.desc(), MovimientoInventario.id.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    
+    return jsonify({
+        'movimientos': [m.to_dict() for m in movimientos.items],
+        'total': movimientos.total,
+        'pages': movimientos.pages,
+        'current_page': page
+    }), 200
+
+
 @productos_bp.route('/categorias', methods=['GET'])
 @jwt_required()
 @swag_from({
@@ -224,6 +397,7 @@ def eliminar_producto(id):
     'security': [{'Bearer': []}],
     'responses': {200: {'description': 'Lista de categorías'}}
 })
+@lectura_replica()
 def get_categorias():
     categorias = db.session.query(Producto.categoria).distinct().filter(
         Producto.categoria.isnot(None),
@@ -2,18 +2,27 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 from flasgger import swag_from
 from app import db
+from app.database import seleccionar_replica
 from app.models.compra import Compra
 from app.models.pago import Pago
 from app.models.inventario import Inventario
 from app.models.producto import Producto
 from app.models.combo import Combo
 from app.utils.decorators import admin_required
+from app.services.inventario import stock_en_fecha
+from app.services.pronostico import pronostico
 
 reportes_bp = Blueprint('reportes', __name__)
 
 
+@reportes_bp.before_request
+def usar_engine_reportes():
+    seleccionar_replica('replica_reportes', respaldo='reportes')
+
+
 @reportes_bp.route('/semanal', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -63,7 +72,7 @@ def reporte_semanal():
         Pago.fecha_verificacion <= fecha_fin
     ).group_by(Combo.nombre).all()
     
-    inventario = Inventario.query.join(Producto).filter(
+    inventario = Inventario.query.join(Producto).options(contains_eager(Inventario.producto)).filter(
         Producto.activo == True
     ).all()
     
@@ -108,7 +117,8 @@ def reporte_semanal():
     'responses': {200: {'description': 'Resumen y detalle del inventario'}}
 })
 def reporte_inventario():
-    inventario = Inventario.query.join(Producto).filter(
+    # El producto llega en el mismo JOIN: to_dict y valor_total no consultan uno por fila
+    inventario = Inventario.query.join(Producto).options(contains_eager(Inventario.producto)).filter(
         Producto.activo == True
     ).order_by(Producto.nombre).all()
     
@@ -128,6 +138,90 @@ def reporte_inventario():
     }), 200
 
 
+@reportes_bp.route('/inventario/historico', methods=['GET'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Reportes'],
+    'summary': 'Inventario a una fecha',
+    'description': 'Stock de cada producto en un momento pasado, a partir del snapshot diario anterior '
+                   'y los movimientos desde su cierre. Una fecha sin hora se toma al cierre del día.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'fecha', 'in': 'query', 'type': 'string', 'required': True, 'description': 'YYYY-MM-DD o YYYY-MM-DDTHH:MM'},
+        {'name': 'producto_id', 'in': 'query', 'type': 'integer'}
+    ],
+    'responses': {200: {'description': 'Stock por producto a la fecha'}, 400: {'description': 'Fecha inválida'}}
+})
+def reporte_inventario_historico():
+    fecha = request.args.get('fecha', '')
+    try:
+        momento = datetime.fromisoformat(fecha) if 'T' in fecha else datetime.fromisoformat(fecha).date()
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida, use YYYY-MM-DD o YYYY-MM-DDTHH:MM'}), 400
+    
+    producto_id = request.args.get('producto_id', type=int)
+    stock, dia_snapshot = stock_en_fecha(momento, [producto_id] if producto_id else None)
+    
+    nombres = dict(db.session.query(Producto.id, Producto.nombre).filter(Producto.id.in_(stock.keys())).all())
+    
+    return jsonify({
+        'fecha': momento.isoformat(),
+        'snapshot': dia_snapshot.isoformat() if dia_snapshot else None,
+        'productos': [
+            {'producto_id': pid, 'producto_nombre': nombres.get(pid), 'cantidad': cantidad}
+            for pid, cantidad in sorted(stock.items(), key=lambda item: nombres.get(item[0]) or '')
+        ]
+    }), 200
+
+
+@reportes_bp.route('/pronostico', methods=['GET'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Reportes'],
+    'summary': 'Pronóstico de demanda',
+    'description': 'Demanda diaria esperada por combo y por producto (desglosada por los componentes de cada combo). '
+                   'Los modelos se ajustan cada noche con `flask ajustar-pronosticos`.',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'dias', 'in': 'query', 'type': 'integer', 'default': 14, 'description': 'Días a proyectar desde hoy (1-60)'},
+        {'name': 'limite', 'in': 'query', 'type': 'integer', 'default': 50, 'description': 'Productos con mayor demanda a incluir'},
+        {'name': 'producto_id', 'in': 'query', 'type': 'integer'}
+    ],
+    'responses': {200: {'description': 'Pronóstico por combo y producto'}, 400: {'description': 'Parámetros inválidos'}}
+})
+def reporte_pronostico():
+    dias = request.args.get('dias', 14, type=int)
+    limite = request.args.get('limite', 50, type=int)
+    producto_id = request.args.get('producto_id', type=int)
+    if not 1 <= dias <= 60 or limite < 1:
+        return jsonify({'error': 'dias debe estar entre 1 y 60 y limite ser mayor a 0'}), 400
+    
+    resultado = pronostico(dias)
+    fechas = [f.isoformat() for f in resultado['fechas']]
+    
+    def serie(fila):
+        return {'total': round(float(fila.sum()), 2), 'diario': [round(float(x), 2) for x in fila]}
+    
+    totales = resultado['matriz_productos'].sum(axis=1)
+    if producto_id:
+        seleccion = [i for i, p in enumerate(resultado['productos']) if p['producto_id'] == producto_id]
+    else:
+        seleccion = totales.argsort()[::-1][:limite]
+    
+    return jsonify({
+        'fecha_ajuste': resultado['fecha_ajuste'].isoformat() if resultado['fecha_ajuste'] else None,
+        'fechas': fechas,
+        'combos': [
+            {**combo, **serie(resultado['matriz_combos'][i])} for i, combo in enumerate(resultado['combos'])
+        ],
+        'productos': [
+            {**resultado['productos'][i], **serie(resultado['matriz_productos'][i])} for i in seleccion
+        ]
+    }), 200
+
+
 @reportes_bp.route('/ventas', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -175,7 +269,7 @@ def reporte_ventas():
         },
         'ventas_diarias': [
             {
-                'fecha': v[0].isoformat() if v[0] else None,
+                'fecha': str(v[0]) if v[0] else None,  # date en PostgreSQL, texto ISO en SQLite
                 'cantidad': v[1],
                 'total': float(v[2]) if v[2] else 0
             } for v in ventas
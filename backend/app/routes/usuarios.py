@@ -1,9 +1,15 @@
-from flask import Blueprint, request, jsonify
+from itertools import islice
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flasgger import swag_from
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.usuario import Usuario
-from app.utils.decorators import admin_required
+from app.services.busqueda import buscar_usuarios
+from app.services.importacion_usuarios import ErrorImportacion, importar_usuarios, leer_filas
+from app.services.usuarios import campos_de_integrity_error, campos_duplicados, respuesta_duplicados
+from app.utils.decorators import admin_required, roles_required
+from app.utils.tablas import mensaje_codificacion
 
 usuarios_bp = Blueprint('usuarios', __name__)
 
@@ -52,6 +58,46 @@ def get_usuarios():
     }), 200
 
 
+@usuarios_bp.route('/buscar', methods=['GET'])
+@jwt_required()
+@roles_required('admin', 'cobranza', 'logistica')
+@swag_from({
+    'tags': ['Usuarios'],
+    'summary': 'Buscar usuarios para autocompletar',
+    'description': 'Por cédula (con o sin V-/E-) o teléfono por prefijo de dígitos, email por prefijo, '
+                   'o nombre y apellido sin acentos y tolerante a errores (Admin, Cobranza, Logística)',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'q', 'in': 'query', 'type': 'string', 'required': True, 'description': 'Mínimo 2 caracteres'},
+        {'name': 'limite', 'in': 'query', 'type': 'integer', 'default': 10, 'maximum': 50}
+    ],
+    'responses': {
+        200: {'description': 'Usuarios encontrados (proyección compacta)'},
+        403: {'description': 'No autorizado'}
+    }
+})
+def buscar():
+    consulta = (request.args.get('q') or '').strip()
+    limite = min(max(request.args.get('limite', 10, type=int), 1), 50)
+    if len(consulta) < 2:
+        return jsonify([]), 200
+    
+    return jsonify([
+        {
+            'id': u.id,
+            'nombre': u.nombre,
+            'apellido': u.apellido,
+            'cedula': u.cedula,
+            'email': u.email,
+            'telefono': u.telefono,
+            'tipo_usuario': u.tipo_usuario,
+            'rol': u.rol,
+            'activo': u.activo
+        }
+        for u in buscar_usuarios(consulta, limite)
+    ]), 200
+
+
 @usuarios_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -92,7 +138,10 @@ def get_usuario(id):
             }
         }
     }],
-    'responses': {201: {'description': 'Usuario creado'}, 400: {'description': 'Error de validación'}}
+    'responses': {
+        201: {'description': 'Usuario creado'},
+        400: {'description': 'Error de validación; los duplicados se reportan todos en errores por campo'}
+    }
 })
 def create_usuario():
     data = request.get_json()
@@ -102,14 +151,9 @@ def create_usuario():
         if field not in data:
             return jsonify({'error': f'Campo {field} es requerido'}), 400
     
-    if Usuario.query.filter_by(username=data['username']).first():
-        return jsonify({'error': 'El nombre de usuario ya existe'}), 400
-    
-    if Usuario.query.filter_by(email=data['email']).first():
-        return jsonify({'error': 'El email ya está registrado'}), 400
-    
-    if Usuario.query.filter_by(cedula=data['cedula']).first():
-        return jsonify({'error': 'La cédula ya está registrada'}), 400
+    duplicados = campos_duplicados({campo: data[campo] for campo in ('username', 'email', 'cedula')})
+    if duplicados:
+        return respuesta_duplicados(duplicados)
     
     usuario = Usuario(
         nombre=data['nombre'],
@@ -125,7 +169,14 @@ def create_usuario():
     usuario.set_password(data['password'])
     
     db.session.add(usuario)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        duplicados = campos_de_integrity_error(e)
+        if not duplicados:
+            raise
+        return respuesta_duplicados(duplicados)
     
     return jsonify({
         'message': 'Usuario creado exitosamente',
@@ -133,6 +184,54 @@ def create_usuario():
     }), 201
 
 
+@usuarios_bp.route('/importar', methods=['POST'])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Usuarios'],
+    'summary': 'Importar miembros desde CSV o XLSX',
+    'description': 'Columnas nombre, apellido, cedula, email, username y opcionales telefono, direccion, '
+                   'tipo_usuario, password. Se crean con rol cliente; las contraseñas vacías se generan y '
+                   'se devuelven en credenciales. Un CSV que no está en UTF-8 o un archivo con más de '
+                   'IMPORTACION_MAX_FILAS_WEB filas se rechaza antes de importar ninguna fila: los hashes se '
+                   'calculan dentro del request, así que los archivos grandes van por `flask importar-usuarios`.',
+    'security': [{'Bearer': []}],
+    'consumes': ['multipart/form-data'],
+    'parameters': [{'name': 'archivo', 'in': 'formData', 'type': 'file', 'required': True}],
+    'responses': {
+        200: {'description': 'Reporte: total, creados, errores por fila y campo, credenciales generadas'},
+        400: {'description': 'Archivo inválido, sin las columnas requeridas o con demasiadas filas'}
+    }
+})
+def importar():
+    archivo = request.files.get('archivo')
+    if not archivo:
+        return jsonify({'error': 'archivo es requerido'}), 400
+    
+    # bcrypt tarda ~0.3 s por fila dentro del request: un archivo grande excede el timeout del
+    # worker con lotes ya confirmados y contraseñas generadas que nunca llegan al cliente
+    max_filas = current_app.config['IMPORTACION_MAX_FILAS_WEB']
+    try:
+        filas = list(islice(leer_filas(archivo.stream, archivo.filename or ''), max_filas + 1))
+        if len(filas) > max_filas:
+            return jsonify({
+                'error': f'El archivo supera las {max_filas} filas que se importan desde la web; '
+                         f'use flask importar-usuarios'
+            }), 400
+        reporte = importar_usuarios(filas, tamano_lote=current_app.config['IMPORTACION_LOTE'])
+    except UnicodeDecodeError as e:
+        db.session.rollback()
+        return jsonify({'error': mensaje_codificacion(e)}), 400
+    except ErrorImportacion as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'message': f'{reporte["creados"]} de {reporte["total"]} miembro(s) importado(s)',
+        **reporte
+    }), 200
+
+
 @usuarios_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 @admin_required
@@ -149,21 +248,21 @@ def create_usuario():
             'activo': {'type': 'boolean'}, 'password': {'type': 'string'}
         }}}
     ],
-    'responses': {200: {'description': 'Usuario actualizado'}, 400: {'description': 'Error'}}
+    'responses': {200: {'description': 'Usuario actualizado'}, 400: {'description': 'Email o cédula ya registrados (errores por campo)'}}
 })
 def update_usuario(id):
     usuario = Usuario.query.get_or_404(id)
     data = request.get_json()
     
-    if 'email' in data and data['email'] != usuario.email:
-        if Usuario.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'El email ya está registrado'}), 400
-        usuario.email = data['email']
-    
-    if 'cedula' in data and data['cedula'] != usuario.cedula:
-        if Usuario.query.filter_by(cedula=data['cedula']).first():
-            return jsonify({'error': 'La cédula ya está registrada'}), 400
-        usuario.cedula = data['cedula']
+    cambios = {
+        campo: data[campo] for campo in ('email', 'cedula')
+        if campo in data and data[campo] != getattr(usuario, campo)
+    }
+    duplicados = campos_duplicados(cambios, excluir_id=usuario.id)
+    if duplicados:
+        return respuesta_duplicados(duplicados)
+    for campo, valor in cambios.items():
+        setattr(usuario, campo, valor)
     
     usuario.nombre = data.get('nombre', usuario.nombre)
     usuario.apellido = data.get('apellido', usuario.apellido)
@@ -176,7 +275,14 @@ def update_usuario(id):
     if 'password' in data and data['password']:
         usuario.set_password(data['password'])
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        duplicados = campos_de_integrity_error(e)
+        if not duplicados:
+            raise
+        return respuesta_duplicados(duplicados)
     
     return jsonify({
         'message': 'Usuario actualizado exitosamente',
@@ -0,0 +1,242 @@
+"""
+Búsqueda de texto sin acentos y tolerante a errores de tipeo
+En PostgreSQL usa índices GIN de pg_trgm/tsvector y btree de prefijo creados sobre
+expresiones normalizadas (migraciones f2a6c9d81b35 y 0b7d3e5f9a42). En otros motores, SQLite
+en desarrollo y pruebas, usa índices en memoria por proceso que se reconstruyen cuando cambia
+la tabla.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+from sqlalchemy import bindparam, case, func, literal_column, or_
+from app import db
+from app.models.producto import Producto
+from app.models.usuario import Usuario
+
+# Fracción mínima de trigramas de la búsqueda presentes en el texto (como word_similarity)
+SIMILITUD_MINIMA = 0.5
+MAX_RESULTADOS = 500
+
+# Debe coincidir con la expresión de los índices de la migración para que PostgreSQL los use
+TEXTO_PRODUCTO = (
+    "inmutable_unaccent(lower(coalesce({t}nombre, '') || ' ' || coalesce({t}categoria, '') "
+    "|| ' ' || coalesce({t}descripcion, '')))"
+)
+CEDULA_USUARIO = "regexp_replace({t}cedula, '[^0-9]', '', 'g')"
+TELEFONO_USUARIO = "regexp_replace(coalesce({t}telefono, ''), '[^0-9]', '', 'g')"
+EMAIL_USUARIO = "lower({t}email)"
+NOMBRE_USUARIO = "inmutable_unaccent(lower({t}nombre || ' ' || {t}apellido))"
+
+# Cédula o teléfono: dígitos con prefijo V-/E- y separadores opcionales
+PATRON_DOCUMENTO = re.compile(r'[VvEe]?[\s.\-]*\d[\d\s.\-]*')
+
+
+def normalizar(texto):
+    """Minúsculas, sin acentos y solo letras/dígitos separados por un espacio
+
+    La ñ queda como n, igual que con unaccent en PostgreSQL.
+    """
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', texto))
+
+
+def trigramas(texto):
+    """Trigramas por palabra con el mismo relleno que pg_trgm"""
+    resultado = set()
+    for palabra in texto.split():
+        relleno = f'  {palabra} '
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+
+def es_postgresql():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> ids, reconstruido cuando cambia `version()`"""
+
+    def __init__(self, cargar, version):
+        self._cargar = cargar
+        self._version_actual = version
+        self._version = None
+        self._textos = {}
+        self._invertido = {}
+        self._lock = Lock()
+
+    def _asegurar(self):
+        version = self._version_actual()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            textos = {id_: normalizar(texto) for id_, texto in self._cargar()}
+            invertido = defaultdict(set)
+            for id_, texto in textos.items():
+                for trigrama in trigramas(texto):
+                    invertido[trigrama].add(id_)
+            self._textos, self._invertido, self._version = textos, dict(invertido), version
+
+    def buscar(self, consulta, limite=MAX_RESULTADOS):
+        """Retornar [(id, puntaje)] ordenado de mayor a menor"""
+        self._asegurar()
+        consulta = normalizar(consulta)
+        buscados = trigramas(consulta)
+        if not buscados:
+            return []
+
+        coincidencias = defaultdict(int)
+        for trigrama in buscados:
+            for id_ in self._invertido.get(trigrama, ()):
+                coincidencias[id_] += 1
+
+        resultados = []
+        for id_, cantidad in coincidencias.items():
+            puntaje = cantidad / len(buscados)
+            texto = self._textos[id_]
+            if consulta in texto:
+                puntaje += 1 + (0.5 if texto.startswith(consulta) else 0)
+            if puntaje >= SIMILITUD_MINIMA:
+                resultados.append((id_, puntaje))
+        resultados.sort(key=lambda r: (-r[1], r[0]))
+        return resultados[:limite]
+
+
+class IndicePrefijos:
+    """Claves ordenadas para buscar por prefijo con bisect, reconstruidas cuando cambia `version()`"""
+
+    def __init__(self, cargar, version):
+        self._cargar = cargar
+        self._version_actual = version
+        self._version = None
+        self._claves = []
+        self._lock = Lock()
+
+    def _asegurar(self):
+        version = self._version_actual()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._claves = sorted((clave, id_) for id_, clave in self._cargar() if clave)
+            self._version = version
+
+    def buscar(self, prefijo, limite=MAX_RESULTADOS):
+        """Retornar los ids cuya clave empieza con `prefijo`, las más cortas primero"""
+        self._asegurar()
+        encontrados = {}
+        for clave, id_ in self._claves[bisect_left(self._claves, (prefijo,)):]:
+            if not clave.startswith(prefijo):
+                break
+            encontrados.setdefault(id_, len(clave))
+        return sorted(encontrados, key=lambda id_: (encontrados[id_], id_))[:limite]
+
+
+def _version_tabla(modelo):
+    def version():
+        return db.session.query(func.count(modelo.id), func.max(modelo.fecha_actualizacion)).one()
+    return version
+
+
+indice_productos = IndiceTrigramas(
+    lambda: db.session.query(
+        Producto.id,
+        func.coalesce(Producto.nombre, '') + ' ' + func.coalesce(Producto.categoria, '') + ' '
+        + func.coalesce(Producto.descripcion, '')
+    ).all(),
+    _version_tabla(Producto)
+)
+
+
+def _ordenar_por_ids(query, columna_id, resultados):
+    ids = [id_ for id_, _ in resultados]
+    if not ids:
+        return query.filter(False)
+    return query.filter(columna_id.in_(ids)).order_by(
+        case({id_: posicion for posicion, id_ in enumerate(ids)}, value=columna_id)
+    )
+
+
+def filtrar_productos(query, consulta):
+    """Filtrar y ordenar por relevancia una consulta de Producto según el texto `consulta`"""
+    if not es_postgresql():
+        return _ordenar_por_ids(query, Producto.id, indice_productos.buscar(consulta))
+
+    texto = literal_column(TEXTO_PRODUCTO.format(t='productos.'))
+    documento = func.to_tsvector(literal_column("'spanish'"), texto)
+    termino = func.plainto_tsquery(literal_column("'spanish'"), bindparam('q_busqueda', normalizar(consulta)))
+    normalizada = bindparam('q_trigramas', normalizar(consulta))
+
+    return query.filter(or_(
+        documento.op('@@')(termino),
+        normalizada.op('<%')(texto)
+    )).order_by(
+        (func.ts_rank(documento, termino) + func.word_similarity(normalizada, texto)).desc(),
+        Producto.nombre
+    )
+
+
+def _documentos_usuarios():
+    for id_, cedula, telefono, email in db.session.query(
+        Usuario.id, Usuario.cedula, Usuario.telefono, Usuario.email
+    ):
+        yield id_, re.sub(r'\D', '', cedula or '')
+        yield id_, re.sub(r'\D', '', telefono or '')
+        yield id_, (email or '').lower()
+
+
+indice_usuarios_claves = IndicePrefijos(_documentos_usuarios, _version_tabla(Usuario))
+indice_usuarios_nombres = IndiceTrigramas(
+    lambda: db.session.query(Usuario.id, Usuario.nombre + ' ' + Usuario.apellido).all(),
+    _version_tabla(Usuario)
+)
+
+
+def _columnas_usuario():
+    return db.session.query(
+        Usuario.id, Usuario.nombre, Usuario.apellido, Usuario.cedula, Usuario.email,
+        Usuario.telefono, Usuario.tipo_usuario, Usuario.rol, Usuario.activo
+    )
+
+
+def _prefijo_like(texto):
+    # Patrón completo en un parámetro (no `:p || '%'`) para que el planner use text_pattern_ops
+    return re.sub(r'([\\%_])', r'\\\1', texto) + '%'
+
+
+def buscar_usuarios(consulta, limite=10):
+    """Búsqueda para autocompletar: cédula o teléfono por prefijo de dígitos, email por
+    prefijo y nombre + apellido por similitud. Retorna filas con una proyección compacta."""
+    consulta = consulta.strip()
+    documento = PATRON_DOCUMENTO.fullmatch(consulta)
+    digitos = re.sub(r'\D', '', consulta) if documento else None
+    texto = normalizar(consulta)
+
+    if not es_postgresql():
+        if digitos:
+            ids = indice_usuarios_claves.buscar(digitos, limite)
+        else:
+            por_nombre = [id_ for id_, _ in indice_usuarios_nombres.buscar(consulta, limite)]
+            ids = list(dict.fromkeys(por_nombre + indice_usuarios_claves.buscar(consulta.lower(), limite)))[:limite]
+        return _ordenar_por_ids(_columnas_usuario(), Usuario.id, [(id_, None) for id_ in ids]).all()
+
+    t = 'usuarios.'
+    email = literal_column(EMAIL_USUARIO.format(t=t))
+    if digitos:
+        cedula = literal_column(CEDULA_USUARIO.format(t=t))
+        telefono = literal_column(TELEFONO_USUARIO.format(t=t))
+        query = _columnas_usuario().filter(or_(
+            cedula.like(digitos + '%'), telefono.like(digitos + '%')
+        )).order_by((cedula == digitos).desc(), func.length(cedula), Usuario.id)
+    else:
+        nombre = literal_column(NOMBRE_USUARIO.format(t=t))
+        normalizada = bindparam('q_nombre', texto)
+        query = _columnas_usuario().filter(or_(
+            normalizada.op('<%')(nombre), email.like(_prefijo_like(consulta.lower()), escape='\\')
+        )).order_by(func.word_similarity(normalizada, nombre).desc(), Usuario.nombre, Usuario.apellido)
+    return query.limit(limite).all()
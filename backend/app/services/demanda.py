@@ -0,0 +1,73 @@
+"""
+Series diarias de demanda como matrices NumPy
+Ventas verificadas por combo y día, y su desglose en productos a través de ComboProducto.
+"""
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import func
+from app import db
+from app.models.combo import ComboProducto
+from app.models.compra import Compra
+from app.models.pago import Pago
+
+
+def _a_fecha(valor):
+    # func.date() retorna date en PostgreSQL y texto 'YYYY-MM-DD' en SQLite
+    return valor if isinstance(valor, date) else date.fromisoformat(str(valor)[:10])
+
+
+def ventas_diarias_combos(inicio, dias, combo_ids=None):
+    """Retornar (combo_ids, matriz combos × días) de compras con pago verificado desde `inicio`
+
+    La columna j corresponde al día inicio + j; una sola consulta agrupada por combo y día.
+    """
+    dia = func.date(Pago.fecha_verificacion)
+    consulta = db.session.query(Compra.combo_id, dia, func.count(Pago.id)).join(
+        Pago, Pago.compra_id == Compra.id
+    ).filter(
+        Pago.estado == 'verificado',
+        Pago.fecha_verificacion >= inicio,
+        Pago.fecha_verificacion < inicio + timedelta(days=dias)
+    ).group_by(Compra.combo_id, dia)
+    if combo_ids is not None:
+        consulta = consulta.filter(Compra.combo_id.in_(combo_ids))
+    filas = consulta.all()
+
+    if combo_ids is None:
+        combo_ids = sorted({fila[0] for fila in filas})
+    combo_ids = np.asarray(combo_ids, dtype=np.int64)
+    indice = {int(cid): i for i, cid in enumerate(combo_ids)}
+
+    ventas = np.zeros((len(combo_ids), dias))
+    if filas:
+        combos, dias_venta, cantidades = zip(*filas)
+        columnas = np.array([(_a_fecha(d) - inicio).days for d in dias_venta])
+        np.add.at(ventas, (np.array([indice[c] for c in combos]), columnas), np.array(cantidades, dtype=float))
+    return combo_ids, ventas
+
+
+def matriz_componentes(producto_ids, combo_ids):
+    """Matriz productos × combos con las unidades de cada producto en cada combo"""
+    producto_idx = {int(pid): i for i, pid in enumerate(producto_ids)}
+    combo_idx = {int(cid): j for j, cid in enumerate(combo_ids)}
+    componentes = np.zeros((len(producto_ids), len(combo_ids)))
+    if not combo_idx:
+        return componentes
+
+    filas = db.session.query(
+        ComboProducto.producto_id, ComboProducto.combo_id, ComboProducto.cantidad
+    ).filter(ComboProducto.combo_id.in_(combo_idx.keys())).all()
+    filas = [f for f in filas if f.producto_id in producto_idx]
+    if filas:
+        np.add.at(
+            componentes,
+            (np.array([producto_idx[f.producto_id] for f in filas]), np.array([combo_idx[f.combo_id] for f in filas])),
+            np.array([f.cantidad or 1 for f in filas], dtype=float)
+        )
+    return componentes
+
+
+def demanda_diaria_productos(producto_ids, inicio, dias):
+    """Unidades diarias de cada producto consumidas por combos vendidos (productos × días)"""
+    combo_ids, ventas = ventas_diarias_combos(inicio, dias)
+    return matriz_componentes(producto_ids, combo_ids) @ ventas
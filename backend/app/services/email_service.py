@@ -1,6 +1,27 @@
 from flask import current_app
 from flask_mail import Message
 from app import mail
+from app.concurrencia import en_segundo_plano
+from app.utils.metrics import EMAILS_ENCOLADOS, EMAILS_FALLIDOS
+
+
+def _enviar(msg, descripcion):
+    try:
+        mail.send(msg)
+        return True
+    except Exception as e:
+        current_app.logger.error(f"Error enviando {descripcion}: {str(e)}")
+        EMAILS_FALLIDOS.inc()
+        return False
+
+
+def enviar_mensaje(msg, descripcion):
+    """Enviar un email; con MAIL_ASYNC el envío SMTP no ocupa el request"""
+    EMAILS_ENCOLADOS.inc()
+    if current_app.config.get('MAIL_ASYNC'):
+        en_segundo_plano(_enviar, msg, descripcion)
+        return True
+    return _enviar(msg, descripcion)
 
 
 def enviar_notificacion_pago(email, nombre, numero_retiro, numero_cola, fecha_retiro, tipo_cola):
@@ -36,17 +57,12 @@ def enviar_notificacion_pago(email, nombre, numero_retiro, numero_cola, fecha_re
     Cooperativa CECOALIMENTOS
     """
     
-    try:
-        msg = Message(
-            subject=asunto,
-            recipients=[email],
-            body=cuerpo
-        )
-        mail.send(msg)
-        return True
-    except Exception as e:
-        current_app.logger.error(f"Error enviando email a {email}: {str(e)}")
-        return False
+    msg = Message(
+        subject=asunto,
+        recipients=[email],
+        body=cuerpo
+    )
+    return enviar_mensaje(msg, f"email a {email}")
 
 
 def enviar_recordatorio_retiro(email, nombre, numero_retiro, fecha_retiro):
@@ -68,14 +84,9 @@ def enviar_recordatorio_retiro(email, nombre, numero_retiro, fecha_retiro):
     Cooperativa CECOALIMENTOS
     """
     
-    try:
-        msg = Message(
-            subject=asunto,
-            recipients=[email],
-            body=cuerpo
-        )
-        mail.send(msg)
-        return True
-    except Exception as e:
-        current_app.logger.error(f"Error enviando recordatorio a {email}: {str(e)}")
-        return False
+    msg = Message(
+        subject=asunto,
+        recipients=[email],
+        body=cuerpo
+    )
+    return enviar_mensaje(msg, f"recordatorio a {email}")
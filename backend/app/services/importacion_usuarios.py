@@ -0,0 +1,236 @@
+"""
+Importación masiva de miembros desde CSV o XLSX
+Las filas se leen en streaming y se procesan por lotes: validación, una consulta para los
+username/email/cédula ya registrados del lote, hash de las contraseñas iniciales en paralelo
+e INSERT por lotes. Cada fila rechazada queda en el reporte con sus errores por campo.
+"""
+import multiprocessing
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+import bcrypt
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.concurrencia import gevent_activo
+from app.models.usuario import Usuario
+from app.services.usuarios import MENSAJES_DUPLICADO, campos_de_integrity_error
+from app.utils.tablas import leer_tabla
+
+COLUMNAS_REQUERIDAS = ('nombre', 'apellido', 'cedula', 'email', 'username')
+COLUMNAS_OPCIONALES = ('telefono', 'direccion', 'tipo_usuario', 'password')
+TIPOS_USUARIO = ('regular', 'adulto_mayor', 'discapacitado')
+LONGITUDES = {'nombre': 100, 'apellido': 100, 'cedula': 20, 'email': 120, 'telefono': 20, 'username': 50}
+CAMPOS_UNICOS = tuple(MENSAJES_DUPLICADO)
+MENSAJES_REPETIDO = {
+    'username': 'Nombre de usuario repetido en el archivo',
+    'email': 'Email repetido en el archivo',
+    'cedula': 'Cédula repetida en el archivo'
+}
+
+
+class ErrorImportacion(Exception):
+    pass
+
+
+def _hashear(password):
+    # Nivel de módulo para poder enviarla a los procesos del pool
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+@contextmanager
+def _mapa_hash(procesos):
+    """Función map(passwords) -> hashes que reparte bcrypt entre los núcleos
+
+    El pool de procesos es solo para la CLI (`procesos` > 1). Dentro de un request se usa
+    `procesos`=1: con workers gevent el hash va al threadpool del hub, que tiene tamaño
+    acotado y donde bcrypt libera el GIL; con workers sync o gthread se hashea en serie.
+    """
+    if procesos > 1:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            yield lambda passwords: list(
+                pool.map(_hashear, passwords, chunksize=max(len(passwords) // (procesos * 4), 1))
+            )
+    elif gevent_activo():
+        import gevent
+        threadpool = gevent.get_hub().threadpool
+        yield lambda passwords: list(threadpool.map(_hashear, passwords))
+    else:
+        yield lambda passwords: [_hashear(p) for p in passwords]
+
+
+def leer_filas(flujo, nombre_archivo):
+    """Iterar (número de fila, dict) de un CSV o XLSX; el número cuenta el encabezado como fila 1"""
+    columnas, filas = leer_tabla(flujo, nombre_archivo)
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in columnas]
+    if faltantes:
+        raise ErrorImportacion(f'Faltan columnas: {", ".join(faltantes)}')
+
+    for numero, fila in filas:
+        yield numero, {c: v for c, v in fila.items() if c in COLUMNAS_REQUERIDAS + COLUMNAS_OPCIONALES}
+
+
+def validar_fila(fila):
+    """Retornar los errores por campo de una fila ya normalizada"""
+    errores = {}
+    for campo in COLUMNAS_REQUERIDAS:
+        if not fila.get(campo):
+            errores[campo] = f'Campo {campo} es requerido'
+    for campo, maximo in LONGITUDES.items():
+        if len(fila.get(campo) or '') > maximo:
+            errores.setdefault(campo, f'Máximo {maximo} caracteres')
+    if fila.get('email') and '@' not in fila['email']:
+        errores.setdefault('email', 'Email inválido')
+    if fila.get('tipo_usuario') and fila['tipo_usuario'] not in TIPOS_USUARIO:
+        errores['tipo_usuario'] = f'Debe ser uno de: {", ".join(TIPOS_USUARIO)}'
+    return errores
+
+
+def _registrados(lote):
+    """Valores únicos del lote que ya existen en la base, en una sola consulta"""
+    valores = {campo: {fila[campo] for _, fila in lote} for campo in CAMPOS_UNICOS}
+    existentes = db.session.query(*(getattr(Usuario, campo) for campo in CAMPOS_UNICOS)).filter(or_(
+        *(getattr(Usuario, campo).in_(valores[campo]) for campo in CAMPOS_UNICOS)
+    ))
+    registrados = {campo: set() for campo in CAMPOS_UNICOS}
+    for fila in existentes:
+        for campo, valor in zip(CAMPOS_UNICOS, fila):
+            if valor in valores[campo]:
+                registrados[campo].add(valor)
+    return registrados
+
+
+def _errores_duplicados(numero, campos):
+    return {'fila': numero, 'errores': {c: MENSAJES_DUPLICADO.get(c, 'No se pudo insertar') for c in campos}}
+
+
+def _insertar(filas):
+    """INSERT del lote y commit; retorna (errores, creados)
+
+    Los duplicados ya se descartaron con _registrados. Si otra importación o registro
+    concurrente gana la carrera, se revierte solo este lote, se vuelven a consultar sus
+    valores registrados y se inserta el resto; si vuelve a fallar se sigue fila por fila,
+    cada una en su propia transacción (sin savepoints, que pysqlite no maneja bien).
+    """
+    if not filas:
+        return [], 0
+    try:
+        db.session.execute(insert(Usuario), [datos for _, datos in filas])
+        db.session.commit()
+        return [], len(filas)
+    except IntegrityError:
+        db.session.rollback()
+
+    registrados = _registrados([(numero, datos) for numero, datos in filas])
+    errores, pendientes = [], []
+    for numero, datos in filas:
+        campos = [campo for campo in CAMPOS_UNICOS if datos[campo] in registrados[campo]]
+        if campos:
+            errores.append(_errores_duplicados(numero, campos))
+        else:
+            pendientes.append((numero, datos))
+    if not pendientes:
+        return errores, 0
+    try:
+        db.session.execute(insert(Usuario), [datos for _, datos in pendientes])
+        db.session.commit()
+        return errores, len(pendientes)
+    except IntegrityError:
+        db.session.rollback()
+
+    creados = 0
+    for numero, datos in pendientes:
+        try:
+            db.session.execute(insert(Usuario), [datos])
+            db.session.commit()
+            creados += 1
+        except IntegrityError as e:
+            db.session.rollback()
+            errores.append(_errores_duplicados(numero, campos_de_integrity_error(e) or ['fila']))
+    return errores, creados
+
+
+def importar_usuarios(filas, procesos=1, tamano_lote=1000, log=None):
+    """Importar miembros (rol cliente) desde `filas` = iterable de (número, dict)
+
+    Hace commit por lote: un error a mitad de archivo deja importados los lotes anteriores.
+    La codificación de un CSV se valida completa al abrirlo (leer_filas), antes del primer
+    commit. Las contraseñas vacías se generan y se devuelven en `credenciales` para
+    entregarlas a cada miembro.
+    """
+    reporte = {'total': 0, 'creados': 0, 'errores': [], 'credenciales': []}
+    vistos = {campo: set() for campo in CAMPOS_UNICOS}
+    filas = iter(filas)
+
+    with _mapa_hash(procesos) as hashear:
+        while True:
+            lote = list(islice(filas, tamano_lote))
+            if not lote:
+                break
+            reporte['total'] += len(lote)
+
+            validas = []
+            for numero, fila in lote:
+                errores = validar_fila(fila)
+                if errores:
+                    reporte['errores'].append({'fila': numero, 'errores': errores})
+                else:
+                    validas.append((numero, fila))
+
+            registrados = _registrados(validas) if validas else {}
+            aceptadas = []
+            for numero, fila in validas:
+                errores = {
+                    campo: MENSAJES_DUPLICADO[campo] if fila[campo] in registrados[campo]
+                    else MENSAJES_REPETIDO[campo]
+                    for campo in CAMPOS_UNICOS
+                    if fila[campo] in registrados[campo] or fila[campo] in vistos[campo]
+                }
+                for campo in CAMPOS_UNICOS:
+                    vistos[campo].add(fila[campo])
+                if errores:
+                    reporte['errores'].append({'fila': numero, 'errores': errores})
+                else:
+                    aceptadas.append((numero, fila))
+
+            generadas = {}
+            for numero, fila in aceptadas:
+                if not fila.get('password'):
+                    generadas[numero] = secrets.token_urlsafe(9)
+            hashes = hashear([fila.get('password') or generadas[numero] for numero, fila in aceptadas])
+
+            ahora = datetime.utcnow()
+            errores, creados = _insertar([
+                (numero, {
+                    'nombre': fila['nombre'],
+                    'apellido': fila['apellido'],
+                    'cedula': fila['cedula'],
+                    'email': fila['email'],
+                    'telefono': fila.get('telefono') or None,
+                    'direccion': fila.get('direccion') or None,
+                    'tipo_usuario': fila.get('tipo_usuario') or 'regular',
+                    'rol': 'cliente',
+                    'username': fila['username'],
+                    'password_hash': password_hash,
+                    'activo': True,
+                    'fecha_registro': ahora,
+                    'fecha_actualizacion': ahora
+                })
+                for (numero, fila), password_hash in zip(aceptadas, hashes)
+            ])
+
+            fallidas = {e['fila'] for e in errores}
+            reporte['errores'].extend(errores)
+            reporte['creados'] += creados
+            reporte['credenciales'].extend(
+                {'fila': numero, 'username': fila['username'], 'password': generadas[numero]}
+                for numero, fila in aceptadas if numero in generadas and numero not in fallidas
+            )
+            if log:
+                log(f'{reporte["total"]} fila(s) procesadas, {reporte["creados"]} creada(s)')
+
+    reporte['errores'].sort(key=lambda e: e['fila'])
+    return reporte
@@ -0,0 +1,243 @@
+"""
+Escrituras de stock por conjuntos y libro de movimientos
+Cada cambio de stock se aplica con una sola sentencia para todas las líneas y se registra
+en inventario_movimientos con un INSERT por lotes. Los snapshots diarios acotan la consulta
+de stock a una fecha a un snapshot más, como máximo, un día de movimientos.
+"""
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.inventario import Inventario, MovimientoInventario, SnapshotInventario
+
+
+def _insert_dialecto(modelo):
+    """INSERT con ON CONFLICT del motor, o None si el motor no lo soporta"""
+    dialecto = db.session.get_bind(mapper=modelo.__mapper__).dialect.name
+    if dialecto == 'postgresql':
+        return postgresql.insert(modelo)
+    if dialecto == 'sqlite':
+        return sqlite.insert(modelo)
+    return None
+
+
+def _sumar_stock_portable(cantidades, fecha):
+    """Upsert para motores sin ON CONFLICT: bloquear las filas existentes, actualizarlas e
+    insertar las que falten"""
+    existentes = db.session.execute(
+        select(Inventario.id, Inventario.producto_id, Inventario.cantidad)
+        .where(Inventario.producto_id.in_(cantidades.keys()))
+        .with_for_update()
+    ).all()
+    filas = [
+        {
+            'id': inventario.id,
+            'cantidad': (inventario.cantidad or 0) + cantidades[inventario.producto_id],
+            'ultima_entrada': fecha,
+            'fecha_actualizacion': fecha
+        }
+        for inventario in existentes
+    ]
+    if filas:
+        db.session.execute(update(Inventario), filas)
+
+    presentes = {inventario.producto_id for inventario in existentes}
+    nuevas = [
+        {'producto_id': producto_id, 'cantidad': cantidad, 'ultima_entrada': fecha, 'fecha_actualizacion': fecha}
+        for producto_id, cantidad in cantidades.items() if producto_id not in presentes
+    ]
+    if nuevas:
+        db.session.execute(insert(Inventario), nuevas)
+
+
+def registrar_movimientos(cantidades, tipo, referencia_tipo=None, referencia_id=None,
+                          usuario_id=None, motivo=None, fecha=None):
+    """Insertar en bloque un movimiento por producto de {producto_id: diferencia}"""
+    filas = [
+        {
+            'producto_id': producto_id,
+            'tipo': tipo,
+            'cantidad': cantidad,
+            'referencia_tipo': referencia_tipo,
+            'referencia_id': referencia_id,
+            'usuario_id': usuario_id,
+            'motivo': motivo,
+            'fecha': fecha or datetime.utcnow()
+        }
+        for producto_id, cantidad in cantidades.items() if cantidad
+    ]
+    if filas:
+        db.session.execute(insert(MovimientoInventario), filas)
+    return len(filas)
+
+
+def sumar_stock(cantidades, tipo='entrada_pedido', fecha=None, **referencia):
+    """Sumar {producto_id: cantidad} al inventario, creando las filas que falten"""
+    cantidades = {pid: cantidad for pid, cantidad in cantidades.items() if cantidad}
+    if not cantidades:
+        return 0
+
+    fecha = fecha or datetime.utcnow()
+    stmt = _insert_dialecto(Inventario)
+    if stmt is None:
+        _sumar_stock_portable(cantidades, fecha)
+    else:
+        stmt = stmt.values([
+            {
+                'producto_id': producto_id,
+                'cantidad': cantidad,
+                'ultima_entrada': fecha,
+                'fecha_actualizacion': fecha
+            }
+            for producto_id, cantidad in cantidades.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Inventario.producto_id],
+            set_={
+                'cantidad': func.coalesce(Inventario.cantidad, 0) + stmt.excluded.cantidad,
+                'ultima_entrada': stmt.excluded.ultima_entrada,
+                'fecha_actualizacion': stmt.excluded.fecha_actualizacion
+            }
+        )
+        db.session.execute(stmt)
+    registrar_movimientos(cantidades, tipo, fecha=fecha, **referencia)
+    return len(cantidades)
+
+
+def descontar_stock(cantidades, tipo='salida_venta', fecha=None, **referencia):
+    """Restar {producto_id: cantidad} sin bajar de 0; el movimiento guarda lo realmente descontado
+
+    Las filas se bloquean con SELECT ... FOR UPDATE para que dos aprobaciones simultáneas
+    no registren una salida mayor al stock que había.
+    """
+    cantidades = {pid: cantidad for pid, cantidad in cantidades.items() if cantidad}
+    if not cantidades:
+        return {}
+
+    fecha = fecha or datetime.utcnow()
+    inventarios = db.session.execute(
+        select(Inventario.id, Inventario.producto_id, Inventario.cantidad)
+        .where(Inventario.producto_id.in_(cantidades.keys()))
+        .with_for_update()
+    ).all()
+
+    salidas = {}
+    filas = []
+    for inventario in inventarios:
+        actual = inventario.cantidad or 0
+        nueva = max(actual - cantidades[inventario.producto_id], 0)
+        salidas[inventario.producto_id] = nueva - actual
+        filas.append({
+            'id': inventario.id,
+            'cantidad': nueva,
+            'ultima_salida': fecha,
+            'fecha_actualizacion': fecha
+        })
+
+    if filas:
+        db.session.execute(update(Inventario), filas)
+    registrar_movimientos(salidas, tipo, fecha=fecha, **referencia)
+    return salidas
+
+
+def ajustar_stock(producto_id, cantidad, usuario_id, motivo):
+    """Fijar el stock de un producto a `cantidad` registrando la diferencia como ajuste"""
+    fecha = datetime.utcnow()
+    inventario = db.session.execute(
+        select(Inventario).where(Inventario.producto_id == producto_id).with_for_update()
+    ).scalar_one_or_none()
+
+    if inventario is None:
+        inventario = Inventario(producto_id=producto_id, cantidad=0)
+        db.session.add(inventario)
+
+    diferencia = cantidad - (inventario.cantidad or 0)
+    inventario.cantidad = cantidad
+    if diferencia > 0:
+        inventario.ultima_entrada = fecha
+    elif diferencia < 0:
+        inventario.ultima_salida = fecha
+
+    registrar_movimientos(
+        {producto_id: diferencia}, 'ajuste', referencia_tipo='producto', referencia_id=producto_id,
+        usuario_id=usuario_id, motivo=motivo, fecha=fecha
+    )
+    return inventario, diferencia
+
+
+def _inicio_dia(dia):
+    return datetime.combine(dia, time.min)
+
+
+def tomar_snapshot(dia=None):
+    """Guardar el stock al cierre de `dia` (por defecto ayer) con un INSERT ... SELECT
+
+    Se calcula como el stock actual menos los movimientos posteriores al cierre, así que
+    puede tomarse en cualquier momento del día siguiente. Reemplaza un snapshot previo del día.
+    """
+    dia = dia or (datetime.utcnow().date() - timedelta(days=1))
+    corte = _inicio_dia(dia + timedelta(days=1))
+
+    posteriores = select(
+        MovimientoInventario.producto_id,
+        func.sum(MovimientoInventario.cantidad).label('total')
+    ).where(MovimientoInventario.fecha >= corte).group_by(MovimientoInventario.producto_id).subquery()
+
+    seleccion = select(
+        Inventario.producto_id,
+        literal(dia, db.Date),
+        func.coalesce(Inventario.cantidad, 0) - func.coalesce(posteriores.c.total, 0)
+    ).outerjoin(posteriores, posteriores.c.producto_id == Inventario.producto_id)
+
+    db.session.query(SnapshotInventario).filter_by(fecha=dia).delete(synchronize_session=False)
+    resultado = db.session.execute(
+        insert(SnapshotInventario).from_select(['producto_id', 'fecha', 'cantidad'], seleccion)
+    )
+    return resultado.rowcount
+
+
+def _sumar_movimientos(condiciones, producto_ids):
+    consulta = select(
+        MovimientoInventario.producto_id, func.sum(MovimientoInventario.cantidad)
+    ).where(*condiciones).group_by(MovimientoInventario.producto_id)
+    if producto_ids is not None:
+        consulta = consulta.where(MovimientoInventario.producto_id.in_(producto_ids))
+    return dict(db.session.execute(consulta).all())
+
+
+def stock_en_fecha(momento, producto_ids=None):
+    """Retornar ({producto_id: cantidad} en `momento`, fecha del snapshot usado o None)
+
+    Con snapshots diarios se lee el del día anterior y se suman los movimientos desde su
+    cierre. Sin snapshots se parte del stock actual y se restan los movimientos posteriores.
+    """
+    if isinstance(momento, date) and not isinstance(momento, datetime):
+        momento = _inicio_dia(momento + timedelta(days=1))
+
+    dia_snapshot = db.session.query(func.max(SnapshotInventario.fecha)).filter(
+        SnapshotInventario.fecha < momento.date()
+    ).scalar()
+
+    if dia_snapshot is not None:
+        consulta = select(SnapshotInventario.producto_id, SnapshotInventario.cantidad).where(
+            SnapshotInventario.fecha == dia_snapshot
+        )
+        if producto_ids is not None:
+            consulta = consulta.where(SnapshotInventario.producto_id.in_(producto_ids))
+        stock = dict(db.session.execute(consulta).all())
+        desde = _inicio_dia(dia_snapshot + timedelta(days=1))
+        movimientos = _sumar_movimientos(
+            [MovimientoInventario.fecha >= desde, MovimientoInventario.fecha < momento], producto_ids
+        )
+        for producto_id, total in movimientos.items():
+            stock[producto_id] = stock.get(producto_id, 0) + total
+        return stock, dia_snapshot
+
+    consulta = select(Inventario.producto_id, func.coalesce(Inventario.cantidad, 0))
+    if producto_ids is not None:
+        consulta = consulta.where(Inventario.producto_id.in_(producto_ids))
+    stock = dict(db.session.execute(consulta).all())
+    movimientos = _sumar_movimientos([MovimientoInventario.fecha >= momento], producto_ids)
+    for producto_id, total in movimientos.items():
+        stock[producto_id] = stock.get(producto_id, 0) - total
+    return stock, None
@@ -0,0 +1,76 @@
+"""
+Detección de pagos con la misma referencia bancaria
+Los pagos nuevos no pueden duplicarse (índice único ux_pagos_referencia_banco); esto marca
+los duplicados históricos para que el índice excluya las copias y cobranza las revise.
+La cola y la verificación calculan además en vivo si otro pago usa la misma referencia,
+incluso uno rechazado o de otro banco, que el índice sí permite.
+"""
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.pago import Pago
+
+INDICE_REFERENCIA = 'ux_pagos_referencia_banco'
+
+# Se marca cada pago no rechazado con el primer pago no rechazado de su misma referencia y banco
+SQL_MARCAR_DUPLICADOS = text("""
+    UPDATE pagos SET duplicado_de = (
+        SELECT MIN(original.id) FROM pagos original
+        WHERE original.numero_referencia = pagos.numero_referencia
+          AND COALESCE(original.banco_origen, '') = COALESCE(pagos.banco_origen, '')
+          AND original.estado <> 'rechazado'
+          AND original.id < pagos.id
+    )
+    WHERE estado <> 'rechazado'
+      AND duplicado_de IS NULL
+      AND EXISTS (
+        SELECT 1 FROM pagos original
+        WHERE original.numero_referencia = pagos.numero_referencia
+          AND COALESCE(original.banco_origen, '') = COALESCE(pagos.banco_origen, '')
+          AND original.estado <> 'rechazado'
+          AND original.id < pagos.id
+      )
+""")
+
+
+def marcar_duplicados():
+    """Marcar duplicados históricos en una sola sentencia; retorna la cantidad marcada"""
+    resultado = db.session.execute(SQL_MARCAR_DUPLICADOS)
+    db.session.commit()
+    return resultado.rowcount
+
+
+def duplicados_marcados():
+    """Pagos marcados como duplicados, con el estado de cada uno"""
+    return Pago.query.filter(Pago.duplicado_de.isnot(None)).order_by(Pago.duplicado_de, Pago.id).all()
+
+
+def referencia_repetida_en():
+    """Expresión correlacionada: id del primer otro pago con la misma referencia, o NULL
+
+    Cuenta pagos de cualquier banco y estado; usa ix_pagos_numero_referencia.
+    """
+    otro = aliased(Pago)
+    return select(func.min(otro.id)).where(
+        otro.numero_referencia == Pago.numero_referencia,
+        otro.id != Pago.id
+    ).correlate(Pago).scalar_subquery()
+
+
+def pagos_con_misma_referencia(pago):
+    """Otros pagos con la referencia de `pago`: [(id, banco_origen, estado)] por id"""
+    return db.session.query(Pago.id, Pago.banco_origen, Pago.estado).filter(
+        Pago.numero_referencia == pago.numero_referencia,
+        Pago.id != pago.id
+    ).order_by(Pago.id).all()
+
+
+def es_referencia_duplicada(error):
+    """True si un IntegrityError viene del índice único de referencias"""
+    orig = getattr(error, 'orig', error)
+    diag = getattr(orig, 'diag', None)
+    if diag is not None:
+        # psycopg2/psycopg informan la restricción violada
+        return getattr(diag, 'constraint_name', None) == INDICE_REFERENCIA
+    # sqlite3 no la expone: "UNIQUE constraint failed: index 'ux_pagos_referencia_banco'"
+    return f"index '{INDICE_REFERENCIA}'" in str(orig)
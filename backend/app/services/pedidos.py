@@ -0,0 +1,172 @@
+"""
+Creación y recepción de pedidos a proveedores por lotes
+Las líneas se validan con una sola consulta IN y los detalles se insertan en bloque, tanto
+desde el JSON de POST /api/pedidos/ como desde la carga de CSV. La recepción suma todo el
+pedido al inventario con un único upsert.
+"""
+import csv
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import insert, update
+from app import db
+from app.models.pedido_proveedor import PedidoProveedor, DetallePedidoProveedor
+from app.models.producto import Producto
+from app.services.inventario import sumar_stock
+
+COLUMNAS_CSV = ('producto_id', 'cantidad')
+ESTADOS_PEDIDO = ('borrador', 'pendiente', 'confirmado', 'en_transito', 'recibido', 'cancelado')
+
+
+class ErrorPedido(Exception):
+    """Error de validación de un pedido; `status` es el código HTTP a responder"""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def normalizar_lineas(detalles):
+    """Validar y agrupar las líneas por producto: retorna {producto_id: cantidad}"""
+    if not detalles:
+        raise ErrorPedido('El pedido debe tener al menos un producto')
+
+    lineas = {}
+    for numero, detalle in enumerate(detalles, start=1):
+        try:
+            producto_id = int(detalle['producto_id'])
+            cantidad = int(detalle['cantidad'])
+        except (KeyError, TypeError, ValueError):
+            raise ErrorPedido(f'Línea {numero}: producto_id y cantidad deben ser enteros')
+        if cantidad <= 0:
+            raise ErrorPedido(f'Línea {numero}: la cantidad debe ser mayor a 0')
+        lineas[producto_id] = lineas.get(producto_id, 0) + cantidad
+    return lineas
+
+
+def leer_csv(archivo):
+    """Leer líneas producto_id,cantidad desde un CSV con encabezado"""
+    contenido = archivo.read()
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8-sig')
+
+    lector = csv.DictReader(io.StringIO(contenido))
+    faltantes = [c for c in COLUMNAS_CSV if c not in (lector.fieldnames or [])]
+    if faltantes:
+        raise ErrorPedido(f'El CSV debe tener las columnas: {", ".join(COLUMNAS_CSV)}')
+    return [fila for fila in lector if any((v or '').strip() for v in fila.values())]
+
+
+def crear_pedido(proveedor, detalles, notas=None, creado_por=None, estado='pendiente'):
+    """Crear el pedido con sus detalles sin hacer commit
+
+    Una consulta para los productos de todas las líneas y un INSERT por lotes para los detalles.
+    """
+    lineas = normalizar_lineas(detalles)
+
+    productos = {
+        p.id: p for p in db.session.query(
+            Producto.id, Producto.nombre, Producto.precio_compra, Producto.proveedor_id
+        ).filter(Producto.id.in_(lineas.keys())).all()
+    }
+
+    no_encontrados = [str(pid) for pid in lineas if pid not in productos]
+    if no_encontrados:
+        raise ErrorPedido(f'Productos no encontrados: {", ".join(no_encontrados)}', 404)
+
+    ajenos = [p.nombre for p in productos.values() if p.proveedor_id != proveedor.id]
+    if ajenos:
+        raise ErrorPedido(f'Productos que no pertenecen al proveedor seleccionado: {", ".join(ajenos)}')
+
+    filas = []
+    total = Decimal('0')
+    for producto_id, cantidad in lineas.items():
+        precio = productos[producto_id].precio_compra
+        subtotal = precio * cantidad
+        total += subtotal
+        filas.append({
+            'producto_id': producto_id,
+            'cantidad': cantidad,
+            'precio_unitario': precio,
+            'subtotal': subtotal
+        })
+
+    pedido = PedidoProveedor(
+        proveedor_id=proveedor.id,
+        estado=estado,
+        notas=notas,
+        total=total,
+        fecha_entrega_esperada=datetime.utcnow() + timedelta(days=proveedor.tiempo_entrega_dias or 0),
+        creado_por=creado_por
+    )
+    db.session.add(pedido)
+    db.session.flush()
+
+    for fila in filas:
+        fila['pedido_id'] = pedido.id
+    db.session.execute(insert(DetallePedidoProveedor), filas)
+
+    return pedido
+
+
+def _cantidades_recibidas(detalles, recepcion):
+    """Retornar {detalle_id: cantidad_recibida}; las líneas no indicadas se reciben completas"""
+    recibidas = {d.id: d.cantidad for d in detalles}
+    for numero, linea in enumerate(recepcion or [], start=1):
+        try:
+            detalle_id = int(linea['detalle_id'])
+            cantidad = int(linea['cantidad_recibida'])
+        except (KeyError, TypeError, ValueError):
+            raise ErrorPedido(f'Recepción línea {numero}: detalle_id y cantidad_recibida deben ser enteros')
+        if detalle_id not in recibidas:
+            raise ErrorPedido(f'Recepción línea {numero}: el detalle {detalle_id} no pertenece al pedido')
+        if cantidad < 0:
+            raise ErrorPedido(f'Recepción línea {numero}: la cantidad recibida no puede ser negativa')
+        recibidas[detalle_id] = cantidad
+    return recibidas
+
+
+def cambiar_estado(pedido_id, nuevo_estado, recepcion=None, usuario_id=None):
+    """Cambiar el estado del pedido sin hacer commit
+
+    El UPDATE condicional sobre el estado hace que un pedido recibido sea final: si dos
+    requests intentan recibirlo, solo uno afecta la fila y suma al inventario.
+    """
+    if nuevo_estado not in ESTADOS_PEDIDO:
+        raise ErrorPedido(f'Estado inválido. Debe ser uno de: {", ".join(ESTADOS_PEDIDO)}')
+
+    valores = {'estado': nuevo_estado}
+    ahora = datetime.utcnow()
+    if nuevo_estado == 'recibido':
+        valores['fecha_entrega_real'] = ahora
+
+    actualizadas = db.session.query(PedidoProveedor).filter(
+        PedidoProveedor.id == pedido_id,
+        PedidoProveedor.estado != 'recibido'
+    ).update(valores, synchronize_session=False)
+    if actualizadas == 0:
+        if db.session.query(PedidoProveedor.id).filter_by(id=pedido_id).first() is None:
+            raise ErrorPedido('Pedido no encontrado', 404)
+        raise ErrorPedido('El pedido ya fue recibido y su estado no puede cambiar', 409)
+
+    if nuevo_estado == 'recibido':
+        _recibir(pedido_id, recepcion, ahora, usuario_id)
+
+
+def _recibir(pedido_id, recepcion, fecha, usuario_id):
+    detalles = db.session.query(
+        DetallePedidoProveedor.id, DetallePedidoProveedor.producto_id, DetallePedidoProveedor.cantidad
+    ).filter(DetallePedidoProveedor.pedido_id == pedido_id).all()
+    recibidas = _cantidades_recibidas(detalles, recepcion)
+
+    db.session.execute(update(DetallePedidoProveedor), [
+        {'id': detalle_id, 'cantidad_recibida': cantidad} for detalle_id, cantidad in recibidas.items()
+    ])
+
+    por_producto = {}
+    for detalle in detalles:
+        por_producto[detalle.producto_id] = por_producto.get(detalle.producto_id, 0) + recibidas[detalle.id]
+    sumar_stock(
+        por_producto, 'entrada_pedido', fecha=fecha,
+        referencia_tipo='pedido_proveedor', referencia_id=pedido_id, usuario_id=usuario_id
+    )
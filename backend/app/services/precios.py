@@ -0,0 +1,326 @@
+"""
+Precios de productos y márgenes de combos
+Los cambios masivos se aplican con un UPDATE ... FROM (VALUES ...) por lote en PostgreSQL
+(executemany por clave primaria en otros motores), solo sobre las filas que cambian, y se
+reporta el antes/después de cada producto y del margen de cada combo afectado.
+
+El análisis de precios de combos calcula costo (Σ cantidad × precio_compra), valor de lista
+(Σ cantidad × precio_venta) y margen sobre el precio de venta, (precio - costo) / precio, de
+todos los combos con una consulta agrupada, y el precio sugerido para un margen objetivo
+vectorizado con NumPy. Se cachea hasta que cambian precios de productos o el contenido de
+los combos (invalidar_precios).
+"""
+from decimal import Decimal, InvalidOperation
+import numpy as np
+from sqlalchemy import Boolean, Integer, Numeric, column, func, update, values
+from app import db
+from app.models.combo import Combo, ComboProducto
+from app.models.producto import Producto
+from app.services.busqueda import es_postgresql
+from app.utils.cache import CacheTTL
+
+CAMPOS_PRECIO = ('precio_compra', 'precio_venta', 'activo')
+TAMANO_LOTE = 1000
+VERDADEROS = ('1', 'true', 'si', 'sí', 's', 'x')
+FALSOS = ('0', 'false', 'no', 'n')
+
+# Cada worker invalida su copia; el TTL acota lo que tarda en verse un cambio hecho en otro
+precios_combos_cache = CacheTTL(ttl=60, max_entradas=32)
+
+
+class ErrorPrecios(Exception):
+    pass
+
+
+def _precio(valor):
+    try:
+        precio = Decimal(str(valor).replace(',', '.')).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise ValueError('Debe ser un número')
+    if precio < 0:
+        raise ValueError('No puede ser negativo')
+    if precio >= Decimal('100000000'):
+        raise ValueError('Excede el máximo permitido')
+    return precio
+
+
+def _activo(valor):
+    if isinstance(valor, bool):
+        return valor
+    texto = str(valor).strip().lower()
+    if texto in VERDADEROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ValueError('Debe ser verdadero o falso')
+
+
+def normalizar_cambios(filas):
+    """Validar [(número, dict)] con id/producto_id y algún campo de CAMPOS_PRECIO
+
+    Retorna ({producto_id: (número, {campo: valor})}, errores). Los valores vacíos no cambian
+    el campo.
+    """
+    cambios, errores = {}, []
+    for numero, fila in filas:
+        errores_fila = {}
+        producto_id = fila.get('id') if fila.get('id') not in (None, '') else fila.get('producto_id')
+        try:
+            producto_id = int(producto_id)
+        except (TypeError, ValueError):
+            errores_fila['id'] = 'Campo id es requerido y debe ser entero'
+
+        valores = {}
+        for campo, convertir in (('precio_compra', _precio), ('precio_venta', _precio), ('activo', _activo)):
+            if fila.get(campo) in (None, ''):
+                continue
+            try:
+                valores[campo] = convertir(fila[campo])
+            except ValueError as e:
+                errores_fila[campo] = str(e)
+
+        if not errores_fila and not valores:
+            errores_fila['fila'] = f'Indique al menos uno de: {", ".join(CAMPOS_PRECIO)}'
+        if not errores_fila and producto_id in cambios:
+            errores_fila['id'] = f'Producto repetido (fila {cambios[producto_id][0]})'
+
+        if errores_fila:
+            errores.append({'fila': numero, 'errores': errores_fila})
+        else:
+            cambios[producto_id] = (numero, valores)
+    return cambios, errores
+
+
+def _consulta_margenes():
+    return db.session.query(
+        Combo.id, Combo.nombre, Combo.activo, Combo.precio_total,
+        func.sum(ComboProducto.cantidad * Producto.precio_compra),
+        func.sum(ComboProducto.cantidad * Producto.precio_venta)
+    ).outerjoin(ComboProducto, ComboProducto.combo_id == Combo.id).outerjoin(
+        Producto, Producto.id == ComboProducto.producto_id
+    ).group_by(Combo.id, Combo.nombre, Combo.activo, Combo.precio_total)
+
+
+def margenes_combos(combo_ids):
+    """Costo, valor de lista y margen de cada combo en una consulta agrupada"""
+    if not combo_ids:
+        return {}
+    filas = _consulta_margenes().filter(Combo.id.in_(combo_ids)).all()
+
+    resultado = {}
+    for combo_id, nombre, _, precio_total, costo, valor_lista in filas:
+        precio_total = float(precio_total or 0)
+        costo = float(costo or 0)
+        resultado[combo_id] = {
+            'combo_id': combo_id,
+            'combo_nombre': nombre,
+            'precio_total': precio_total,
+            'costo': round(costo, 2),
+            'valor_lista': round(float(valor_lista or 0), 2),
+            'margen': round((precio_total - costo) / precio_total, 4) if precio_total else None
+        }
+    return resultado
+
+
+def _combos_de(producto_ids):
+    combo_ids = set()
+    ids = list(producto_ids)
+    for i in range(0, len(ids), TAMANO_LOTE):
+        combo_ids.update(cid for (cid,) in db.session.query(ComboProducto.combo_id).filter(
+            ComboProducto.producto_id.in_(ids[i:i + TAMANO_LOTE])
+        ).distinct())
+    return sorted(combo_ids)
+
+
+def _aplicar(filas):
+    """Escribir [{id, precio_compra, precio_venta, activo}] con los valores finales"""
+    if es_postgresql():
+        datos = values(
+            column('id', Integer), column('precio_compra', Numeric(10, 2)),
+            column('precio_venta', Numeric(10, 2)), column('activo', Boolean),
+            name='datos'
+        ).data([(f['id'], f['precio_compra'], f['precio_venta'], f['activo']) for f in filas])
+        db.session.execute(
+            update(Producto).where(Producto.id == datos.c.id).values(
+                precio_compra=datos.c.precio_compra,
+                precio_venta=datos.c.precio_venta,
+                activo=datos.c.activo
+            ).execution_options(synchronize_session=False)
+        )
+    else:
+        db.session.execute(update(Producto), filas)
+
+
+def actualizar_precios(filas):
+    """Aplicar cambios de precio/activo masivos sin commit y retornar el resumen de diferencias
+
+    `filas` es un iterable de (número, dict). Las filas inválidas o de productos inexistentes
+    se reportan y no detienen al resto.
+    """
+    cambios, errores = normalizar_cambios(filas)
+    if not cambios and not errores:
+        raise ErrorPrecios('No hay filas para actualizar')
+
+    recibidos = len(cambios) + len(errores)
+    ids = list(cambios)
+    diferencias = []
+    no_encontrados = 0
+    for i in range(0, len(ids), TAMANO_LOTE):
+        lote = ids[i:i + TAMANO_LOTE]
+        actuales = {p.id: p for p in db.session.query(
+            Producto.id, Producto.nombre, Producto.precio_compra, Producto.precio_venta, Producto.activo
+        ).filter(Producto.id.in_(lote))}
+
+        for producto_id in lote:
+            numero, valores = cambios[producto_id]
+            actual = actuales.get(producto_id)
+            if actual is None:
+                no_encontrados += 1
+                errores.append({'fila': numero, 'errores': {'id': f'Producto {producto_id} no encontrado'}})
+                continue
+            campos = {
+                campo: {'antes': _json(getattr(actual, campo)), 'despues': _json(valor)}
+                for campo, valor in valores.items() if valor != getattr(actual, campo)
+            }
+            if campos:
+                diferencias.append({
+                    'producto_id': producto_id,
+                    'nombre': actual.nombre,
+                    'cambios': campos,
+                    'final': {c: valores.get(c, getattr(actual, c)) for c in CAMPOS_PRECIO}
+                })
+
+    combo_ids = _combos_de(d['producto_id'] for d in diferencias)
+    margenes_antes = margenes_combos(combo_ids)
+
+    for i in range(0, len(diferencias), TAMANO_LOTE):
+        _aplicar([{'id': d['producto_id'], **d.pop('final')} for d in diferencias[i:i + TAMANO_LOTE]])
+
+    margenes_despues = margenes_combos(combo_ids)
+    combos = []
+    for combo_id in combo_ids:
+        antes, despues = margenes_antes.get(combo_id), margenes_despues.get(combo_id)
+        if antes and despues:
+            combos.append({
+                **despues,
+                'costo_anterior': antes['costo'],
+                'valor_lista_anterior': antes['valor_lista'],
+                'margen_anterior': antes['margen'],
+                'bajo_costo': despues['costo'] > despues['precio_total']
+            })
+
+    if diferencias:
+        invalidar_precios()
+    errores.sort(key=lambda e: e['fila'])
+    return {
+        'recibidos': recibidos,
+        'actualizados': len(diferencias),
+        'sin_cambios': len(cambios) - no_encontrados - len(diferencias),
+        'errores': errores,
+        'productos': diferencias,
+        'combos': combos
+    }
+
+
+def _json(valor):
+    return float(valor) if isinstance(valor, Decimal) else valor
+
+
+def invalidar_precios():
+    precios_combos_cache.invalidar()
+
+
+def precios_sugeridos(costo, margen_objetivo, redondeo):
+    """Menor precio, redondeado hacia arriba a múltiplos de `redondeo`, con ese margen sobre el precio de venta"""
+    precio = np.asarray(costo, dtype=float) / (1 - margen_objetivo)
+    if redondeo > 0:
+        precio = np.ceil(np.round(precio / redondeo, 6)) * redondeo
+    return np.round(precio, 2)
+
+
+def _analizar(margen_objetivo, redondeo):
+    filas = _consulta_margenes().order_by(Combo.id).all()
+    if not filas:
+        return {'margen_objetivo': margen_objetivo, 'resumen': _resumen([], np.zeros(0)), 'combos': []}
+
+    ids, nombres, activos, precios, costos, valores = zip(*filas)
+    precio = np.array([float(p or 0) for p in precios])
+    costo = np.array([float(c or 0) for c in costos])
+    valor_lista = np.array([float(v or 0) for v in valores])
+
+    margen = np.divide(precio - costo, precio, out=np.full_like(precio, np.nan), where=precio > 0)
+    sugerido = precios_sugeridos(costo, margen_objetivo, redondeo)
+    bajo_costo = precio < costo
+    bajo_objetivo = ~(margen >= margen_objetivo)
+    sobre_valor_lista = precio > valor_lista
+
+    combos = [
+        {
+            'combo_id': ids[i],
+            'combo_nombre': nombres[i],
+            'activo': activos[i],
+            'precio_total': round(float(precio[i]), 2),
+            'costo': round(float(costo[i]), 2),
+            'valor_lista': round(float(valor_lista[i]), 2),
+            'margen': None if np.isnan(margen[i]) else round(float(margen[i]), 4),
+            'precio_sugerido': float(sugerido[i]),
+            'diferencia': round(float(sugerido[i] - precio[i]), 2),
+            'bajo_costo': bool(bajo_costo[i]),
+            'bajo_objetivo': bool(bajo_objetivo[i]),
+            'sobre_valor_lista': bool(sobre_valor_lista[i])
+        }
+        for i in range(len(ids))
+    ]
+    # Primero los que venden bajo costo, luego por margen ascendente
+    combos.sort(key=lambda c: (not c['bajo_costo'], c['margen'] if c['margen'] is not None else -np.inf))
+    return {'margen_objetivo': margen_objetivo, 'resumen': _resumen(combos, margen), 'combos': combos}
+
+
+def _resumen(combos, margen):
+    activos = [c for c in combos if c['activo']]
+    return {
+        'combos': len(combos),
+        'bajo_costo': sum(c['bajo_costo'] for c in activos),
+        'bajo_objetivo': sum(c['bajo_objetivo'] for c in activos),
+        'sobre_valor_lista': sum(c['sobre_valor_lista'] for c in activos),
+        'margen_promedio': round(float(np.nanmean(margen)), 4) if np.isfinite(margen).any() else None
+    }
+
+
+def analizar_combos(margen_objetivo=0.2, redondeo=0.5):
+    """Costo, valor de lista, margen, alertas y precio sugerido de todos los combos (cacheado)"""
+    return precios_combos_cache.obtener(
+        (margen_objetivo, redondeo), lambda: _analizar(margen_objetivo, redondeo)
+    )
+
+
+def fijar_precios_combos(precios):
+    """Aplicar [{combo_id, precio_total}] en un executemany sin commit; retorna los combos cambiados"""
+    nuevos, errores = {}, []
+    for numero, fila in enumerate(precios, start=1):
+        try:
+            combo_id = int(fila['combo_id'])
+        except (TypeError, KeyError, ValueError):
+            errores.append(f'Fila {numero}: combo_id es requerido y debe ser entero')
+            continue
+        try:
+            precio = _precio(fila.get('precio_total'))
+        except ValueError as e:
+            errores.append(f'Fila {numero}: precio_total {str(e).lower()}')
+            continue
+        if precio <= 0:
+            errores.append(f'Fila {numero}: precio_total debe ser mayor a 0')
+        nuevos[combo_id] = precio
+    if errores:
+        raise ErrorPrecios('; '.join(errores))
+    if not nuevos:
+        raise ErrorPrecios('No hay precios para aplicar')
+
+    existentes = {cid for (cid,) in db.session.query(Combo.id).filter(Combo.id.in_(nuevos))}
+    faltantes = sorted(set(nuevos) - existentes)
+    if faltantes:
+        raise ErrorPrecios(f'Combos no encontrados: {", ".join(map(str, faltantes))}')
+
+    db.session.execute(update(Combo), [{'id': cid, 'precio_total': precio} for cid, precio in nuevos.items()])
+    invalidar_precios()
+    return len(nuevos)
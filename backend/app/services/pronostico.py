@@ -0,0 +1,221 @@
+"""
+Pronóstico de demanda diaria de combos y de sus productos
+Modelo por combo: índice de día de semana multiplicativo y suavizado exponencial sobre la
+serie desestacionalizada, con alpha elegido por combo en una grilla (todo vectorizado sobre
+combos × alphas). La media móvil de 7 días se guarda como referencia de error.
+
+El ajuste se hace de noche con `flask ajustar-pronosticos`: los días nuevos actualizan el
+estado guardado y el ajuste completo se repite cada PRONOSTICO_REAJUSTE_DIAS. Los requests
+solo proyectan el estado guardado.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models.combo import Combo, ComboProducto
+from app.models.producto import Producto
+from app.models.pronostico import PronosticoCombo
+from app.services.demanda import matriz_componentes, ventas_diarias_combos
+from app.utils.cache import CacheTTL
+
+ALPHAS = np.linspace(0.05, 0.95, 19)
+# Peso de cada día nuevo sobre el índice de su día de semana en la actualización incremental
+GAMMA = 0.05
+INDICE_MINIMO = 0.05
+DIAS_ARRANQUE = 7
+
+pronostico_cache = CacheTTL(ttl=3600, max_entradas=64)
+
+
+def _dias_semana(inicio, dias):
+    return (np.arange(dias) + inicio.weekday()) % 7
+
+
+def _normalizar(indices):
+    indices = np.maximum(indices, INDICE_MINIMO)
+    return indices / indices.mean(axis=1, keepdims=True)
+
+
+def _indices_semanales(ventas, semana):
+    """Promedio de cada día de semana dividido por el promedio general (combos × 7)"""
+    unos = np.eye(7)[semana]
+    conteo = unos.sum(axis=0)
+    por_dia = (ventas @ unos) / np.maximum(conteo, 1)
+    promedio = ventas.mean(axis=1, keepdims=True)
+    indices = np.divide(por_dia, promedio, out=np.ones_like(por_dia), where=promedio > 0)
+    return _normalizar(np.where(conteo > 0, indices, 1.0))
+
+
+def ajustar_modelos(ventas, inicio):
+    """Ajuste completo sobre la matriz combos × días que empieza en `inicio`"""
+    n_combos, dias = ventas.shape
+    semana = _dias_semana(inicio, dias)
+    indices = _indices_semanales(ventas, semana)
+    factor = indices[:, semana]
+    desestacionalizada = ventas / factor
+
+    # Nivel inicial: primera semana; luego una pasada por día para todos los alphas a la vez
+    niveles = np.tile(desestacionalizada[:, :DIAS_ARRANQUE].mean(axis=1), (len(ALPHAS), 1))
+    alphas = ALPHAS[:, None]
+    error = np.zeros_like(niveles)
+    for t in range(DIAS_ARRANQUE, dias):
+        error += np.abs(ventas[:, t] - niveles * factor[:, t])
+        niveles = alphas * desestacionalizada[:, t] + (1 - alphas) * niveles
+
+    evaluados = max(dias - DIAS_ARRANQUE, 1)
+    mejor = error.argmin(axis=0)
+    combos = np.arange(n_combos)
+
+    acumulada = np.cumsum(np.pad(desestacionalizada, ((0, 0), (1, 0))), axis=1)
+    media_movil = (acumulada[:, DIAS_ARRANQUE:dias] - acumulada[:, :dias - DIAS_ARRANQUE]) / DIAS_ARRANQUE
+    error_media_movil = np.abs(ventas[:, DIAS_ARRANQUE:] - media_movil * factor[:, DIAS_ARRANQUE:]).sum(axis=1)
+
+    return {
+        'alpha': ALPHAS[mejor],
+        'nivel': niveles[mejor, combos],
+        'estacionalidad': indices,
+        'error': error[mejor, combos] / evaluados,
+        'error_media_movil': error_media_movil / evaluados
+    }
+
+
+def actualizar_modelos(alpha, nivel, indices, ventas, inicio):
+    """Aplicar los días nuevos (combos × días desde `inicio`) al estado guardado"""
+    nivel = nivel.copy()
+    indices = indices.copy()
+    for t, dia_semana in enumerate(_dias_semana(inicio, ventas.shape[1])):
+        observado = ventas[:, t]
+        indice = indices[:, dia_semana]
+        nuevo_nivel = alpha * observado / indice + (1 - alpha) * nivel
+        indices[:, dia_semana] = np.where(
+            nivel > 0, GAMMA * observado / np.maximum(nivel, 1e-9) + (1 - GAMMA) * indice, indice
+        )
+        indices = _normalizar(indices)
+        nivel = nuevo_nivel
+    return nivel, indices
+
+
+def proyectar(nivel, indices, desde, dias):
+    """Demanda diaria esperada (combos × días) a partir de `desde`"""
+    return nivel[:, None] * indices[:, _dias_semana(desde, dias)]
+
+
+def _guardar(estados, combo_ids, resultado, ultimo_dia, completo):
+    for i, combo_id in enumerate(combo_ids):
+        estado = estados.get(combo_id)
+        if estado is None:
+            estado = PronosticoCombo(combo_id=combo_id)
+            db.session.add(estado)
+        estado.nivel = float(resultado['nivel'][i])
+        estado.estacionalidad = [round(float(x), 6) for x in resultado['estacionalidad'][i]]
+        estado.fecha_ajuste = ultimo_dia
+        if completo:
+            estado.alpha = float(resultado['alpha'][i])
+            estado.error = float(resultado['error'][i])
+            estado.error_media_movil = float(resultado['error_media_movil'][i])
+            estado.fecha_ajuste_completo = ultimo_dia
+
+
+def ajustar_pronosticos(completo=False, hoy=None):
+    """Actualizar los modelos de los combos activos hasta ayer; retorna (completos, incrementales)"""
+    config = current_app.config
+    historia = config['PRONOSTICO_HISTORIA_DIAS']
+    ultimo_dia = (hoy or datetime.utcnow().date()) - timedelta(days=1)
+
+    combo_ids = [cid for (cid,) in db.session.query(Combo.id).filter(Combo.activo == True).order_by(Combo.id)]
+    estados = {e.combo_id: e for e in PronosticoCombo.query.filter(PronosticoCombo.combo_id.in_(combo_ids))}
+
+    vencido = ultimo_dia - timedelta(days=config['PRONOSTICO_REAJUSTE_DIAS'])
+    completos, incrementales = [], {}
+    for combo_id in combo_ids:
+        estado = estados.get(combo_id)
+        if (completo or estado is None or estado.fecha_ajuste_completo <= vencido
+                or (ultimo_dia - estado.fecha_ajuste).days > historia):
+            completos.append(combo_id)
+        elif estado.fecha_ajuste < ultimo_dia:
+            incrementales.setdefault(estado.fecha_ajuste + timedelta(days=1), []).append(combo_id)
+
+    if completos:
+        inicio = ultimo_dia - timedelta(days=historia - 1)
+        ids, ventas = ventas_diarias_combos(inicio, historia, completos)
+        _guardar(estados, [int(c) for c in ids], ajustar_modelos(ventas, inicio), ultimo_dia, completo=True)
+
+    for inicio, ids in incrementales.items():
+        ids, ventas = ventas_diarias_combos(inicio, (ultimo_dia - inicio).days + 1, ids)
+        ids = [int(c) for c in ids]
+        nivel, indices = actualizar_modelos(
+            np.array([estados[c].alpha for c in ids]),
+            np.array([estados[c].nivel for c in ids]),
+            np.array([estados[c].estacionalidad for c in ids], dtype=float),
+            ventas, inicio
+        )
+        _guardar(estados, ids, {'nivel': nivel, 'estacionalidad': indices}, ultimo_dia, completo=False)
+
+    pronostico_cache.invalidar()
+    return len(completos), sum(len(ids) for ids in incrementales.values())
+
+
+def _calcular(dias, hoy):
+    estados = db.session.query(
+        PronosticoCombo.combo_id, Combo.nombre, PronosticoCombo.nivel, PronosticoCombo.estacionalidad,
+        PronosticoCombo.alpha, PronosticoCombo.error, PronosticoCombo.error_media_movil,
+        PronosticoCombo.fecha_ajuste
+    ).join(Combo, Combo.id == PronosticoCombo.combo_id).filter(
+        Combo.activo == True
+    ).order_by(PronosticoCombo.combo_id).all()
+
+    resultado = {
+        'fechas': [hoy + timedelta(days=i) for i in range(dias)],
+        'fecha_ajuste': None,
+        'combos': [],
+        'matriz_combos': np.zeros((0, dias)),
+        'productos': [],
+        'matriz_productos': np.zeros((0, dias))
+    }
+    if not estados:
+        return resultado
+
+    # El estado de cada combo llega hasta su fecha_ajuste: se proyecta desde su día siguiente
+    # y se recorta a hoy, agrupando los combos ajustados el mismo día
+    nivel = np.array([e.nivel for e in estados])
+    indices = np.array([e.estacionalidad for e in estados], dtype=float)
+    grupos = {}
+    for i, e in enumerate(estados):
+        grupos.setdefault(e.fecha_ajuste, []).append(i)
+    matriz = np.empty((len(estados), dias))
+    for fecha, filas in grupos.items():
+        desde = fecha + timedelta(days=1)
+        desfase = max((hoy - desde).days, 0)
+        matriz[filas] = proyectar(nivel[filas], indices[filas], desde, desfase + dias)[:, desfase:]
+
+    combo_ids = [e.combo_id for e in estados]
+    productos = db.session.query(Producto.id, Producto.nombre).join(
+        ComboProducto, ComboProducto.producto_id == Producto.id
+    ).filter(ComboProducto.combo_id.in_(combo_ids)).distinct().order_by(Producto.id).all()
+
+    resultado.update({
+        'fecha_ajuste': min(grupos),
+        'combos': [
+            {
+                'combo_id': e.combo_id,
+                'combo_nombre': e.nombre,
+                'fecha_ajuste': e.fecha_ajuste.isoformat(),
+                'alpha': round(e.alpha, 2),
+                'error': round(e.error, 3) if e.error is not None else None,
+                'error_media_movil': round(e.error_media_movil, 3) if e.error_media_movil is not None else None
+            }
+            for e in estados
+        ],
+        'matriz_combos': matriz,
+        'productos': [{'producto_id': p.id, 'producto_nombre': p.nombre} for p in productos],
+        'matriz_productos': matriz_componentes([p.id for p in productos], combo_ids) @ matriz
+    })
+    return resultado
+
+
+def pronostico(dias, hoy=None):
+    """Proyección de combos y productos para los próximos `dias`, cacheada hasta el siguiente ajuste"""
+    hoy = hoy or datetime.utcnow().date()
+    version = db.session.query(func.max(PronosticoCombo.fecha_actualizacion)).scalar()
+    return pronostico_cache.obtener((dias, hoy, version), lambda: _calcular(dias, hoy))
@@ -0,0 +1,156 @@
+"""
+Planificador de reposición
+Proyecta el stock de cada producto día a día (matrices NumPy productos × días) con la demanda
+reciente de combos desglosada por ComboProducto, el inventario actual y los pedidos abiertos,
+y propone pedidos en borrador agrupados por proveedor.
+"""
+from datetime import datetime, timedelta
+from statistics import NormalDist
+import numpy as np
+from app import db
+from app.models.inventario import Inventario
+from app.models.pedido_proveedor import PedidoProveedor, DetallePedidoProveedor
+from app.models.producto import Producto
+from app.models.proveedor import Proveedor
+from app.services.demanda import demanda_diaria_productos
+from app.services.pedidos import crear_pedido
+
+# Pedidos cuya mercancía todavía no ha llegado; los borradores se regeneran en cada plan
+ESTADOS_ABIERTOS = ('pendiente', 'confirmado', 'en_transito')
+NOTA_BORRADOR = 'Borrador generado por el planificador de reposición'
+
+
+def _catalogo():
+    filas = db.session.query(
+        Producto.id, Producto.nombre, Producto.proveedor_id, Producto.precio_compra,
+        Proveedor.tiempo_entrega_dias, Inventario.cantidad, Inventario.cantidad_minima
+    ).join(Proveedor, Producto.proveedor_id == Proveedor.id).outerjoin(
+        Inventario, Inventario.producto_id == Producto.id
+    ).filter(Producto.activo == True, Proveedor.activo == True).order_by(Producto.id).all()
+
+    return {
+        'ids': np.array([f.id for f in filas], dtype=np.int64),
+        'nombres': [f.nombre for f in filas],
+        'proveedores': np.array([f.proveedor_id for f in filas], dtype=np.int64),
+        'precios': np.array([float(f.precio_compra or 0) for f in filas]),
+        'entrega': np.array([max(f.tiempo_entrega_dias or 1, 1) for f in filas], dtype=np.int64),
+        'stock': np.array([f.cantidad or 0 for f in filas], dtype=float),
+        'minimo': np.array([f.cantidad_minima or 0 for f in filas], dtype=float)
+    }
+
+
+def _llegadas(producto_idx, hoy, horizonte):
+    """Matriz productos × días con las unidades de pedidos abiertos según su fecha esperada"""
+    llegadas = np.zeros((len(producto_idx), horizonte))
+    filas = db.session.query(
+        DetallePedidoProveedor.producto_id, DetallePedidoProveedor.cantidad,
+        PedidoProveedor.fecha_entrega_esperada
+    ).join(PedidoProveedor, DetallePedidoProveedor.pedido_id == PedidoProveedor.id).filter(
+        PedidoProveedor.estado.in_(ESTADOS_ABIERTOS)
+    ).all()
+    filas = [f for f in filas if f.producto_id in producto_idx]
+    if not filas:
+        return llegadas
+
+    # Los pedidos atrasados o sin fecha se cuentan como si llegaran hoy; los que llegan después
+    # del horizonte no cubren la demanda del período y se descartan
+    dias = np.maximum(np.array([
+        (f.fecha_entrega_esperada.date() - hoy).days if f.fecha_entrega_esperada else 0 for f in filas
+    ]), 0)
+    dentro = dias < horizonte
+    np.add.at(
+        llegadas,
+        (np.array([producto_idx[f.producto_id] for f in filas])[dentro], dias[dentro]),
+        np.array([f.cantidad for f in filas], dtype=float)[dentro]
+    )
+    return llegadas
+
+
+def planificar(ventana_dias=28, cobertura_dias=7, nivel_servicio=0.95, hoy=None):
+    """Calcular la cantidad a pedir de cada producto para cubrir entrega + cobertura
+
+    Para cada producto se proyecta stock + llegadas - demanda acumulada hasta el día en que
+    llegaría un pedido hecho hoy más `cobertura_dias`, y se pide lo necesario para terminar
+    ese período con el stock de seguridad (o el mínimo configurado, si es mayor).
+    """
+    hoy = hoy or datetime.utcnow().date()
+    catalogo = _catalogo()
+    n = len(catalogo['ids'])
+    if n == 0:
+        return []
+
+    historia = demanda_diaria_productos(catalogo['ids'], hoy - timedelta(days=ventana_dias), ventana_dias)
+    tasa = historia.mean(axis=1)
+    desviacion = historia.std(axis=1)
+
+    periodo = catalogo['entrega'] + cobertura_dias
+    horizonte = int(periodo.max())
+    producto_idx = {int(pid): i for i, pid in enumerate(catalogo['ids'])}
+    llegadas = _llegadas(producto_idx, hoy, horizonte)
+
+    neto = llegadas - tasa[:, None]
+    proyectado = catalogo['stock'][:, None] + np.cumsum(neto, axis=1)
+    stock_final = proyectado[np.arange(n), periodo - 1]
+
+    z = NormalDist().inv_cdf(nivel_servicio)
+    seguridad = z * desviacion * np.sqrt(periodo)
+    objetivo = np.maximum(seguridad, catalogo['minimo'])
+    sugerido = np.ceil(np.maximum(objetivo - stock_final, 0)).astype(np.int64)
+
+    en_quiebre = proyectado < 0
+    dia_quiebre = np.where(en_quiebre.any(axis=1), en_quiebre.argmax(axis=1) + 1, -1)
+    en_camino = llegadas.sum(axis=1)
+
+    plan = []
+    for i in np.flatnonzero(sugerido):
+        plan.append({
+            'producto_id': int(catalogo['ids'][i]),
+            'producto_nombre': catalogo['nombres'][i],
+            'proveedor_id': int(catalogo['proveedores'][i]),
+            'stock': int(catalogo['stock'][i]),
+            'en_camino': int(en_camino[i]),
+            'demanda_diaria': round(float(tasa[i]), 2),
+            'stock_seguridad': int(np.ceil(objetivo[i])),
+            'dias_hasta_quiebre': int(dia_quiebre[i]) if dia_quiebre[i] > 0 else None,
+            'cantidad_sugerida': int(sugerido[i]),
+            'costo_estimado': round(float(sugerido[i] * catalogo['precios'][i]), 2)
+        })
+    return plan
+
+
+def agrupar_por_proveedor(plan):
+    grupos = {}
+    for linea in plan:
+        grupos.setdefault(linea['proveedor_id'], []).append(linea)
+
+    nombres = dict(db.session.query(Proveedor.id, Proveedor.nombre).filter(Proveedor.id.in_(grupos.keys())).all())
+    return [
+        {
+            'proveedor_id': proveedor_id,
+            'proveedor_nombre': nombres.get(proveedor_id),
+            'costo_estimado': round(sum(l['costo_estimado'] for l in lineas), 2),
+            'productos': lineas
+        }
+        for proveedor_id, lineas in sorted(grupos.items())
+    ]
+
+
+def generar_borradores(plan, creado_por=None):
+    """Reemplazar los borradores anteriores por un pedido en borrador por proveedor (sin commit)"""
+    borradores = db.session.query(PedidoProveedor.id).filter(PedidoProveedor.estado == 'borrador')
+    DetallePedidoProveedor.query.filter(
+        DetallePedidoProveedor.pedido_id.in_(borradores.scalar_subquery())
+    ).delete(synchronize_session=False)
+    PedidoProveedor.query.filter_by(estado='borrador').delete(synchronize_session=False)
+
+    grupos = {}
+    for linea in plan:
+        grupos.setdefault(linea['proveedor_id'], []).append(
+            {'producto_id': linea['producto_id'], 'cantidad': linea['cantidad_sugerida']}
+        )
+
+    proveedores = {p.id: p for p in Proveedor.query.filter(Proveedor.id.in_(grupos.keys())).all()}
+    return [
+        crear_pedido(proveedores[proveedor_id], detalles, NOTA_BORRADOR, creado_por, estado='borrador')
+        for proveedor_id, detalles in sorted(grupos.items())
+    ]
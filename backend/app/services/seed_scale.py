@@ -0,0 +1,407 @@
+"""
+Generador de datos sintéticos a gran escala (complementa seed.py)
+Ejecutar: flask seed-scale --usuarios 200000 --compras 2000000
+"""
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+import bcrypt
+from sqlalchemy import func, select, text
+from app import db
+from app.models.usuario import Usuario
+from app.models.proveedor import Proveedor
+from app.models.producto import Producto
+from app.models.inventario import Inventario, MovimientoInventario
+from app.models.combo import Combo, ComboProducto
+from app.models.pedido_proveedor import PedidoProveedor, DetallePedidoProveedor
+from app.models.compra import Compra
+from app.models.pago import Pago
+from app.models.retiro import Retiro
+from app.models.comentario import Comentario
+
+NOMBRES = ['José', 'María', 'Luis', 'Ana', 'Carlos', 'Rosa', 'Pedro', 'Carmen', 'Juan', 'Luisa',
+           'Miguel', 'Elena', 'Jesús', 'Yolanda', 'Rafael', 'Gabriela', 'Andrés', 'Daniela']
+APELLIDOS = ['González', 'Rodríguez', 'Pérez', 'Hernández', 'García', 'Martínez', 'López',
+             'Díaz', 'Ramírez', 'Torres', 'Rojas', 'Soriano', 'Palacios', 'Riera', 'Medina']
+CATEGORIAS = ['Granos', 'Harinas', 'Aceites', 'Endulzantes', 'Pastas', 'Lácteos',
+              'Condimentos', 'Bebidas', 'Enlatados', 'Limpieza', 'Higiene', 'Proteínas']
+PRODUCTOS_BASE = ['Arroz', 'Harina PAN', 'Aceite', 'Azúcar', 'Pasta', 'Leche en polvo', 'Caraotas',
+                  'Sal', 'Café', 'Atún', 'Sardinas', 'Lentejas', 'Avena', 'Margarina', 'Jabón']
+PRESENTACIONES = ['250g', '500g', '1kg', '2kg', '1L', '2L', 'lata', 'paquete']
+BANCOS = ['Banco de Venezuela', 'Banesco', 'Mercantil', 'Provincial', 'Bicentenario', 'BNC']
+COMENTARIOS = ['Excelente servicio', 'Buena atención', 'Los productos llegaron completos',
+               'La cola fue muy lenta', 'Muy buenos precios', 'Faltó un producto en el combo']
+
+# (estado de la compra, peso)
+ESTADOS_COMPRA = [('retirado', 70), ('listo_retiro', 8), ('pagado', 2), ('pago_verificando', 6),
+                  ('pendiente_pago', 6), ('cancelado', 8)]
+
+
+class _Tabla:
+    """Inserción por lotes: COPY en PostgreSQL (psycopg2), executemany en otros motores"""
+
+    def __init__(self, conn, modelo, batch_size, depende_de=None):
+        self.conn = conn
+        self.depende_de = depende_de
+        self.tabla = modelo.__table__
+        self.filas = []
+        self.batch_size = batch_size
+        self.total = 0
+
+    def agregar(self, fila):
+        self.filas.append(fila)
+        if len(self.filas) >= self.batch_size:
+            self.vaciar()
+
+    def vaciar(self):
+        if not self.filas:
+            return
+        if self.depende_de is not None:
+            # Las filas referenciadas deben existir antes (FK)
+            self.depende_de.vaciar()
+        if self.conn.dialect.name == 'postgresql' and self.conn.dialect.driver == 'psycopg2':
+            self._copy()
+        else:
+            self.conn.execute(self.tabla.insert(), self.filas)
+        self.total += len(self.filas)
+        self.filas = []
+
+    def _copy(self):
+        columnas = list(self.filas[0].keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for fila in self.filas:
+            writer.writerow([fila[c] for c in columnas])
+        buffer.seek(0)
+        cursor = self.conn.connection.cursor()
+        cursor.copy_expert(
+            f'COPY {self.tabla.name} ({", ".join(columnas)}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+
+def _siguiente_id(conn, modelo):
+    return (conn.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def _ajustar_secuencias(conn, modelos):
+    if conn.dialect.name != 'postgresql':
+        return
+    for modelo in modelos:
+        tabla = modelo.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {tabla}), 1))"
+        ))
+
+
+def _elegir_estado(rng):
+    return rng.choices([e for e, _ in ESTADOS_COMPRA], weights=[p for _, p in ESTADOS_COMPRA])[0]
+
+
+def generar(usuarios=10000, proveedores=50, productos=2000, combos=30, compras=100000,
+            comentarios=20000, pedidos=2000, dias=365, seed=42, fecha_fin=None,
+            batch_size=10000, log=print):
+    """Insertar datos sintéticos referencialmente consistentes. Mismo seed + fecha_fin = mismos datos."""
+    rng = random.Random(seed)
+    fecha_fin = fecha_fin or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    fecha_inicio = fecha_fin - timedelta(days=dias)
+    segundos_periodo = int((fecha_fin - fecha_inicio).total_seconds())
+
+    def fecha_aleatoria():
+        return fecha_inicio + timedelta(seconds=rng.randrange(segundos_periodo))
+
+    # Un solo hash para todos los usuarios generados: bcrypt por fila haría la carga inviable
+    password_hash = bcrypt.hashpw(b'cliente123', bcrypt.gensalt(rounds=4)).decode('utf-8')
+    inicio_total = time.perf_counter()
+
+    with db.engine.begin() as conn:
+        ids = {m: _siguiente_id(conn, m) for m in (
+            Usuario, Proveedor, Producto, Inventario, MovimientoInventario, Combo, ComboProducto,
+            PedidoProveedor, DetallePedidoProveedor, Compra, Pago, Retiro, Comentario
+        )}
+
+        def cargar(modelo, filas_generadas, etiqueta):
+            inicio = time.perf_counter()
+            tabla = _Tabla(conn, modelo, batch_size)
+            for fila in filas_generadas:
+                tabla.agregar(fila)
+            tabla.vaciar()
+            log(f"✓ {etiqueta}: {tabla.total} filas en {time.perf_counter() - inicio:.1f}s")
+            return tabla.total
+
+        # Usuarios
+        primer_usuario = ids[Usuario]
+        tipos = ['regular'] * 85 + ['adulto_mayor'] * 10 + ['discapacitado'] * 5
+
+        def filas_usuarios():
+            for i in range(usuarios):
+                uid = primer_usuario + i
+                yield {
+                    'id': uid,
+                    'nombre': rng.choice(NOMBRES),
+                    'apellido': rng.choice(APELLIDOS),
+                    'cedula': f'V-{10000000 + uid}',
+                    'email': f'usuario{uid}@seed.cecoalimentos.com',
+                    'telefono': f'04{rng.choice(["12", "14", "16", "24", "26"])}-{rng.randrange(10**7):07d}',
+                    'direccion': None,
+                    'tipo_usuario': rng.choice(tipos),
+                    'rol': 'cliente',
+                    'username': f'usuario{uid}',
+                    'password_hash': password_hash,
+                    'activo': True,
+                    'fecha_registro': fecha_aleatoria(),
+                    'fecha_actualizacion': fecha_fin
+                }
+        cargar(Usuario, filas_usuarios(), 'Usuarios')
+        ids_usuarios = range(primer_usuario, primer_usuario + usuarios)
+
+        # Proveedores
+        primer_proveedor = ids[Proveedor]
+
+        def filas_proveedores():
+            for i in range(proveedores):
+                pid = primer_proveedor + i
+                yield {
+                    'id': pid,
+                    'nombre': f'Distribuidora {rng.choice(APELLIDOS)} {pid}',
+                    'rif': f'J-{pid:08d}-{pid % 10}',
+                    'direccion': None,
+                    'telefono': f'0285-{rng.randrange(10**7):07d}',
+                    'email': f'ventas{pid}@proveedor.com',
+                    'persona_contacto': f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}',
+                    'tiempo_entrega_dias': rng.randint(1, 7),
+                    'activo': True,
+                    'fecha_registro': fecha_inicio,
+                    'fecha_actualizacion': fecha_inicio
+                }
+        cargar(Proveedor, filas_proveedores(), 'Proveedores')
+
+        # Productos e inventario
+        primer_producto = ids[Producto]
+        proveedor_de = {}
+        precios = {}
+
+        def filas_productos():
+            for i in range(productos):
+                pid = primer_producto + i
+                proveedor_id = primer_proveedor + rng.randrange(proveedores)
+                precio_compra = round(rng.uniform(0.5, 8.0), 2)
+                proveedor_de[pid] = proveedor_id
+                precios[pid] = precio_compra
+                yield {
+                    'id': pid,
+                    'nombre': f'{rng.choice(PRODUCTOS_BASE)} {rng.choice(PRESENTACIONES)} #{pid}',
+                    'descripcion': None,
+                    'precio_compra': precio_compra,
+                    'precio_venta': round(precio_compra * rng.uniform(1.1, 1.5), 2),
+                    'unidad_medida': 'unidad',
+                    'categoria': rng.choice(CATEGORIAS),
+                    'proveedor_id': proveedor_id,
+                    'activo': rng.random() > 0.05,
+                    'fecha_registro': fecha_inicio,
+                    'fecha_actualizacion': fecha_inicio
+                }
+        cargar(Producto, filas_productos(), 'Productos')
+
+        stock_inicial = {}
+
+        def filas_inventario():
+            for i in range(productos):
+                stock_inicial[primer_producto + i] = rng.randint(0, 500)
+                yield {
+                    'id': ids[Inventario] + i,
+                    'producto_id': primer_producto + i,
+                    'cantidad': stock_inicial[primer_producto + i],
+                    'cantidad_minima': rng.choice([10, 20, 50]),
+                    'ultima_entrada': fecha_aleatoria(),
+                    'ultima_salida': fecha_aleatoria(),
+                    'fecha_actualizacion': fecha_fin
+                }
+        cargar(Inventario, filas_inventario(), 'Inventario')
+
+        # Saldo de apertura en el libro de movimientos para que cuadre con inventario
+        def filas_movimientos():
+            for i, (producto_id, cantidad) in enumerate((p, c) for p, c in stock_inicial.items() if c):
+                yield {
+                    'id': ids[MovimientoInventario] + i,
+                    'producto_id': producto_id,
+                    'tipo': 'inicial',
+                    'cantidad': cantidad,
+                    'referencia_tipo': 'producto',
+                    'referencia_id': producto_id,
+                    'usuario_id': None,
+                    'motivo': 'Saldo inicial (seed-scale)',
+                    'fecha': fecha_inicio
+                }
+        cargar(MovimientoInventario, filas_movimientos(), 'Movimientos de inventario')
+
+        # Combos
+        primer_combo = ids[Combo]
+        precios_combo = {}
+
+        def filas_combos():
+            for i in range(combos):
+                cid = primer_combo + i
+                precio = round(rng.uniform(10, 60), 2)
+                precios_combo[cid] = precio
+                yield {
+                    'id': cid,
+                    'nombre': f'Combo {rng.choice(["Básico", "Familiar", "Premium", "Proteico"])} {cid}',
+                    'descripcion': None,
+                    'precio_total': precio,
+                    'tipo': rng.choice(['tipo_1', 'tipo_2', 'tipo_3']),
+                    'imagen_url': None,
+                    'activo': True,
+                    'disponible': rng.random() > 0.1,
+                    'fecha_creacion': fecha_inicio,
+                    'fecha_actualizacion': fecha_inicio
+                }
+        cargar(Combo, filas_combos(), 'Combos')
+
+        def filas_combo_productos():
+            siguiente = ids[ComboProducto]
+            for i in range(combos):
+                for producto_id in rng.sample(range(primer_producto, primer_producto + productos),
+                                              min(productos, rng.randint(5, 15))):
+                    yield {
+                        'id': siguiente,
+                        'combo_id': primer_combo + i,
+                        'producto_id': producto_id,
+                        'cantidad': rng.randint(1, 3)
+                    }
+                    siguiente += 1
+        cargar(ComboProducto, filas_combo_productos(), 'Productos de combos')
+
+        # Compras con sus pagos y retiros
+        tablas = {Compra: _Tabla(conn, Compra, batch_size)}
+        tablas[Pago] = _Tabla(conn, Pago, batch_size, depende_de=tablas[Compra])
+        tablas[Retiro] = _Tabla(conn, Retiro, batch_size, depende_de=tablas[Compra])
+        cola_por_dia = {}
+        inicio = time.perf_counter()
+        for i in range(compras):
+            compra_id = ids[Compra] + i
+            combo_id = primer_combo + rng.randrange(combos)
+            estado = _elegir_estado(rng)
+            fecha_compra = fecha_aleatoria()
+            monto = precios_combo[combo_id]
+            tablas[Compra].agregar({
+                'id': compra_id,
+                'usuario_id': rng.choice(ids_usuarios),
+                'combo_id': combo_id,
+                'estado': estado,
+                'monto_total': monto,
+                'fecha_compra': fecha_compra,
+                'fecha_actualizacion': fecha_compra
+            })
+            if estado == 'pendiente_pago':
+                continue
+
+            fecha_pago = fecha_compra + timedelta(minutes=rng.randint(5, 600))
+            estado_pago = {'pago_verificando': 'pendiente', 'cancelado': 'rechazado'}.get(estado, 'verificado')
+            fecha_verificacion = None
+            if estado_pago != 'pendiente':
+                fecha_verificacion = fecha_pago + timedelta(minutes=rng.randint(10, 2880))
+            tablas[Pago].agregar({
+                'id': ids[Pago] + i,
+                'compra_id': compra_id,
+                'metodo_pago': rng.choice(['pago_movil', 'transferencia']),
+                # El id garantiza referencias únicas (ux_pagos_referencia_banco)
+                'numero_referencia': f'{rng.randrange(10**3):03d}{ids[Pago] + i:08d}',
+                'banco_origen': rng.choice(BANCOS),
+                'telefono_pago': None,
+                'monto': monto,
+                'estado': estado_pago,
+                'verificado_por': None,
+                'fecha_verificacion': fecha_verificacion,
+                'notas_verificacion': None,
+                'fecha_pago': fecha_pago
+            })
+
+            if estado in ('listo_retiro', 'retirado'):
+                fecha_retiro = (fecha_verificacion + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+                dia = fecha_retiro.date()
+                cola_por_dia[dia] = cola_por_dia.get(dia, 0) + 1
+                tablas[Retiro].agregar({
+                    'id': ids[Retiro] + i,
+                    'compra_id': compra_id,
+                    'numero_retiro': f'S{compra_id:010d}',
+                    'numero_cola': cola_por_dia[dia],
+                    'fecha_retiro_programada': fecha_retiro,
+                    'fecha_retiro_real': fecha_retiro + timedelta(hours=rng.randint(0, 8)) if estado == 'retirado' else None,
+                    'estado': 'retirado' if estado == 'retirado' else 'programado',
+                    'tipo_cola': 'regular',
+                    'atendido_por': None,
+                    'notas': None,
+                    'fecha_creacion': fecha_verificacion
+                })
+        for tabla in tablas.values():
+            tabla.vaciar()
+        log(f"✓ Compras: {tablas[Compra].total}, pagos: {tablas[Pago].total}, "
+            f"retiros: {tablas[Retiro].total} filas en {time.perf_counter() - inicio:.1f}s")
+
+        # Comentarios
+        def filas_comentarios():
+            for i in range(comentarios):
+                yield {
+                    'id': ids[Comentario] + i,
+                    'usuario_id': rng.choice(ids_usuarios),
+                    'contenido': rng.choice(COMENTARIOS),
+                    'calificacion': rng.randint(1, 5),
+                    'categoria': rng.choice(['servicio', 'productos', 'atencion', 'general']),
+                    'estado': rng.choice(['aprobado', 'aprobado', 'pendiente', 'rechazado']),
+                    'fecha_creacion': fecha_aleatoria()
+                }
+        cargar(Comentario, filas_comentarios(), 'Comentarios')
+
+        # Pedidos a proveedores con detalles
+        productos_de = {}
+        for producto_id, proveedor_id in proveedor_de.items():
+            productos_de.setdefault(proveedor_id, []).append(producto_id)
+        con_productos = sorted(productos_de)
+
+        tablas = {PedidoProveedor: _Tabla(conn, PedidoProveedor, batch_size)}
+        tablas[DetallePedidoProveedor] = _Tabla(
+            conn, DetallePedidoProveedor, batch_size, depende_de=tablas[PedidoProveedor]
+        )
+        siguiente_detalle = ids[DetallePedidoProveedor]
+        inicio = time.perf_counter()
+        for i in range(pedidos if con_productos else 0):
+            pedido_id = ids[PedidoProveedor] + i
+            proveedor_id = rng.choice(con_productos)
+            disponibles = productos_de[proveedor_id]
+            detalles = []
+            for producto_id in rng.sample(disponibles, min(len(disponibles), rng.randint(5, 30))):
+                cantidad = rng.randint(10, 200)
+                detalles.append({
+                    'id': siguiente_detalle,
+                    'pedido_id': pedido_id,
+                    'producto_id': producto_id,
+                    'cantidad': cantidad,
+                    'precio_unitario': precios[producto_id],
+                    'subtotal': round(cantidad * precios[producto_id], 2)
+                })
+                siguiente_detalle += 1
+            fecha_pedido = fecha_aleatoria()
+            tablas[PedidoProveedor].agregar({
+                'id': pedido_id,
+                'proveedor_id': proveedor_id,
+                'estado': rng.choice(['recibido'] * 6 + ['pendiente', 'confirmado', 'en_transito', 'cancelado']),
+                'total': round(sum(d['subtotal'] for d in detalles), 2),
+                'notas': None,
+                'fecha_pedido': fecha_pedido,
+                'fecha_entrega_esperada': fecha_pedido + timedelta(days=3),
+                'fecha_entrega_real': None,
+                'creado_por': None
+            })
+            for detalle in detalles:
+                tablas[DetallePedidoProveedor].agregar(detalle)
+        tablas[DetallePedidoProveedor].vaciar()
+        log(f"✓ Pedidos: {tablas[PedidoProveedor].total}, detalles: "
+            f"{tablas[DetallePedidoProveedor].total} filas en {time.perf_counter() - inicio:.1f}s")
+
+        _ajustar_secuencias(conn, list(ids))
+
+    log(f"\n✅ Datos a escala generados en {time.perf_counter() - inicio_total:.1f}s")
@@ -0,0 +1,50 @@
+"""
+Unicidad de username, email y cédula de usuarios
+Una sola consulta reporta todos los campos en conflicto antes de escribir; las restricciones
+únicas de la tabla cubren las carreras entre requests y su IntegrityError se traduce a los
+mismos errores por campo.
+"""
+import re
+from flask import jsonify
+from sqlalchemy import or_
+from app import db
+from app.models.usuario import Usuario
+
+MENSAJES_DUPLICADO = {
+    'username': 'El nombre de usuario ya existe',
+    'email': 'El email ya está registrado',
+    'cedula': 'La cédula ya está registrada'
+}
+
+# SQLite: "UNIQUE constraint failed: usuarios.email"; PostgreSQL: "Key (email)=(...) already exists"
+PATRON_RESTRICCION = re.compile(r'usuarios\.(username|email|cedula)\b|Key \((username|email|cedula)\)')
+
+
+def campos_duplicados(valores, excluir_id=None):
+    """Campos de `valores` (username/email/cédula) que ya usa otro usuario, en una consulta"""
+    valores = {campo: valor for campo, valor in valores.items() if campo in MENSAJES_DUPLICADO and valor}
+    if not valores:
+        return []
+
+    columnas = [getattr(Usuario, campo) for campo in valores]
+    query = db.session.query(*columnas).filter(or_(*(col == valores[col.key] for col in columnas)))
+    if excluir_id is not None:
+        query = query.filter(Usuario.id != excluir_id)
+
+    # Cada campo es único: a lo sumo una fila en conflicto por campo
+    encontrados = set()
+    for fila in query.limit(len(columnas)):
+        encontrados.update(campo for campo, valor in zip(valores, fila) if valor == valores[campo])
+    return [campo for campo in MENSAJES_DUPLICADO if campo in encontrados]
+
+
+def campos_de_integrity_error(error):
+    """Campos únicos violados según el mensaje del IntegrityError ([] si es otra restricción)"""
+    campos = {a or b for a, b in PATRON_RESTRICCION.findall(str(getattr(error, 'orig', error)))}
+    return [campo for campo in MENSAJES_DUPLICADO if campo in campos]
+
+
+def respuesta_duplicados(campos):
+    """Respuesta 400 con todos los conflictos: `error` legible y `errores` por campo"""
+    errores = {campo: MENSAJES_DUPLICADO[campo] for campo in campos}
+    return jsonify({'error': '. '.join(errores.values()), 'errores': errores}), 400
@@ -0,0 +1,65 @@
+import json
+import os
+from threading import Lock
+from flask import Response
+from flasgger import Swagger
+from app.utils.compression import calcular_etag
+
+APISPEC_ENDPOINT = 'apispec'
+
+
+def construir_apispec(app):
+    """Recorrer las rutas y sus @swag_from y serializar la especificación OpenAPI"""
+    with app.app_context():
+        spec = app.swag.get_apispecs(APISPEC_ENDPOINT)
+    return json.dumps(spec, ensure_ascii=False, sort_keys=True).encode('utf-8')
+
+
+def ruta_apispec_precompilada(app):
+    archivo = app.config.get('APISPEC_FILE')
+    if not archivo:
+        return None
+    return archivo if os.path.isabs(archivo) else os.path.join(os.path.dirname(app.root_path), archivo)
+
+
+def init_swagger(app, template, config):
+    """Registrar Swagger UI y servir /apispec.json desde memoria
+
+    flasgger reconstruye la especificación en cada request; aquí se construye una sola vez,
+    en el primer request, o se lee del archivo generado con `flask apispec-build`.
+    Con SWAGGER_ENABLED=false no se registran ni la UI ni la especificación.
+    """
+
+    app.config.setdefault('SWAGGER_ENABLED', True)
+    app.config.setdefault('APISPEC_FILE', None)
+    app.config.setdefault('APISPEC_MAX_AGE', 3600)
+
+    if not app.config['SWAGGER_ENABLED']:
+        return None
+
+    swagger = Swagger(app, template=template, config=config)
+    cache = {}
+    lock = Lock()
+
+    def cargar():
+        with lock:
+            if 'cuerpo' not in cache:
+                archivo = ruta_apispec_precompilada(app)
+                if archivo and os.path.exists(archivo):
+                    with open(archivo, 'rb') as f:
+                        cache['cuerpo'] = f.read()
+                else:
+                    cache['cuerpo'] = construir_apispec(app)
+                cache['etag'] = calcular_etag(cache['cuerpo'])
+        return cache['cuerpo'], cache['etag']
+
+    def apispec():
+        cuerpo, etag = cargar()
+        response = Response(cuerpo, content_type='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config['APISPEC_MAX_AGE']
+        return response
+
+    app.view_functions[f'flasgger.{APISPEC_ENDPOINT}'] = apispec
+    return swagger
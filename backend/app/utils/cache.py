@@ -0,0 +1,51 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class CacheTTL:
+    """Cache en memoria por proceso con expiración y tamaño máximo (LRU)
+
+    Cada worker tiene su propia copia: invalidar() solo limpia el proceso actual, por lo que
+    el TTL debe ser corto para datos que se modifican desde otros workers.
+    """
+
+    def __init__(self, ttl, max_entradas=1024):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, vence = entrada
+            if vence < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def obtener(self, clave, calcular):
+        """Retornar el valor en cache o calcularlo y guardarlo"""
+        valor = self.get(clave)
+        if valor is None:
+            valor = calcular()
+            self.set(clave, valor)
+        return valor
+
+    def invalidar(self, clave=None):
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
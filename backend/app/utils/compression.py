@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CacheComprimidos:
+    """Cache LRU de cuerpos ya comprimidos, indexado por (ETag, codificación)"""
+
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, clave):
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is not None:
+                self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        if self.max_entradas <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+
+def calcular_etag(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _codificacion_preferida():
+    disponibles = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(disponibles)
+
+
+def _comprimir(data, codificacion, config):
+    if codificacion == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def init_compression(app):
+    """Registrar ETag débil, GET condicional y compresión gzip/brotli para toda la app"""
+
+    config = app.config
+    config.setdefault('COMPRESS_ENABLED', True)
+    config.setdefault('COMPRESS_MIN_SIZE', 500)
+    config.setdefault('COMPRESS_LEVEL', 6)
+    config.setdefault('COMPRESS_BROTLI_QUALITY', 5)
+    config.setdefault('COMPRESS_CACHE_SIZE', 256)
+    config.setdefault('COMPRESS_MIMETYPES', ['application/json', 'text/html', 'text/css', 'text/plain', 'application/javascript'])
+
+    cache = CacheComprimidos(config['COMPRESS_CACHE_SIZE'])
+    app.extensions['compression_cache'] = cache
+
+    @app.after_request
+    def comprimir_respuesta(response):
+        if response.direct_passthrough or response.is_streamed:
+            return response
+
+        if response.headers.get('Content-Encoding'):
+            return response
+
+        comprimible = (
+            config['COMPRESS_ENABLED'] and 200 <= response.status_code < 300
+            and response.mimetype in config['COMPRESS_MIMETYPES']
+        )
+        # Antes de make_conditional: el 304 debe llevar el mismo Vary que el 200 que valida
+        if comprimible:
+            response.vary.add('Accept-Encoding')
+
+        etag = None
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            etag, _ = response.get_etag()
+            if not etag:
+                etag = calcular_etag(response.get_data())
+                response.set_etag(etag, weak=True)
+
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if not comprimible:
+            return response
+
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+
+        codificacion = _codificacion_preferida()
+        if not codificacion:
+            return response
+
+        comprimido = cache.get((etag, codificacion)) if etag else None
+        if comprimido is None:
+            comprimido = _comprimir(data, codificacion, config)
+            if etag:
+                cache.set((etag, codificacion), comprimido)
+
+        response.set_data(comprimido)
+        response.headers['Content-Encoding'] = codificacion
+        return response
@@ -0,0 +1,137 @@
+"""
+Verificación de los planes de las consultas reales de cada ruta
+Cada ruta se ejecuta con el test client capturando el SQL que emite (query_stats) y se corre
+EXPLAIN sobre cada sentencia con sus parámetros. Así la verificación sigue a las rutas cuando
+cambian sus consultas. Una ruta falla si su plan recorre completa una tabla grande.
+"""
+import json
+import re
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select, text
+from app import db
+from app.models.compra import Compra
+from app.models.usuario import Usuario
+from app.utils.query_stats import contar_consultas
+
+# (endpoint, token: 'admin' / 'cliente' / None, url, tablas que puede recorrer completas)
+RUTAS_EXPLAIN = [
+    ('pagos.pendientes', 'admin', '/api/pagos/pendientes', ()),
+    ('pagos.cola', 'admin', '/api/pagos/cola', ()),
+    ('pagos.mis-compras', 'cliente', '/api/pagos/mis-compras', ()),
+    ('pagos.mis-compras/resumen', 'cliente', '/api/pagos/mis-compras/resumen', ()),
+    ('reportes.semanal', 'admin', '/api/reportes/semanal', ()),
+    ('reportes.ventas', 'admin', '/api/reportes/ventas', ()),
+    ('reportes.retiros', 'admin', '/api/reportes/retiros', ()),
+    ('comentarios.publicos', None, '/api/comentarios/', ()),
+    ('comentarios.mis-comentarios', 'cliente', '/api/comentarios/mis-comentarios', ()),
+    ('productos.listar', 'cliente', '/api/productos/?categoria=Granos', ()),
+    ('combos.listar', None, '/api/combos/', ('combos',)),
+]
+
+_SCAN_SQLITE = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+class ErrorExplain(Exception):
+    pass
+
+
+def _seq_scans_postgresql(plan):
+    tablas = []
+    if plan.get('Node Type') == 'Seq Scan':
+        tablas.append(plan['Relation Name'])
+    for subplan in plan.get('Plans', []):
+        tablas.extend(_seq_scans_postgresql(subplan))
+    return tablas
+
+
+def _explain(conn, statement, parameters):
+    """Retornar (plan legible, tablas recorridas completas) de una sentencia del driver"""
+    if conn.dialect.name == 'postgresql':
+        resultado = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+        if isinstance(resultado, str):
+            resultado = json.loads(resultado)
+        plan = resultado[0]['Plan']
+        return json.dumps(plan, indent=2), _seq_scans_postgresql(plan)
+
+    detalles = [fila[-1] for fila in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+    tablas = [m.group(1) for m in map(_SCAN_SQLITE.match, detalles) if m]
+    return '\n'.join(detalles), tablas
+
+
+def _tokens():
+    admin = db.session.query(Usuario.id).filter_by(rol='admin', activo=True).order_by(Usuario.id).first()
+    if admin is None:
+        raise ErrorExplain('No hay usuario admin: ejecute seed.py antes de verificar los planes')
+    # El cliente con más compras ejercita el peor caso de sus rutas
+    cliente = db.session.query(Compra.usuario_id).group_by(Compra.usuario_id).order_by(
+        func.count(Compra.id).desc()
+    ).first()
+    return {
+        'admin': create_access_token(identity=str(admin.id)),
+        'cliente': create_access_token(identity=str(cliente.usuario_id if cliente else admin.id))
+    }
+
+
+def capturar_consultas(app, rutas=RUTAS_EXPLAIN):
+    """Ejecutar cada ruta y retornar [(endpoint, permitidas, [(sentencia, parámetros)])]"""
+    from app.routes.pagos import resumen_compras_cache
+
+    # Un resultado en cache no ejecutaría las consultas que se quieren verificar
+    resumen_compras_cache.invalidar()
+    tokens = _tokens()
+    cliente = app.test_client()
+    capturadas = []
+    for endpoint, rol, url, permitidas in rutas:
+        headers = {'Authorization': f'Bearer {tokens[rol]}'} if rol else {}
+        # El test client reutiliza el contexto activo: uno propio por ruta para que el engine
+        # que elige una (g.db_bind) no se aplique a las siguientes
+        with app.app_context(), contar_consultas(capturar=True) as stats:
+            respuesta = cliente.get(url, headers=headers)
+        if respuesta.status_code != 200:
+            raise ErrorExplain(f'{endpoint}: {url} respondió {respuesta.status_code}')
+        sentencias = [
+            (sql, parametros) for sql, parametros in stats.sentencias.values()
+            if sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+        ]
+        capturadas.append((endpoint, set(permitidas), sentencias))
+    return capturadas
+
+
+def verificar_planes(app, min_filas=10000, forzar_indices=False):
+    """EXPLAIN de las consultas de cada ruta; retorna [(endpoint, sql, plan, tablas con scan)]
+
+    Solo cuentan como falla los scans completos de tablas con al menos `min_filas` filas: en
+    tablas chicas el planificador elige bien un scan secuencial. `forzar_indices` desactiva
+    los seq scans en PostgreSQL y marca cualquier tabla, para bases sin datos a escala.
+    """
+    if not forzar_indices:
+        compras = db.session.execute(select(func.count()).select_from(Compra)).scalar()
+        if compras < min_filas:
+            raise ErrorExplain(
+                f'Datos insuficientes ({compras} compras, mínimo {min_filas}): ejecute '
+                f'flask seed-scale o use --forzar-indices'
+            )
+
+    capturadas = capturar_consultas(app)
+    tamanos = {}
+    resultados = []
+    with db.engine.connect() as conn:
+        if forzar_indices:
+            min_filas = 0
+            if conn.dialect.name == 'postgresql':
+                conn.execute(text('SET enable_seqscan = off'))
+
+        for endpoint, permitidas, sentencias in capturadas:
+            for sql, parametros in sentencias:
+                plan, recorridas = _explain(conn, sql, parametros)
+                for tabla in recorridas:
+                    if tabla not in tamanos:
+                        tamanos[tabla] = conn.execute(
+                            select(func.count()).select_from(text(tabla))
+                        ).scalar()
+                grandes = sorted({
+                    tabla for tabla in recorridas
+                    if tabla not in permitidas and tamanos[tabla] >= min_filas
+                })
+                resultados.append((endpoint, sql, plan, grandes))
+    return resultados
@@ -0,0 +1,184 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import Response, current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.idempotencia import ClaveIdempotencia
+from app.utils.metrics import IDEMPOTENCIA_REPETICIONES
+
+ENCABEZADO = 'Idempotency-Key'
+MAX_LONGITUD_CLAVE = 255
+RESTRICCION_CLAVE = 'uq_claves_idempotencia_usuario_endpoint_clave'
+
+
+def _huella_request():
+    contenido = request.method.encode() + request.path.encode() + request.get_data()
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def _buscar(clave, usuario_id, endpoint):
+    return ClaveIdempotencia.query.filter_by(
+        clave=clave, usuario_id=usuario_id, endpoint=endpoint
+    ).populate_existing().first()
+
+
+def es_clave_tomada(error):
+    """True si un IntegrityError viene de la restricción única de la clave"""
+    orig = getattr(error, 'orig', error)
+    diag = getattr(orig, 'diag', None)
+    if diag is not None:
+        # psycopg2/psycopg informan la restricción violada
+        return getattr(diag, 'constraint_name', None) == RESTRICCION_CLAVE
+    # sqlite3 no la expone, lista las columnas: "UNIQUE constraint failed: claves_idempotencia.usuario_id, ..."
+    tabla = ClaveIdempotencia.__tablename__
+    return str(orig).startswith('UNIQUE constraint failed') and all(
+        f'{tabla}.{columna}' in str(orig) for columna in ('usuario_id', 'endpoint', 'clave')
+    )
+
+
+def _insertar(clave, usuario_id, endpoint, huella):
+    """Reservar la clave en estado en_proceso; None si otro request ya la tiene
+
+    Se inserta en una transacción propia sobre el primario para no confirmar lo que la sesión
+    del request tenga pendiente. Cualquier otro IntegrityError (usuario borrado con un JWT
+    todavía válido, por ejemplo) se propaga.
+    """
+    ahora = datetime.utcnow()
+    try:
+        with db.engine.begin() as conn:
+            resultado = conn.execute(insert(ClaveIdempotencia).values(
+                clave=clave,
+                usuario_id=usuario_id,
+                endpoint=endpoint,
+                huella_request=huella,
+                estado='en_proceso',
+                fecha_creacion=ahora,
+                fecha_expiracion=ahora + timedelta(hours=current_app.config['IDEMPOTENCY_TTL_HOURS'])
+            ))
+        return resultado.inserted_primary_key[0]
+    except IntegrityError as e:
+        if not es_clave_tomada(e):
+            raise
+        return None
+
+
+def _tomar_abandonada(registro):
+    """Retomar una clave en_proceso cuyo worker murió sin completarla"""
+    limite = datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_LOCK_SECONDS'])
+    if registro.fecha_creacion is None or registro.fecha_creacion >= limite:
+        return False
+    actualizadas = ClaveIdempotencia.query.filter_by(
+        id=registro.id, estado='en_proceso', fecha_creacion=registro.fecha_creacion
+    ).update({'fecha_creacion': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return actualizadas == 1
+
+
+def _liberar(registro_id):
+    ClaveIdempotencia.query.filter_by(id=registro_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def _respuesta_guardada(registro):
+    response = Response(registro.respuesta, status=registro.status_code, content_type=registro.content_type)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _reservar_o_esperar(clave, usuario_id, endpoint, huella):
+    """Retornar (id de la clave reservada, None) o (None, respuesta a devolver)
+
+    Un duplicado concurrente espera a que termine el request original y devuelve su
+    respuesta en lugar de ejecutar la operación otra vez.
+    """
+    config = current_app.config
+    limite_espera = time.monotonic() + config['IDEMPOTENCY_WAIT_SECONDS']
+    esperando = False
+
+    while True:
+        registro_id = _insertar(clave, usuario_id, endpoint, huella)
+        if registro_id:
+            return registro_id, None
+
+        registro = _buscar(clave, usuario_id, endpoint)
+        # Sin registro: el request original falló y liberó la clave; se reintenta la reserva
+        # con la misma espera y límite que un request en curso
+        if registro is not None:
+            if registro.fecha_expiracion < datetime.utcnow():
+                _liberar(registro.id)
+                continue
+
+            if registro.huella_request != huella:
+                IDEMPOTENCIA_REPETICIONES.labels('conflicto').inc()
+                return None, (jsonify({
+                    'error': f'{ENCABEZADO} ya fue usada con un contenido distinto'
+                }), 422)
+
+            if registro.estado == 'completado':
+                IDEMPOTENCIA_REPETICIONES.labels('repetida').inc()
+                return None, _respuesta_guardada(registro)
+
+            if _tomar_abandonada(registro):
+                return registro.id, None
+
+        if time.monotonic() >= limite_espera:
+            IDEMPOTENCIA_REPETICIONES.labels('en_proceso').inc()
+            response = jsonify({'error': 'Hay una solicitud con la misma Idempotency-Key en proceso'})
+            response.headers['Retry-After'] = '1'
+            return None, (response, 409)
+
+        if not esperando:
+            IDEMPOTENCIA_REPETICIONES.labels('coalescida').inc()
+            esperando = True
+        db.session.rollback()
+        time.sleep(config['IDEMPOTENCY_POLL_SECONDS'])
+
+
+def idempotente():
+    """Honrar el encabezado Idempotency-Key en un POST (usar después de jwt_required)
+
+    La primera ejecución guarda su respuesta por IDEMPOTENCY_TTL_HOURS; los reintentos con
+    la misma clave la reciben sin volver a tocar las tablas del negocio. Las respuestas 5xx
+    no se guardan para que el cliente pueda reintentar.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            clave = request.headers.get(ENCABEZADO)
+            if not clave:
+                return f(*args, **kwargs)
+
+            if len(clave) > MAX_LONGITUD_CLAVE:
+                return jsonify({'error': f'{ENCABEZADO} no puede superar {MAX_LONGITUD_CLAVE} caracteres'}), 400
+
+            usuario_id = int(get_jwt_identity())
+            registro_id, respuesta = _reservar_o_esperar(clave, usuario_id, request.endpoint, _huella_request())
+            if respuesta is not None:
+                return respuesta
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                db.session.rollback()
+                _liberar(registro_id)
+                raise
+
+            if response.status_code >= 500:
+                db.session.rollback()
+                _liberar(registro_id)
+                return response
+
+            ClaveIdempotencia.query.filter_by(id=registro_id).update({
+                'estado': 'completado',
+                'status_code': response.status_code,
+                'respuesta': response.get_data(as_text=True),
+                'content_type': response.content_type
+            }, synchronize_session=False)
+            db.session.commit()
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,153 @@
+import os
+import time
+from flask import g, request, Response
+from sqlalchemy import event
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+    multiprocess
+)
+
+# Con gunicorn se debe definir PROMETHEUS_MULTIPROC_DIR antes de importar este módulo
+# (ver gunicorn.conf.py) para que cada worker escriba sus valores en disco y /metrics
+# los agregue entre todos los procesos.
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'Requests HTTP atendidos',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+HTTP_LATENCIA = Histogram(
+    'http_request_duration_seconds',
+    'Latencia de requests HTTP',
+    ['blueprint', 'endpoint', 'method'],
+    buckets=BUCKETS_LATENCIA
+)
+HTTP_EN_CURSO = Gauge(
+    'http_requests_in_progress',
+    'Requests HTTP en curso',
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_ESPERA = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Tiempo de espera para obtener una conexión del pool',
+    ['engine'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_EN_USO = Gauge(
+    'db_pool_checked_out',
+    'Conexiones del pool en uso',
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+DB_POOL_ABIERTAS = Gauge(
+    'db_pool_connections',
+    'Conexiones abiertas por el pool',
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+
+COMPRAS_INICIADAS = Counter('cecoalimentos_compras_iniciadas_total', 'Compras de combos iniciadas')
+PAGOS_PROCESADOS = Counter(
+    'cecoalimentos_pagos_procesados_total',
+    'Pagos procesados por cobranza',
+    ['resultado']
+)
+RETIROS_CREADOS = Counter('cecoalimentos_retiros_creados_total', 'Retiros programados')
+EMAILS_ENCOLADOS = Counter('cecoalimentos_emails_encolados_total', 'Emails de notificación encolados')
+EMAILS_FALLIDOS = Counter('cecoalimentos_emails_fallidos_total', 'Emails de notificación fallidos')
+IDEMPOTENCIA_REPETICIONES = Counter(
+    'cecoalimentos_idempotencia_repeticiones_total',
+    'Requests repetidos con la misma Idempotency-Key',
+    ['resultado']
+)
+
+
+def _registry():
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def _etiquetas_request():
+    blueprint = request.blueprint or 'app'
+    endpoint = request.url_rule.rule if request.url_rule else 'no_encontrado'
+    return blueprint, endpoint, request.method
+
+
+def _observar_request(status):
+    inicio = g.pop('_metrics_inicio', None)
+    if inicio is None:
+        return
+    blueprint, endpoint, method = _etiquetas_request()
+    HTTP_LATENCIA.labels(blueprint, endpoint, method).observe(time.perf_counter() - inicio)
+    HTTP_REQUESTS.labels(blueprint, endpoint, method, str(status)).inc()
+
+
+def instrumentar_pool(nombre, engine):
+    """Registrar tiempo de checkout, conexiones en uso y abiertas del pool de un engine"""
+
+    pool = engine.pool
+    if getattr(pool, '_metrics_instrumentado', False):
+        return
+
+    do_get_original = pool._do_get
+
+    def _do_get_medido():
+        inicio = time.perf_counter()
+        try:
+            return do_get_original()
+        finally:
+            DB_POOL_ESPERA.labels(nombre).observe(time.perf_counter() - inicio)
+
+    pool._do_get = _do_get_medido
+    pool._metrics_instrumentado = True
+
+    event.listen(engine, 'checkout', lambda *args: DB_POOL_EN_USO.labels(nombre).inc())
+    event.listen(engine, 'checkin', lambda *args: DB_POOL_EN_USO.labels(nombre).dec())
+    event.listen(engine, 'connect', lambda *args: DB_POOL_ABIERTAS.labels(nombre).inc())
+    event.listen(engine, 'close', lambda *args: DB_POOL_ABIERTAS.labels(nombre).dec())
+
+
+def init_metrics(app, db):
+    """Registrar métricas HTTP y de pool, y exponer /metrics en formato Prometheus"""
+
+    app.config.setdefault('METRICS_ENABLED', True)
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            instrumentar_pool(key or 'default', engine)
+
+    @app.before_request
+    def iniciar_metricas():
+        g._metrics_inicio = time.perf_counter()
+        g._metrics_en_curso = True
+        HTTP_EN_CURSO.inc()
+
+    @app.after_request
+    def registrar_metricas(response):
+        _observar_request(response.status_code)
+        return response
+
+    @app.teardown_request
+    def finalizar_metricas(exc):
+        if exc is not None:
+            _observar_request(500)
+        if g.pop('_metrics_en_curso', False):
+            HTTP_EN_CURSO.dec()
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
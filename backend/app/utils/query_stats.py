@@ -0,0 +1,169 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_request_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTAS_IN = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,?)+\)", re.IGNORECASE)
+_ESPACIOS = re.compile(r"\s+")
+
+_local = threading.local()
+
+
+def huella_sql(statement):
+    """Normalizar una sentencia SQL para agrupar ejecuciones repetidas"""
+    huella = _CADENAS.sub('?', statement)
+    huella = _NUMEROS.sub('?', huella)
+    huella = _LISTAS_IN.sub('IN (...)', huella)
+    return _ESPACIOS.sub(' ', huella).strip()
+
+
+class EstadisticasConsultas:
+    """Conteo, tiempo total y huellas de las consultas SQL de un bloque de trabajo
+
+    Con `capturar` guarda además la primera sentencia y parámetros de cada huella (EXPLAIN).
+    """
+
+    def __init__(self, capturar=False):
+        self.total = 0
+        self.tiempo = 0.0
+        self.huellas = Counter()
+        self.sentencias = {} if capturar else None
+
+    def registrar(self, statement, duracion, parameters=None, executemany=False):
+        self.total += 1
+        self.tiempo += duracion
+        huella = huella_sql(statement)
+        self.huellas[huella] += 1
+        if self.sentencias is not None and not executemany:
+            self.sentencias.setdefault(huella, (statement, parameters))
+
+    def posibles_n_mas_1(self, umbral):
+        return [(huella, n) for huella, n in self.huellas.most_common() if n >= umbral]
+
+    def to_dict(self, umbral=None):
+        data = {
+            'consultas': self.total,
+            'tiempo_db_ms': round(self.tiempo * 1000, 2),
+            'sentencias_distintas': len(self.huellas)
+        }
+        if umbral is not None:
+            data['posibles_n_mas_1'] = [
+                {'sql': huella, 'repeticiones': n} for huella, n in self.posibles_n_mas_1(umbral)
+            ]
+        return data
+
+
+def _colectores_activos():
+    colectores = list(getattr(_local, 'colectores', ()))
+    if has_request_context():
+        stats = g.get('_query_stats')
+        if stats is not None:
+            colectores.append(stats)
+    return colectores
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_stats_inicio', []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    pila = conn.info.get('_query_stats_inicio')
+    if not pila:
+        return
+    duracion = time.perf_counter() - pila.pop()
+    for stats in _colectores_activos():
+        stats.registrar(statement, duracion, parameters, executemany)
+
+
+def _registrar_eventos():
+    if not event.contains(Engine, 'before_cursor_execute', _antes_de_ejecutar):
+        event.listen(Engine, 'before_cursor_execute', _antes_de_ejecutar)
+        event.listen(Engine, 'after_cursor_execute', _despues_de_ejecutar)
+
+
+@contextmanager
+def contar_consultas(capturar=False):
+    """Contar las consultas ejecutadas dentro del bloque (fuera o dentro de un request)"""
+    _registrar_eventos()
+    stats = EstadisticasConsultas(capturar)
+    if not hasattr(_local, 'colectores'):
+        _local.colectores = []
+    _local.colectores.append(stats)
+    try:
+        yield stats
+    finally:
+        _local.colectores.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(maximo):
+    """Fallar si el bloque ejecuta más de `maximo` consultas (presupuesto por endpoint en pruebas)
+
+        with assert_max_queries(3):
+            client.get('/api/combos/')
+    """
+    with contar_consultas() as stats:
+        yield stats
+    if stats.total > maximo:
+        repetidas = '\n'.join(f'  {n}x {huella}' for huella, n in stats.huellas.most_common(5))
+        raise AssertionError(
+            f'Se ejecutaron {stats.total} consultas (máximo {maximo}):\n{repetidas}'
+        )
+
+
+def init_query_stats(app):
+    """Medir consultas por request: encabezado Server-Timing, log estructurado y aviso de N+1"""
+
+    app.config.setdefault('QUERY_STATS_ENABLED', True)
+    app.config.setdefault('QUERY_N1_THRESHOLD', 5)
+
+    if not app.config['QUERY_STATS_ENABLED']:
+        return
+
+    _registrar_eventos()
+
+    @app.before_request
+    def iniciar_estadisticas():
+        g._query_stats = EstadisticasConsultas()
+        g._request_inicio = time.perf_counter()
+
+    @app.after_request
+    def reportar_estadisticas(response):
+        stats = g.pop('_query_stats', None)
+        inicio = g.pop('_request_inicio', None)
+        if stats is None or inicio is None:
+            return response
+
+        duracion_total = time.perf_counter() - inicio
+        umbral = current_app.config['QUERY_N1_THRESHOLD']
+        sospechosas = stats.posibles_n_mas_1(umbral)
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.tiempo * 1000:.2f};desc="{stats.total} consultas"'
+        )
+        response.headers.add('Server-Timing', f'app;dur={duracion_total * 1000:.2f}')
+
+        registro = {
+            'evento': 'request_sql',
+            'metodo': request.method,
+            'ruta': request.url_rule.rule if request.url_rule else request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duracion_ms': round(duracion_total * 1000, 2),
+            **stats.to_dict(umbral if sospechosas else None)
+        }
+
+        if sospechosas:
+            current_app.logger.warning(json.dumps(registro, ensure_ascii=False))
+        else:
+            current_app.logger.info(json.dumps(registro, ensure_ascii=False))
+
+        return response
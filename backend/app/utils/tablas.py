@@ -0,0 +1,79 @@
+"""
+Lectura en streaming de archivos tabulares (CSV o XLSX) subidos o de disco
+"""
+import codecs
+import csv
+import io
+
+TAMANO_BLOQUE = 1 << 20
+
+
+def texto_celda(valor):
+    """Celda como texto sin espacios; los float enteros de Excel (cédulas, ids) pierden el .0"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def validar_utf8(flujo):
+    """Decodificar todo el flujo antes de procesarlo y volver al inicio
+
+    Un byte inválido al final de un archivo grande se detecta antes de escribir nada en la
+    base. El UnicodeDecodeError lleva en `linea` dónde está el byte inválido.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    lineas = 1
+    while True:
+        bloque = flujo.read(TAMANO_BLOQUE)
+        try:
+            decodificador.decode(bloque, final=not bloque)
+        except UnicodeDecodeError as e:
+            e.linea = lineas + bloque.count(b'\n', 0, max(e.start, 0))
+            raise
+        if not bloque:
+            break
+        lineas += bloque.count(b'\n')
+    flujo.seek(0)
+
+
+def _filas_csv(flujo):
+    validar_utf8(flujo)
+    lector = csv.reader(io.TextIOWrapper(flujo, encoding='utf-8-sig', newline=''))
+    yield from lector
+
+
+def _filas_xlsx(flujo):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(flujo, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def mensaje_codificacion(error):
+    """Mensaje 400 para un CSV que no está en UTF-8"""
+    linea = getattr(error, 'linea', None)
+    return 'El archivo debe estar codificado en UTF-8' + (f' (byte inválido en la línea {linea})' if linea else '')
+
+
+def leer_tabla(flujo, nombre_archivo):
+    """Retornar (columnas en minúsculas, iterador de (número de fila, dict columna -> texto))
+
+    `flujo` es binario; se trata como XLSX si el nombre termina en .xlsx y como CSV UTF-8 si no.
+    El encabezado es la fila 1 y las filas vacías se omiten. La codificación de un CSV se valida
+    completa antes de retornar.
+    """
+    filas = _filas_xlsx(flujo) if nombre_archivo.lower().endswith('.xlsx') else _filas_csv(flujo)
+    columnas = [texto_celda(c).lower() for c in next(filas, ())]
+
+    def datos():
+        for numero, valores in enumerate(filas, start=2):
+            fila = {c: texto_celda(v) for c, v in zip(columnas, valores) if c}
+            if any(fila.values()):
+                yield numero, fila
+
+    return columnas, datos()
@@ -0,0 +1,430 @@
+"""
+Benchmark de endpoints con umbrales de regresión
+Ejecutar (desde backend/):
+    python benchmarks/bench_endpoints.py run --output bench.json
+    python benchmarks/bench_endpoints.py compare base.json bench.json --threshold 15
+    python benchmarks/bench_endpoints.py lentos --url http://127.0.0.1:5000 --conexiones 500
+
+El benchmark escribe: crea el usuario bench_cliente, cancela sus compras abiertas y ejecuta
+el flujo comprar -> registrar -> verificar. Por eso usa la base de BENCH_DATABASE_URL (SQLite
+o PostgreSQL local, en lugar de DATABASE_URL) y se niega a correr sin ella salvo con
+--permitir-escritura. Con --preparar crea las tablas y ejecuta seed.py; para datos a escala
+usar antes `flask seed-scale`.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# La configuración lee las URLs al importarse: redirigir todos los engines antes de importar la app
+BENCH_DATABASE_URL = os.getenv('BENCH_DATABASE_URL')
+if BENCH_DATABASE_URL:
+    os.environ['DATABASE_URL'] = BENCH_DATABASE_URL
+    os.environ['REPORTES_DATABASE_URL'] = BENCH_DATABASE_URL
+    os.environ.pop('REPLICA_DATABASE_URL', None)
+
+from werkzeug.serving import make_server
+from app import create_app, db
+from app.models.usuario import Usuario
+from app.models.compra import Compra
+from app.models.combo import Combo
+from app.utils.query_stats import contar_consultas
+
+BENCH_USUARIO = 'bench_cliente'
+BENCH_PASSWORD = 'bench123'
+_CONSULTAS_HEADER = re.compile(r'db;dur=[\d.]+;desc="(\d+) consultas"')
+
+# (nombre, método, ruta, rol, body); todas se ejecutan también con carga HTTP concurrente
+ENDPOINTS = [
+    ('combos.listar', 'GET', '/api/combos/', None, None),
+    ('combos.detalle', 'GET', '/api/combos/{combo_id}', None, None),
+    ('productos.listar', 'GET', '/api/productos/?per_page=50', 'cliente', None),
+    ('comentarios.publicos', 'GET', '/api/comentarios/', None, None),
+    ('auth.login', 'POST', '/api/auth/login', None, {'username': BENCH_USUARIO, 'password': BENCH_PASSWORD}),
+    ('pagos.mis_compras', 'GET', '/api/pagos/mis-compras', 'cliente', None),
+    ('pagos.pendientes', 'GET', '/api/pagos/pendientes', 'cobranza', None),
+    ('reportes.semanal', 'GET', '/api/reportes/semanal', 'admin', None),
+    ('reportes.inventario', 'GET', '/api/reportes/inventario', 'admin', None),
+    ('reportes.ventas', 'GET', '/api/reportes/ventas', 'admin', None),
+    ('reportes.retiros', 'GET', '/api/reportes/retiros', 'admin', None),
+]
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias, duracion, consultas, errores):
+    return {
+        'requests': len(latencias),
+        'errores': errores,
+        'p50_ms': round(percentil(latencias, 50) * 1000, 3) if latencias else None,
+        'p95_ms': round(percentil(latencias, 95) * 1000, 3) if latencias else None,
+        'p99_ms': round(percentil(latencias, 99) * 1000, 3) if latencias else None,
+        'throughput_rps': round(len(latencias) / duracion, 2) if duracion > 0 else None,
+        'consultas_por_request': round(sum(consultas) / len(consultas), 2) if consultas else None
+    }
+
+
+class Bench:
+
+    def __init__(self, app, url_base=None):
+        self.app = app
+        self.url_base = url_base
+        self.client = app.test_client()
+        self.tokens = {}
+        self.combo_id = None
+
+    def preparar_usuarios(self):
+        with self.app.app_context():
+            usuario = Usuario.query.filter_by(username=BENCH_USUARIO).first()
+            if not usuario:
+                usuario = Usuario(
+                    nombre='Bench', apellido='Cliente', cedula='V-99999999',
+                    email='bench@cecoalimentos.com', username=BENCH_USUARIO, rol='cliente'
+                )
+                usuario.set_password(BENCH_PASSWORD)
+                db.session.add(usuario)
+            # Cancelar compras abiertas de corridas anteriores para poder volver a comprar
+            Compra.query.filter(
+                Compra.usuario_id == usuario.id,
+                Compra.estado.in_(['pendiente_pago', 'pago_verificando'])
+            ).update({'estado': 'cancelado'}, synchronize_session=False)
+            db.session.commit()
+
+            combo = Combo.query.filter_by(activo=True, disponible=True).order_by(Combo.id).first()
+            if not combo:
+                raise SystemExit('No hay combos disponibles: ejecute seed.py o flask seed-scale')
+            self.combo_id = combo.id
+
+        for rol, (username, password) in {
+            'cliente': (BENCH_USUARIO, BENCH_PASSWORD),
+            'cobranza': ('cobranza', 'cobranza123'),
+            'admin': ('admin', 'admin123')
+        }.items():
+            r = self.client.post('/api/auth/login', json={'username': username, 'password': password})
+            if r.status_code != 200:
+                raise SystemExit(f'No se pudo iniciar sesión como {username}: ejecute seed.py')
+            self.tokens[rol] = r.json['access_token']
+
+    def headers(self, rol):
+        return {'Authorization': f'Bearer {self.tokens[rol]}'} if rol else {}
+
+    def ruta(self, plantilla):
+        return plantilla.format(combo_id=self.combo_id)
+
+    def llamar(self, metodo, ruta, rol=None, body=None):
+        with contar_consultas() as stats:
+            inicio = time.perf_counter()
+            r = self.client.open(ruta, method=metodo, json=body, headers=self.headers(rol))
+            duracion = time.perf_counter() - inicio
+        return r, duracion, stats.total
+
+    def medir(self, metodo, ruta, rol, body, iteraciones):
+        latencias, consultas, errores = [], [], 0
+        self.llamar(metodo, ruta, rol, body)  # calentamiento
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            r, duracion, total = self.llamar(metodo, ruta, rol, body)
+            if r.status_code >= 400:
+                errores += 1
+            latencias.append(duracion)
+            consultas.append(total)
+        return resumir(latencias, time.perf_counter() - inicio, consultas, errores)
+
+    def medir_flujo_compra(self, iteraciones):
+        """comprar -> registrar -> verificar (aprobar), medido por paso"""
+        pasos = {'pagos.comprar': ([], []), 'pagos.registrar': ([], []), 'pagos.verificar': ([], [])}
+        errores = dict.fromkeys(pasos, 0)
+        inicio = time.perf_counter()
+        for i in range(iteraciones):
+            r, duracion, total = self.llamar('POST', '/api/pagos/comprar', 'cliente', {'combo_id': self.combo_id})
+            pasos['pagos.comprar'][0].append(duracion)
+            pasos['pagos.comprar'][1].append(total)
+            if r.status_code != 201:
+                errores['pagos.comprar'] += 1
+                continue
+            compra = r.json['compra']
+
+            r, duracion, total = self.llamar('POST', '/api/pagos/registrar', 'cliente', {
+                'compra_id': compra['id'], 'metodo_pago': 'pago_movil',
+                'numero_referencia': f'BENCH{time.time_ns()}{i}', 'banco_origen': 'Banco de Venezuela',
+                'monto': compra['monto_total']
+            })
+            pasos['pagos.registrar'][0].append(duracion)
+            pasos['pagos.registrar'][1].append(total)
+            if r.status_code != 201:
+                errores['pagos.registrar'] += 1
+                continue
+
+            r, duracion, total = self.llamar(
+                'POST', f"/api/pagos/{r.json['pago']['id']}/verificar", 'cobranza', {'accion': 'aprobar'}
+            )
+            pasos['pagos.verificar'][0].append(duracion)
+            pasos['pagos.verificar'][1].append(total)
+            if r.status_code != 200:
+                errores['pagos.verificar'] += 1
+        duracion_total = time.perf_counter() - inicio
+        return {
+            nombre: resumir(latencias, duracion_total, consultas, errores[nombre])
+            for nombre, (latencias, consultas) in pasos.items()
+        }
+
+    def carga_http(self, metodo, ruta, rol, body, requests, concurrencia):
+        """Carga concurrente contra un servidor HTTP real
+
+        Sin --url se levanta werkzeug (threaded) en un puerto local; con --url se mide el
+        servidor indicado, por ejemplo gunicorn con cada perfil de workers.
+        """
+        servidor = None
+        if self.url_base:
+            url = self.url_base.rstrip('/') + ruta
+        else:
+            servidor = make_server('127.0.0.1', 0, self.app, threaded=True)
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+            url = f'http://127.0.0.1:{servidor.server_port}{ruta}'
+        headers = {'Content-Type': 'application/json', **self.headers(rol)}
+        data = json.dumps(body).encode() if body is not None else None
+
+        def una_request(_):
+            req = urllib.request.Request(url, data=data, headers=headers, method=metodo)
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=60) as resp:
+                    resp.read()
+                    timing = resp.headers.get('Server-Timing', '')
+                    ok = True
+            except urllib.error.HTTPError as e:
+                timing = e.headers.get('Server-Timing', '')
+                ok = e.code < 400
+            except OSError:
+                timing, ok = '', False
+            match = _CONSULTAS_HEADER.search(timing)
+            return time.perf_counter() - inicio, int(match.group(1)) if match else None, ok
+
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+                resultados = list(pool.map(una_request, range(requests)))
+            duracion = time.perf_counter() - inicio
+        finally:
+            if servidor:
+                servidor.shutdown()
+
+        latencias = [r[0] for r in resultados]
+        consultas = [r[1] for r in resultados if r[1] is not None]
+        errores = sum(1 for r in resultados if not r[2])
+        return resumir(latencias, duracion, consultas, errores)
+
+
+def comando_run(args):
+    if not BENCH_DATABASE_URL and not args.permitir_escritura:
+        raise SystemExit(
+            'El benchmark escribe en la base (usuario bench_cliente, compras, pagos). Defina '
+            'BENCH_DATABASE_URL con una base separada o use --permitir-escritura para usar DATABASE_URL'
+        )
+
+    app = create_app(args.config)
+    # No enviar emails reales en el flujo de compra ni registrar el log por request
+    app.extensions['mail'].suppress = True
+    app.logger.setLevel('ERROR')
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+
+    if args.preparar:
+        with app.app_context():
+            db.create_all()
+        import seed
+        seed.seed_database(app)
+
+    bench = Bench(app, args.url)
+    bench.preparar_usuarios()
+    resultados = {}
+    filtro = set(args.solo.split(',')) if args.solo else None
+
+    for nombre, metodo, plantilla, rol, body in ENDPOINTS:
+        if filtro and nombre not in filtro:
+            continue
+        ruta = bench.ruta(plantilla)
+        print(f'→ {nombre}', flush=True)
+        resultados[f'{nombre}:test_client'] = bench.medir(metodo, ruta, rol, body, args.iteraciones)
+        if args.http_requests > 0:
+            resultados[f'{nombre}:http'] = bench.carga_http(
+                metodo, ruta, rol, body, args.http_requests, args.concurrencia
+            )
+
+    if not filtro or filtro & {'pagos.comprar', 'pagos.registrar', 'pagos.verificar'}:
+        print('→ flujo de compra (comprar, registrar, verificar)', flush=True)
+        for nombre, resumen in bench.medir_flujo_compra(args.iteraciones).items():
+            resultados[f'{nombre}:test_client'] = resumen
+
+    with app.app_context():
+        motor = db.engine.dialect.name
+
+    salida = {
+        'meta': {
+            'fecha': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'motor_db': motor,
+            'iteraciones': args.iteraciones,
+            'http_requests': args.http_requests,
+            'concurrencia': args.concurrencia,
+            'url': args.url
+        },
+        'resultados': resultados
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(salida, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{'endpoint':<40} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9} {'consultas':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<40} {r['p50_ms'] or 0:>9.2f} {r['p95_ms'] or 0:>9.2f} {r['p99_ms'] or 0:>9.2f} "
+              f"{r['throughput_rps'] or 0:>9.1f} {r['consultas_por_request'] or 0:>10.1f}")
+    print(f'\nResultados guardados en {args.output}')
+
+
+def abrir_conexiones_lentas(url_base, cantidad, ruta):
+    """Abrir `cantidad` conexiones que envían un request incompleto y quedan esperando
+
+    Simulan clientes lentos (móviles, redes malas): cada una ocupa lo que el worker le asigne
+    a una conexión mientras no termina de enviar los encabezados.
+    """
+    destino = urlsplit(url_base)
+    conexiones = []
+    for _ in range(cantidad):
+        conexion = socket.create_connection((destino.hostname, destino.port or 80), timeout=10)
+        conexion.sendall(f'GET {ruta} HTTP/1.1\r\nHost: {destino.netloc}\r\n'.encode())
+        conexiones.append(conexion)
+    return conexiones
+
+
+def comando_lentos(args):
+    """Latencia de un GET mientras el servidor de --url tiene conexiones lentas abiertas"""
+    conexiones = abrir_conexiones_lentas(args.url, args.conexiones, args.ruta)
+    url = args.url.rstrip('/') + args.ruta
+    latencias, errores = [], 0
+    try:
+        # Dar tiempo a que el servidor acepte las conexiones lentas antes de medir
+        time.sleep(args.espera)
+        inicio = time.perf_counter()
+        for _ in range(args.requests):
+            comienzo = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=args.timeout) as resp:
+                    resp.read()
+                latencias.append(time.perf_counter() - comienzo)
+            except OSError:
+                errores += 1
+        duracion = time.perf_counter() - inicio
+    finally:
+        for conexion in conexiones:
+            conexion.close()
+
+    salida = {
+        'meta': {
+            'fecha': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'url': args.url,
+            'ruta': args.ruta,
+            'conexiones_lentas': args.conexiones,
+            'timeout_s': args.timeout,
+            'perfil': args.perfil
+        },
+        'resultados': {f'{args.ruta}:lentos': resumir(latencias, duracion, [], errores)}
+    }
+    with open(args.output, 'w') as f:
+        json.dump(salida, f, indent=2, ensure_ascii=False)
+
+    r = salida['resultados'][f'{args.ruta}:lentos']
+    latencia = f"p50 {r['p50_ms']:.1f} ms, p95 {r['p95_ms']:.1f} ms, " if latencias else ''
+    print(f"{args.conexiones} conexiones lentas: {r['requests']} de {args.requests} respondidas, "
+          f"{latencia}{errores} sin respuesta en {args.timeout:g} s")
+    print(f'Resultados guardados en {args.output}')
+
+
+def comando_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)['resultados']
+    with open(args.nuevo) as f:
+        nuevo = json.load(f)['resultados']
+
+    regresiones = []
+    for nombre in sorted(set(base) & set(nuevo)):
+        for metrica in args.metricas.split(','):
+            antes, despues = base[nombre].get(metrica), nuevo[nombre].get(metrica)
+            if not antes or despues is None:
+                continue
+            # throughput: más es mejor; el resto (latencias, consultas): menos es mejor
+            cambio = (despues - antes) / antes * 100
+            if metrica == 'throughput_rps':
+                cambio = -cambio
+            marca = 'REGRESIÓN' if cambio > args.threshold else ''
+            print(f'{nombre:<40} {metrica:<22} {antes:>10.2f} → {despues:>10.2f} ({cambio:+.1f}%) {marca}')
+            if marca:
+                regresiones.append(f'{nombre} {metrica}')
+
+    if regresiones:
+        print(f'\n❌ {len(regresiones)} regresión(es) mayores a {args.threshold}%:')
+        for r in regresiones:
+            print(f'  - {r}')
+        sys.exit(1)
+    print(f'\n✅ Sin regresiones mayores a {args.threshold}%')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de endpoints CECOALIMENTOS')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    run = sub.add_parser('run', help='Ejecutar el benchmark y guardar resultados en JSON')
+    run.add_argument('--output', default='bench.json')
+    run.add_argument('--config', default=os.getenv('FLASK_ENV', 'development'))
+    run.add_argument('--iteraciones', type=int, default=50, help='Requests por endpoint con el test client')
+    run.add_argument('--http-requests', type=int, default=200, help='Requests por endpoint vía HTTP, incluido el POST de auth.login (0 = omitir)')
+    run.add_argument('--concurrencia', type=int, default=8)
+    run.add_argument('--url', help='Servidor externo para la carga HTTP (ej. http://127.0.0.1:5000)')
+    run.add_argument('--solo', help='Lista de endpoints separados por coma')
+    run.add_argument('--preparar', action='store_true', help='Crear tablas y ejecutar seed.py antes')
+    run.add_argument('--permitir-escritura', action='store_true',
+                     help='Correr sin BENCH_DATABASE_URL, escribiendo en la base de DATABASE_URL')
+    run.set_defaults(func=comando_run)
+
+    lentos = sub.add_parser('lentos', help='Medir un GET con conexiones lentas abiertas contra un servidor externo')
+    lentos.add_argument('--url', required=True, help='Servidor a medir (ej. gunicorn en http://127.0.0.1:5000)')
+    lentos.add_argument('--conexiones', type=int, default=500, help='Conexiones lentas abiertas durante la medición')
+    lentos.add_argument('--ruta', default='/api/combos/')
+    lentos.add_argument('--requests', type=int, default=20)
+    lentos.add_argument('--timeout', type=float, default=20, help='Segundos antes de contar un request sin respuesta')
+    lentos.add_argument('--espera', type=float, default=1, help='Segundos entre abrir las conexiones y medir')
+    lentos.add_argument('--perfil', help='Etiqueta del perfil medido (ej. gevent, sync)')
+    lentos.add_argument('--output', default='lentos.json')
+    lentos.set_defaults(func=comando_lentos)
+
+    compare = sub.add_parser('compare', help='Comparar dos resultados y fallar si hay regresión')
+    compare.add_argument('base')
+    compare.add_argument('nuevo')
+    compare.add_argument('--threshold', type=float, default=20, help='Porcentaje máximo de empeoramiento')
+    compare.add_argument('--metricas', default='p95_ms,consultas_por_request')
+    compare.set_defaults(func=comando_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
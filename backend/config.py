@@ -4,6 +4,29 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def engine_options(url, statement_timeout_ms, pool_size, max_overflow):
+    """Opciones del engine SQLAlchemy: pool, pre-ping, recycle y statement_timeout por conexión"""
+    opciones = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800))
+    }
+    
+    if url.startswith('sqlite'):
+        return opciones
+    
+    opciones.update({
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10))
+    })
+    
+    if url.startswith('postgresql') and statement_timeout_ms:
+        opciones['connect_args'] = {'options': f'-c statement_timeout={statement_timeout_ms}'}
+    
+    return opciones
+
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     
@@ -14,6 +37,55 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Pool de conexiones y timeouts (por worker de gunicorn). Un worker gevent atiende cientos
+    # de requests a la vez y necesita un pool mayor que uno sync
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        statement_timeout_ms=int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 15000)),
+        pool_size=int(os.getenv('DB_POOL_SIZE', 20 if os.getenv('GUNICORN_WORKER_CLASS') == 'gevent' else 5)),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 5))
+    )
+    
+    # Engine separado para reportes: timeout más largo y pool propio, para que un
+    # reporte pesado no ocupe las conexiones del flujo de pagos
+    REPORTES_DATABASE_URL = os.getenv('REPORTES_DATABASE_URL', SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = {
+        'reportes': {
+            'url': REPORTES_DATABASE_URL,
+            **engine_options(
+                REPORTES_DATABASE_URL,
+                statement_timeout_ms=int(os.getenv('DB_REPORTES_STATEMENT_TIMEOUT_MS', 120000)),
+                pool_size=int(os.getenv('DB_REPORTES_POOL_SIZE', 2)),
+                max_overflow=int(os.getenv('DB_REPORTES_MAX_OVERFLOW', 1))
+            )
+        }
+    }
+    
+    # Réplica de lectura opcional para reportes y catálogo público
+    REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 2))
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+    if REPLICA_DATABASE_URL:
+        SQLALCHEMY_BINDS['replica'] = {
+            'url': REPLICA_DATABASE_URL,
+            **engine_options(
+                REPLICA_DATABASE_URL,
+                statement_timeout_ms=int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 15000)),
+                pool_size=int(os.getenv('DB_REPLICA_POOL_SIZE', 5)),
+                max_overflow=int(os.getenv('DB_REPLICA_MAX_OVERFLOW', 5))
+            )
+        }
+        SQLALCHEMY_BINDS['replica_reportes'] = {
+            'url': REPLICA_DATABASE_URL,
+            **engine_options(
+                REPLICA_DATABASE_URL,
+                statement_timeout_ms=int(os.getenv('DB_REPORTES_STATEMENT_TIMEOUT_MS', 120000)),
+                pool_size=int(os.getenv('DB_REPORTES_POOL_SIZE', 2)),
+                max_overflow=int(os.getenv('DB_REPORTES_MAX_OVERFLOW', 1))
+            )
+        }
+    
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -26,18 +98,76 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@cecoalimentos.com')
+    # Enviar emails fuera del request para que una conexión SMTP lenta no retenga al worker.
+    # Desactivado por defecto: al salir, el worker de gunicorn espera los envíos pendientes solo
+    # hasta MAIL_ASYNC_TIMEOUT segundos (ver gunicorn.conf.py)
+    MAIL_ASYNC = os.getenv('MAIL_ASYNC', 'false').lower() == 'true'
+    
+    # Compresión de respuestas y ETag
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+    COMPRESS_CACHE_SIZE = int(os.getenv('COMPRESS_CACHE_SIZE', 256))
+    
+    # Instrumentación de consultas SQL por request
+    QUERY_STATS_ENABLED = os.getenv('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+    QUERY_N1_THRESHOLD = int(os.getenv('QUERY_N1_THRESHOLD', 5))
+    
+    # Swagger UI en /docs; /apispec.json se sirve desde memoria o desde APISPEC_FILE
+    SWAGGER_ENABLED = os.getenv('SWAGGER_ENABLED', 'true').lower() == 'true'
+    APISPEC_FILE = os.getenv('APISPEC_FILE')
+    APISPEC_MAX_AGE = int(os.getenv('APISPEC_MAX_AGE', 3600))
+    
+    # Idempotency-Key en los POST de pagos
+    IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', 24))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 10))
+    IDEMPOTENCY_POLL_SECONDS = float(os.getenv('IDEMPOTENCY_POLL_SECONDS', 0.1))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 60))
+    
+    # Planificador de reposición: días de historia, días a cubrir tras la entrega y nivel de servicio
+    REPOSICION_VENTANA_DIAS = int(os.getenv('REPOSICION_VENTANA_DIAS', 28))
+    REPOSICION_COBERTURA_DIAS = int(os.getenv('REPOSICION_COBERTURA_DIAS', 7))
+    REPOSICION_NIVEL_SERVICIO = float(os.getenv('REPOSICION_NIVEL_SERVICIO', 0.95))
+    
+    # Pronóstico de demanda: días de historia del ajuste completo y cada cuántos días se repite
+    PRONOSTICO_HISTORIA_DIAS = int(os.getenv('PRONOSTICO_HISTORIA_DIAS', 112))
+    PRONOSTICO_REAJUSTE_DIAS = int(os.getenv('PRONOSTICO_REAJUSTE_DIAS', 7))
+    
+    # Análisis de precios de combos: margen objetivo sobre el precio de venta, (precio - costo) / precio,
+    # y múltiplo de redondeo del precio sugerido
+    PRECIOS_MARGEN_OBJETIVO = float(os.getenv('PRECIOS_MARGEN_OBJETIVO', 0.2))
+    PRECIOS_REDONDEO = float(os.getenv('PRECIOS_REDONDEO', 0.5))
+    
+    # Importación masiva de miembros: procesos para bcrypt (solo CLI; el endpoint no crea procesos) y filas por lote.
+    # El endpoint hashea dentro del request (~0.3 s por fila) y rechaza archivos con más filas que
+    # IMPORTACION_MAX_FILAS_WEB para no superar GUNICORN_TIMEOUT
+    IMPORTACION_PROCESOS = int(os.getenv('IMPORTACION_PROCESOS', os.cpu_count() or 1))
+    IMPORTACION_LOTE = int(os.getenv('IMPORTACION_LOTE', 1000))
+    IMPORTACION_MAX_FILAS_WEB = int(os.getenv('IMPORTACION_MAX_FILAS_WEB', 100))
+    
+    # Métricas Prometheus en /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 
+class TestingConfig(Config):
+    TESTING = True
+    MAIL_ASYNC = False
+    METRICS_ENABLED = False
+
+
 class ProductionConfig(Config):
     DEBUG = False
+    SWAGGER_ENABLED = os.getenv('SWAGGER_ENABLED', 'false').lower() == 'true'
 
 
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
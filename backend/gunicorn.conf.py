@@ -0,0 +1,48 @@
+"""
+Configuración de gunicorn
+Uso: gunicorn run:app (gunicorn carga este archivo automáticamente)
+
+Perfiles (GUNICORN_WORKER_CLASS):
+- sync: un request por worker; simple, pero un SMTP o reporte lento ocupa el worker completo.
+- gevent: cientos de conexiones concurrentes por worker (clientes lentos, móviles, SSE);
+  requiere gevent y psycogreen y un pool mayor (DB_POOL_SIZE 20 por defecto con gevent, ver README).
+"""
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Directorio compartido para que /metrics agregue los valores de todos los workers
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+
+def on_starting(server):
+    directorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio, exist_ok=True)
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # psycopg2 es una extensión en C: sin este parche cada consulta bloquea el hub de gevent
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+
+def worker_exit(server, worker):
+    # Los emails con MAIL_ASYNC corren en hilos daemon: esperarlos para no perderlos al reiniciar
+    from app.concurrencia import esperar_segundo_plano
+    pendientes = esperar_segundo_plano(timeout=int(os.getenv('MAIL_ASYNC_TIMEOUT', 20)))
+    if pendientes:
+        server.log.warning(f'Worker {worker.pid} sale con {pendientes} tarea(s) en segundo plano sin terminar')
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,47 @@
+"""Índices de búsqueda de usuarios por cédula, teléfono, email y nombre
+
+Revision ID: 0b7d3e5f9a42
+Revises: f2a6c9d81b35
+Create Date: 2026-10-19 20:41:12.318204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7d3e5f9a42'
+down_revision = 'f2a6c9d81b35'
+branch_labels = None
+depends_on = None
+
+
+# Iguales a las expresiones de app.services.busqueda sin prefijo de tabla
+INDICES = {
+    'ix_usuarios_cedula_digitos': "btree ((regexp_replace(cedula, '[^0-9]', '', 'g')) text_pattern_ops)",
+    'ix_usuarios_telefono_digitos': (
+        "btree ((regexp_replace(coalesce(telefono, ''), '[^0-9]', '', 'g')) text_pattern_ops)"
+    ),
+    'ix_usuarios_email_lower': 'btree ((lower(email)) text_pattern_ops)',
+    'ix_usuarios_nombre_trgm': (
+        "gin ((inmutable_unaccent(lower(nombre || ' ' || apellido))) gin_trgm_ops)"
+    )
+}
+
+
+def upgrade():
+    # Solo PostgreSQL: en SQLite la búsqueda usa los índices en memoria de app.services.busqueda
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for nombre, definicion in INDICES.items():
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON usuarios USING {definicion}')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for nombre in reversed(list(INDICES)):
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {nombre}')
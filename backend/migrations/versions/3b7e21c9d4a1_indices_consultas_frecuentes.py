@@ -0,0 +1,53 @@
+"""Indices para las consultas frecuentes de las rutas
+
+Revision ID: 3b7e21c9d4a1
+Revises: 95876ce133c4
+Create Date: 2026-10-19 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e21c9d4a1'
+down_revision = '95876ce133c4'
+branch_labels = None
+depends_on = None
+
+
+PAGOS_PENDIENTES = sa.text("estado = 'pendiente'")
+
+# (nombre, tabla, columnas, kwargs)
+# inventario.producto_id ya tiene índice por su restricción UNIQUE
+INDICES = [
+    ('ix_pagos_estado_fecha_verificacion', 'pagos', ['estado', 'fecha_verificacion'], {}),
+    ('ix_pagos_pendientes_fecha_pago', 'pagos', ['fecha_pago'],
+     {'postgresql_where': PAGOS_PENDIENTES, 'sqlite_where': PAGOS_PENDIENTES}),
+    ('ix_pagos_compra_id', 'pagos', ['compra_id'], {}),
+    ('ix_compras_usuario_id_estado', 'compras', ['usuario_id', 'estado'], {}),
+    ('ix_compras_usuario_id_fecha_compra', 'compras', ['usuario_id', 'fecha_compra'], {}),
+    ('ix_retiros_fecha_retiro_programada', 'retiros', ['fecha_retiro_programada', 'numero_cola'], {}),
+    ('ix_retiros_compra_id', 'retiros', ['compra_id'], {}),
+    ('ix_comentarios_estado_fecha_creacion', 'comentarios', ['estado', 'fecha_creacion'], {}),
+    ('ix_comentarios_usuario_id_fecha_creacion', 'comentarios', ['usuario_id', 'fecha_creacion'], {}),
+    ('ix_productos_activo_categoria', 'productos', ['activo', 'categoria'], {}),
+    ('ix_productos_activo_nombre', 'productos', ['activo', 'nombre'], {}),
+    ('ix_productos_proveedor_id', 'productos', ['proveedor_id'], {}),
+    ('ix_combo_productos_combo_id', 'combo_productos', ['combo_id'], {}),
+    ('ix_combo_productos_producto_id', 'combo_productos', ['producto_id'], {}),
+    ('ix_detalle_pedidos_proveedor_pedido_id', 'detalle_pedidos_proveedor', ['pedido_id'], {}),
+]
+
+
+def upgrade():
+    # CONCURRENTLY en PostgreSQL para no bloquear escrituras en tablas grandes
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas, kwargs in INDICES:
+            op.create_index(nombre, tabla, columnas, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas, kwargs in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True)
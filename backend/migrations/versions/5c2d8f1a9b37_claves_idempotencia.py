@@ -0,0 +1,41 @@
+"""Tabla de claves de idempotencia para los POST de pagos
+
+Revision ID: 5c2d8f1a9b37
+Revises: 3b7e21c9d4a1
+Create Date: 2026-10-19 16:20:44.318902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2d8f1a9b37'
+down_revision = '3b7e21c9d4a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('claves_idempotencia',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('clave', sa.String(length=255), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('endpoint', sa.String(length=100), nullable=False),
+    sa.Column('huella_request', sa.String(length=64), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('respuesta', sa.Text(), nullable=True),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.Column('fecha_expiracion', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('usuario_id', 'endpoint', 'clave', name='uq_claves_idempotencia_usuario_endpoint_clave')
+    )
+    op.create_index('ix_claves_idempotencia_fecha_expiracion', 'claves_idempotencia', ['fecha_expiracion'])
+
+
+def downgrade():
+    op.drop_index('ix_claves_idempotencia_fecha_expiracion', table_name='claves_idempotencia')
+    op.drop_table('claves_idempotencia')
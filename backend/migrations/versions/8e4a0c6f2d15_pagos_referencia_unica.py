@@ -0,0 +1,68 @@
+"""Referencia bancaria única por pago no rechazado
+
+Revision ID: 8e4a0c6f2d15
+Revises: 5c2d8f1a9b37
+Create Date: 2026-10-19 16:48:02.571340
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4a0c6f2d15'
+down_revision = '5c2d8f1a9b37'
+branch_labels = None
+depends_on = None
+
+
+REFERENCIA_UNICA = sa.text("estado <> 'rechazado' AND duplicado_de IS NULL")
+
+# Copia congelada de app.services.pagos_duplicados.SQL_MARCAR_DUPLICADOS al crear esta
+# migración: no debe seguir los cambios del servicio (una migración aplica el esquema de su época)
+MARCAR_DUPLICADOS = """
+    UPDATE pagos SET duplicado_de = (
+        SELECT MIN(original.id) FROM pagos original
+        WHERE original.numero_referencia = pagos.numero_referencia
+          AND COALESCE(original.banco_origen, '') = COALESCE(pagos.banco_origen, '')
+          AND original.estado <> 'rechazado'
+          AND original.id < pagos.id
+    )
+    WHERE estado <> 'rechazado'
+      AND duplicado_de IS NULL
+      AND EXISTS (
+        SELECT 1 FROM pagos original
+        WHERE original.numero_referencia = pagos.numero_referencia
+          AND COALESCE(original.banco_origen, '') = COALESCE(pagos.banco_origen, '')
+          AND original.estado <> 'rechazado'
+          AND original.id < pagos.id
+      )
+"""
+
+
+def upgrade():
+    with op.batch_alter_table('pagos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duplicado_de', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_pagos_duplicado_de', 'pagos', ['duplicado_de'], ['id'])
+
+    # Los duplicados existentes se marcan antes de crear el índice único
+    op.execute(MARCAR_DUPLICADOS)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_pagos_referencia_banco', 'pagos',
+            ['numero_referencia', sa.text("COALESCE(banco_origen, '')")],
+            unique=True,
+            postgresql_concurrently=True,
+            postgresql_where=REFERENCIA_UNICA,
+            sqlite_where=REFERENCIA_UNICA
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ux_pagos_referencia_banco', table_name='pagos', postgresql_concurrently=True)
+
+    with op.batch_alter_table('pagos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_pagos_duplicado_de', type_='foreignkey')
+        batch_op.drop_column('duplicado_de')
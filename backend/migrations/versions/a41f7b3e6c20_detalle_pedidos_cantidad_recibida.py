@@ -0,0 +1,32 @@
+"""Cantidad recibida por detalle de pedido a proveedor
+
+Revision ID: a41f7b3e6c20
+Revises: 8e4a0c6f2d15
+Create Date: 2026-10-19 17:35:12.904217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f7b3e6c20'
+down_revision = '8e4a0c6f2d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('detalle_pedidos_proveedor', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cantidad_recibida', sa.Integer(), nullable=True))
+
+    # Los pedidos recibidos antes de esta migración sumaron la cantidad pedida completa
+    op.execute("""
+        UPDATE detalle_pedidos_proveedor SET cantidad_recibida = cantidad
+        WHERE pedido_id IN (SELECT id FROM pedidos_proveedor WHERE estado = 'recibido')
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('detalle_pedidos_proveedor', schema=None) as batch_op:
+        batch_op.drop_column('cantidad_recibida')
@@ -0,0 +1,61 @@
+"""Libro de movimientos de inventario y snapshots diarios
+
+Revision ID: c7d92e4b1f08
+Revises: a41f7b3e6c20
+Create Date: 2026-10-19 18:02:47.118530
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d92e4b1f08'
+down_revision = 'a41f7b3e6c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inventario_movimientos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('producto_id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('referencia_tipo', sa.String(length=30), nullable=True),
+    sa.Column('referencia_id', sa.Integer(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('motivo', sa.String(length=255), nullable=True),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_inventario_movimientos_producto_fecha', 'inventario_movimientos', ['producto_id', 'fecha'])
+    op.create_index('ix_inventario_movimientos_fecha', 'inventario_movimientos', ['fecha'])
+
+    # Saldo inicial del stock existente: sin él, el libro y stock_en_fecha no suman el stock actual
+    op.execute(sa.text("""
+        INSERT INTO inventario_movimientos (producto_id, tipo, cantidad, referencia_tipo, referencia_id, motivo, fecha)
+        SELECT producto_id, 'inicial', cantidad, 'producto', producto_id, 'Saldo inicial (migración)', :fecha
+        FROM inventario
+        WHERE cantidad <> 0
+    """).bindparams(fecha=datetime.utcnow()))
+
+    op.create_table('inventario_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('producto_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['productos.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fecha', 'producto_id', name='uq_inventario_snapshots_fecha_producto')
+    )
+
+
+def downgrade():
+    op.drop_table('inventario_snapshots')
+    op.drop_index('ix_inventario_movimientos_fecha', table_name='inventario_movimientos')
+    op.drop_index('ix_inventario_movimientos_producto_fecha', table_name='inventario_movimientos')
+    op.drop_table('inventario_movimientos')
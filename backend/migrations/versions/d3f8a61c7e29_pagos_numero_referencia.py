@@ -0,0 +1,28 @@
+"""Índice por número de referencia para marcar en vivo pagos con referencia repetida
+
+Revision ID: d3f8a61c7e29
+Revises: 0b7d3e5f9a42
+Create Date: 2026-10-19 17:40:12.318204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f8a61c7e29'
+down_revision = '0b7d3e5f9a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ux_pagos_referencia_banco es parcial: no sirve para buscar pagos rechazados o marcados
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_pagos_numero_referencia', 'pagos', ['numero_referencia'], postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_pagos_numero_referencia', table_name='pagos', postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""Estado de los modelos de pronóstico de demanda por combo
+
+Revision ID: e5b18f3a7d64
+Revises: c7d92e4b1f08
+Create Date: 2026-10-19 18:51:09.463802
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b18f3a7d64'
+down_revision = 'c7d92e4b1f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pronosticos_combos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('combo_id', sa.Integer(), nullable=False),
+    sa.Column('alpha', sa.Float(), nullable=False),
+    sa.Column('nivel', sa.Float(), nullable=False),
+    sa.Column('estacionalidad', sa.JSON(), nullable=False),
+    sa.Column('error', sa.Float(), nullable=True),
+    sa.Column('error_media_movil', sa.Float(), nullable=True),
+    sa.Column('fecha_ajuste', sa.Date(), nullable=False),
+    sa.Column('fecha_ajuste_completo', sa.Date(), nullable=False),
+    sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['combo_id'], ['combos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('combo_id')
+    )
+
+
+def downgrade():
+    op.drop_table('pronosticos_combos')
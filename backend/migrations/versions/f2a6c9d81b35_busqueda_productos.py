@@ -0,0 +1,58 @@
+"""Búsqueda de productos con pg_trgm, unaccent y tsvector
+
+Revision ID: f2a6c9d81b35
+Revises: e5b18f3a7d64
+Create Date: 2026-10-19 19:24:37.650193
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6c9d81b35'
+down_revision = 'e5b18f3a7d64'
+branch_labels = None
+depends_on = None
+
+
+# Igual a app.services.busqueda.TEXTO_PRODUCTO sin prefijo de tabla
+TEXTO_PRODUCTO = (
+    "inmutable_unaccent(lower(coalesce(nombre, '') || ' ' || coalesce(categoria, '') "
+    "|| ' ' || coalesce(descripcion, '')))"
+)
+
+
+def upgrade():
+    # Solo PostgreSQL: en SQLite la búsqueda usa el índice en memoria de app.services.busqueda
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+
+    # unaccent() es STABLE; los índices de expresión requieren una función IMMUTABLE
+    op.execute("""
+        CREATE OR REPLACE FUNCTION inmutable_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_productos_busqueda_trgm '
+            f'ON productos USING gin ({TEXTO_PRODUCTO} gin_trgm_ops)'
+        )
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_productos_busqueda_tsv "
+            f"ON productos USING gin (to_tsvector('spanish', {TEXTO_PRODUCTO}))"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_productos_busqueda_tsv')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_productos_busqueda_trgm')
+    op.execute('DROP FUNCTION IF EXISTS inmutable_unaccent(text)')
@@ -7,11 +7,12 @@ from app.models.usuario import Usuario
 from app.models.proveedor import Proveedor
 from app.models.producto import Producto
 from app.models.inventario import Inventario
+from app.services.inventario import registrar_movimientos
 from app.models.combo import Combo, ComboProducto
 
 
-def seed_database():
-    app = create_app('development')
+def seed_database(app=None):
+    app = app or create_app('development')
     
     with app.app_context():
         print("Iniciando seed de la base de datos...")
@@ -139,6 +140,10 @@ def seed_database():
                     cantidad_minima=20
                 )
                 db.session.add(inv)
+                registrar_movimientos(
+                    {prod.id: inv.cantidad}, 'inicial', referencia_tipo='producto',
+                    referencia_id=prod.id, motivo='Saldo inicial (seed)'
+                )
             productos.append(prod)
         print("✓ Productos e inventario creados")
         
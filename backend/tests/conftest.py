@@ -0,0 +1,56 @@
+"""
+Fixtures de pruebas: una base SQLite temporal con seed.py más datos de seed-scale reducidos
+Ejecutar desde backend/: python -m pytest
+"""
+import os
+import tempfile
+import pytest
+
+_archivo_db = tempfile.NamedTemporaryFile(prefix='cecoalimentos-test-', suffix='.db', delete=False)
+_archivo_db.close()
+# config.py lee el entorno al importarse
+os.environ['DATABASE_URL'] = f'sqlite:///{_archivo_db.name}'
+os.environ.pop('REPLICA_DATABASE_URL', None)
+os.environ.pop('REPORTES_DATABASE_URL', None)
+
+from app import create_app, db  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    import seed
+    from app.services.seed_scale import generar
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed.seed_database(app)
+        generar(usuarios=2000, productos=300, combos=10, compras=12000, comentarios=3000,
+                pedidos=50, seed=7, log=lambda *_: None)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+    os.remove(_archivo_db.name)
+
+
+@pytest.fixture(autouse=True)
+def contexto(app):
+    """Un contexto de aplicación por prueba: el test client lo reutiliza en cada request, así
+    que `g` (el engine elegido por request) no debe pasar de una prueba a otra"""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def token(client, username, password):
+    respuesta = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f'Bearer {respuesta.json["access_token"]}'}
+
+
+@pytest.fixture
+def cobranza(client):
+    return token(client, 'cobranza', 'cobranza123')
@@ -0,0 +1,29 @@
+"""Regresión de índices: las consultas reales de las rutas no recorren tablas grandes completas"""
+from app import db
+from app.models.compra import Compra
+from app.utils.explain import verificar_planes
+
+MIN_FILAS = 1000
+
+
+def _fallas(app):
+    return [(endpoint, tablas) for endpoint, _, _, tablas in verificar_planes(app, min_filas=MIN_FILAS) if tablas]
+
+
+def test_rutas_usan_indices(app):
+    assert _fallas(app) == []
+
+
+def test_detecta_scan_sin_indice(app):
+    indices = [i for i in Compra.__table__.indexes if i.name.startswith('ix_compras_usuario_id')]
+    for indice in indices:
+        indice.drop(db.engine)
+    # pysqlite reutiliza sentencias EXPLAIN ya preparadas aunque cambie el esquema
+    db.engine.dispose()
+    try:
+        fallas = _fallas(app)
+    finally:
+        for indice in indices:
+            indice.create(db.engine)
+        db.engine.dispose()
+    assert ('pagos.mis-compras', ['compras']) in fallas
@@ -0,0 +1,107 @@
+"""Idempotency-Key en POST /api/pagos/comprar: repetición, conflicto, espera y concurrencia"""
+import threading
+from datetime import datetime, timedelta
+from uuid import uuid4
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.combo import Combo
+from app.models.compra import Compra
+from app.models.idempotencia import ClaveIdempotencia
+from app.models.usuario import Usuario
+from app.utils.idempotencia import _reservar_o_esperar
+
+
+@pytest.fixture
+def cliente_nuevo(app):
+    """Cliente sin compras abiertas: cada prueba puede comprar una vez"""
+    sufijo = uuid4().hex[:8]
+    usuario = Usuario(nombre='Prueba', apellido='Idempotencia', cedula=f'V-{sufijo}',
+                      email=f'{sufijo}@prueba.com', username=f'idem_{sufijo}', rol='cliente')
+    usuario.set_password('prueba123')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario.id, {'Authorization': f'Bearer {create_access_token(identity=str(usuario.id))}'}
+
+
+@pytest.fixture
+def combo_id(app):
+    return Combo.query.filter_by(activo=True, disponible=True).order_by(Combo.id).first().id
+
+
+def _compras(usuario_id):
+    return Compra.query.filter_by(usuario_id=usuario_id).count()
+
+
+def test_repeticion_devuelve_la_respuesta_guardada(client, cliente_nuevo, combo_id):
+    usuario_id, headers = cliente_nuevo
+    headers = {**headers, 'Idempotency-Key': uuid4().hex}
+    primera = client.post('/api/pagos/comprar', json={'combo_id': combo_id}, headers=headers)
+    segunda = client.post('/api/pagos/comprar', json={'combo_id': combo_id}, headers=headers)
+
+    assert primera.status_code == segunda.status_code == 201
+    assert 'Idempotent-Replayed' not in primera.headers
+    assert segunda.headers['Idempotent-Replayed'] == 'true'
+    assert segunda.json == primera.json
+    assert _compras(usuario_id) == 1
+
+
+def test_misma_clave_con_otro_contenido(client, cliente_nuevo, combo_id):
+    usuario_id, headers = cliente_nuevo
+    headers = {**headers, 'Idempotency-Key': uuid4().hex}
+    client.post('/api/pagos/comprar', json={'combo_id': combo_id}, headers=headers)
+    respuesta = client.post('/api/pagos/comprar', json={'combo_id': combo_id + 1}, headers=headers)
+
+    assert respuesta.status_code == 422
+    assert _compras(usuario_id) == 1
+
+
+def test_clave_en_proceso(app, client, cliente_nuevo, combo_id, monkeypatch):
+    usuario_id, headers = cliente_nuevo
+    clave = uuid4().hex
+    ahora = datetime.utcnow()
+    monkeypatch.setitem(app.config, 'IDEMPOTENCY_WAIT_SECONDS', 0.3)
+    primera = client.post('/api/pagos/comprar', json={'combo_id': combo_id},
+                          headers={**headers, 'Idempotency-Key': uuid4().hex})
+    # Otro worker tiene la misma clave tomada y sigue trabajando
+    ClaveIdempotencia.query.filter_by(usuario_id=usuario_id).update({
+        'clave': clave, 'estado': 'en_proceso', 'fecha_creacion': ahora,
+        'fecha_expiracion': ahora + timedelta(hours=1)
+    })
+    db.session.commit()
+
+    respuesta = client.post('/api/pagos/comprar', json={'combo_id': combo_id},
+                            headers={**headers, 'Idempotency-Key': clave})
+    assert primera.status_code == 201
+    assert respuesta.status_code == 409
+    assert respuesta.headers['Retry-After'] == '1'
+
+
+def test_requests_concurrentes_ejecutan_una_vez(app, cliente_nuevo, combo_id):
+    usuario_id, headers = cliente_nuevo
+    headers = {**headers, 'Idempotency-Key': uuid4().hex}
+    barrera = threading.Barrier(2)
+    respuestas = []
+
+    def enviar():
+        cliente = app.test_client()
+        barrera.wait()
+        respuestas.append(cliente.post('/api/pagos/comprar', json={'combo_id': combo_id}, headers=headers))
+
+    hilos = [threading.Thread(target=enviar) for _ in range(2)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert sorted(r.status_code for r in respuestas) == [201, 201]
+    assert sum(1 for r in respuestas if 'Idempotent-Replayed' in r.headers) == 1
+    assert _compras(usuario_id) == 1
+
+
+def test_otro_integrity_error_se_propaga(app):
+    # endpoint NULL viola NOT NULL, no la restricción de la clave: no debe reintentar para siempre
+    with app.test_request_context():
+        with pytest.raises(IntegrityError):
+            _reservar_o_esperar(uuid4().hex, 1, None, 'huella')
@@ -0,0 +1,41 @@
+"""POST /api/usuarios/importar: límite de filas del camino web"""
+import io
+from uuid import uuid4
+import pytest
+from app.models.usuario import Usuario
+from tests.conftest import token
+
+
+@pytest.fixture
+def admin(client):
+    return token(client, 'admin', 'admin123')
+
+
+def _csv(filas):
+    sufijo = uuid4().hex[:8]
+    lineas = ['nombre,apellido,cedula,email,username,password'] + [
+        f'Miembro,{i},V-{sufijo}{i},{sufijo}{i}@prueba.com,imp_{sufijo}_{i},clave123' for i in range(filas)
+    ]
+    return sufijo, io.BytesIO('\n'.join(lineas).encode())
+
+
+def test_archivo_sobre_el_limite_se_rechaza_sin_importar(app, client, admin, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMPORTACION_MAX_FILAS_WEB', 2)
+    sufijo, archivo = _csv(3)
+    respuesta = client.post('/api/usuarios/importar', data={'archivo': (archivo, 'miembros.csv')},
+                            headers=admin, content_type='multipart/form-data')
+
+    assert respuesta.status_code == 400
+    assert 'flask importar-usuarios' in respuesta.json['error']
+    assert Usuario.query.filter(Usuario.username.like(f'imp_{sufijo}_%')).count() == 0
+
+
+def test_archivo_dentro_del_limite(app, client, admin, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMPORTACION_MAX_FILAS_WEB', 2)
+    sufijo, archivo = _csv(2)
+    respuesta = client.post('/api/usuarios/importar', data={'archivo': (archivo, 'miembros.csv')},
+                            headers=admin, content_type='multipart/form-data')
+
+    assert respuesta.status_code == 200
+    assert respuesta.json['creados'] == 2
+    assert Usuario.query.filter(Usuario.username.like(f'imp_{sufijo}_%')).count() == 2
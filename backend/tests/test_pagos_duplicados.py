@@ -0,0 +1,48 @@
+"""Aprobación de pagos con la misma referencia: se aprueba el original y se rechaza la copia"""
+from uuid import uuid4
+import pytest
+from app import db
+from app.models.combo import Combo
+from app.models.compra import Compra
+from app.models.pago import Pago
+from app.models.usuario import Usuario
+
+
+@pytest.fixture
+def original_y_copia(app):
+    """Dos pagos pendientes con la misma referencia y banco; el segundo marcado como copia"""
+    usuario = Usuario.query.filter_by(username='cliente1').one()
+    combo = Combo.query.filter_by(activo=True).order_by(Combo.id).first()
+    referencia = uuid4().hex[:20]
+    pagos = []
+    for duplicado_de in (None, 'original'):
+        compra = Compra(usuario_id=usuario.id, combo_id=combo.id, estado='pago_verificando',
+                        monto_total=combo.precio_total)
+        db.session.add(compra)
+        db.session.flush()
+        pago = Pago(compra_id=compra.id, metodo_pago='transferencia', numero_referencia=referencia,
+                    banco_origen='Banco de Venezuela', monto=combo.precio_total, estado='pendiente',
+                    duplicado_de=pagos[0].id if duplicado_de else None)
+        db.session.add(pago)
+        db.session.flush()
+        pagos.append(pago)
+    db.session.commit()
+    return pagos[0].id, pagos[1].id
+
+
+def test_aprobar_copia_rechazado(client, cobranza, original_y_copia):
+    original, copia = original_y_copia
+    respuesta = client.post(f'/api/pagos/{copia}/verificar', json={'accion': 'aprobar'}, headers=cobranza)
+    assert respuesta.status_code == 400
+    assert respuesta.json['error'] == f'Este pago repite la referencia del pago #{original}'
+
+
+def test_aprobar_original(client, cobranza, original_y_copia):
+    original, copia = original_y_copia
+    respuesta = client.post(f'/api/pagos/{original}/verificar', json={'accion': 'aprobar'}, headers=cobranza)
+    assert respuesta.status_code == 200
+    assert respuesta.json['pago']['estado'] == 'verificado'
+
+    # Con el original verificado la copia sigue bloqueada
+    respuesta = client.post(f'/api/pagos/{copia}/verificar', json={'accion': 'aprobar'}, headers=cobranza)
+    assert respuesta.status_code == 400
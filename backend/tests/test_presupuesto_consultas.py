@@ -0,0 +1,49 @@
+"""Presupuesto de consultas por endpoint: las rutas corregidas de N+1 no vuelven a escalar con las filas"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func
+from app import db
+from app.models.compra import Compra
+from app.routes.pagos import resumen_compras_cache
+from app.utils.query_stats import assert_max_queries
+from tests.conftest import token
+
+
+@pytest.fixture
+def cliente_con_compras(app):
+    usuario_id = db.session.query(Compra.usuario_id).group_by(Compra.usuario_id).order_by(
+        func.count(Compra.id).desc()
+    ).first()[0]
+    return {'Authorization': f'Bearer {create_access_token(identity=str(usuario_id))}'}
+
+
+@pytest.mark.parametrize('per_page', [5, 100])
+def test_cola_pagos(client, cobranza, per_page):
+    with assert_max_queries(2):
+        respuesta = client.get(f'/api/pagos/cola?per_page={per_page}', headers=cobranza)
+    assert respuesta.status_code == 200
+    assert respuesta.json['pagos']
+
+
+@pytest.mark.parametrize('per_page', [5, 100])
+def test_mis_compras(client, cliente_con_compras, per_page):
+    with assert_max_queries(2):
+        respuesta = client.get(f'/api/pagos/mis-compras?per_page={per_page}', headers=cliente_con_compras)
+    assert respuesta.status_code == 200
+    assert respuesta.json['compras']
+
+
+def test_resumen_mis_compras(client, cliente_con_compras):
+    resumen_compras_cache.invalidar()
+    with assert_max_queries(2):
+        respuesta = client.get('/api/pagos/mis-compras/resumen', headers=cliente_con_compras)
+    assert respuesta.status_code == 200
+
+
+
+@pytest.mark.parametrize('ruta, maximo', [('/api/reportes/inventario', 2), ('/api/reportes/semanal', 4)])
+def test_reportes_con_inventario(client, ruta, maximo):
+    admin = token(client, 'admin', 'admin123')
+    with assert_max_queries(maximo):
+        respuesta = client.get(ruta, headers=admin)
+    assert respuesta.status_code == 200
@@ -10,8 +10,6 @@ CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 -- Configurar timezone
 SET timezone = 'America/Caracas';
 
--- Crear índices adicionales para optimización (se ejecutarán después de las migraciones)
--- CREATE INDEX IF NOT EXISTS idx_usuarios_cedula ON usuarios(cedula);
--- CREATE INDEX IF NOT EXISTS idx_usuarios_email ON usuarios(email);
--- CREATE INDEX IF NOT EXISTS idx_pagos_estado ON pagos(estado);
--- CREATE INDEX IF NOT EXISTS idx_retiros_fecha ON retiros(fecha_retiro_programada);
+-- Los índices de optimización se crean en las migraciones de Alembic
+-- (backend/migrations/versions/3b7e21c9d4a1_indices_consultas_frecuentes.py).
+-- cedula, email y username ya están indexados por sus restricciones UNIQUE.
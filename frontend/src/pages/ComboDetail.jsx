@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import api from '../services/api'
+import api, { nuevaClaveIdempotencia } from '../services/api'
 import { ShoppingCart, ArrowLeft, Check, Package } from 'lucide-react'
 
 const ComboDetail = () => {
@@ -33,7 +33,9 @@ const ComboDetail = () => {
     setError('')
 
     try {
-      const response = await api.post('/api/pagos/comprar', { combo_id: parseInt(id) })
+      const response = await api.post('/api/pagos/comprar', { combo_id: parseInt(id) }, {
+        headers: { 'Idempotency-Key': nuevaClaveIdempotencia() }
+      })
       setPurchaseResult(response.data)
     } catch (error) {
       setError(error.response?.data?.error || 'Error al realizar la compra')
@@ -6,19 +6,21 @@ import { ShoppingBag, Package, Clock, CheckCircle } from 'lucide-react'
 
 const Dashboard = () => {
   const { user, isAdmin } = useAuth()
-  const [stats, setStats] = useState({ combos: 0, compras: [] })
+  const [stats, setStats] = useState({ combos: 0, compras: [], porEstado: {} })
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [combosRes, comprasRes] = await Promise.all([
+        const [combosRes, comprasRes, resumenRes] = await Promise.all([
           api.get('/api/combos/'),
-          api.get('/api/pagos/mis-compras')
+          api.get('/api/pagos/mis-compras?per_page=3'),
+          api.get('/api/pagos/mis-compras/resumen')
         ])
         setStats({
           combos: combosRes.data.combos?.length || 0,
-          compras: comprasRes.data.compras || []
+          compras: comprasRes.data.compras || [],
+          porEstado: resumenRes.data.por_estado || {}
         })
       } catch (error) {
         console.error('Error fetching dashboard data:', error)
@@ -29,9 +31,9 @@ const Dashboard = () => {
     fetchData()
   }, [])
 
-  const pendientes = stats.compras.filter(c => c.estado === 'pendiente_pago').length
-  const verificando = stats.compras.filter(c => c.estado === 'pago_verificando').length
-  const completadas = stats.compras.filter(c => c.estado === 'completada').length
+  const pendientes = stats.porEstado.pendiente_pago || 0
+  const verificando = stats.porEstado.pago_verificando || 0
+  const completadas = stats.porEstado.retirado || 0
 
   if (loading) {
     return <div className="flex items-center justify-center h-64">Cargando...</div>
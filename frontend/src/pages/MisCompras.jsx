@@ -1,9 +1,11 @@
 import { useState, useEffect } from 'react'
-import api from '../services/api'
+import api, { nuevaClaveIdempotencia } from '../services/api'
 import { Package, CreditCard, Clock, CheckCircle, XCircle } from 'lucide-react'
 
 const MisCompras = () => {
   const [compras, setCompras] = useState([])
+  const [page, setPage] = useState(1)
+  const [pages, setPages] = useState(1)
   const [loading, setLoading] = useState(true)
   const [selectedCompra, setSelectedCompra] = useState(null)
   const [showPaymentModal, setShowPaymentModal] = useState(false)
@@ -21,10 +23,13 @@ const MisCompras = () => {
     fetchCompras()
   }, [])
 
-  const fetchCompras = async () => {
+  const fetchCompras = async (pagina = 1) => {
     try {
-      const response = await api.get('/api/pagos/mis-compras')
-      setCompras(response.data.compras || [])
+      const response = await api.get(`/api/pagos/mis-compras?page=${pagina}`)
+      const nuevas = response.data.compras || []
+      setCompras(pagina === 1 ? nuevas : [...compras, ...nuevas])
+      setPage(pagina)
+      setPages(response.data.pages || 1)
     } catch (error) {
       console.error('Error fetching compras:', error)
     } finally {
@@ -42,6 +47,8 @@ const MisCompras = () => {
         compra_id: selectedCompra.id,
         ...paymentData,
         monto: parseFloat(paymentData.monto)
+      }, {
+        headers: { 'Idempotency-Key': nuevaClaveIdempotencia() }
       })
       setMessage({ type: 'success', text: 'Pago registrado. Pendiente de verificación.' })
       setShowPaymentModal(false)
@@ -155,6 +162,11 @@ const MisCompras = () => {
               )}
             </div>
           ))}
+          {page < pages && (
+            <div className="text-center">
+              <button onClick={() => fetchCompras(page + 1)} className="btn-secondary">Cargar más</button>
+            </div>
+          )}
         </div>
       )}
 
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import api from '../../services/api'
-import { ShoppingBag, Plus, Edit, Trash2, X, ToggleLeft, ToggleRight } from 'lucide-react'
+import { ShoppingBag, Plus, Edit, Trash2, X, ToggleLeft, ToggleRight, DollarSign } from 'lucide-react'
 
 const GestionCombos = () => {
   const [combos, setCombos] = useState([])
@@ -13,6 +13,8 @@ const GestionCombos = () => {
   })
   const [selectedProduct, setSelectedProduct] = useState({ producto_id: '', cantidad: 1 })
   const [message, setMessage] = useState({ type: '', text: '' })
+  const [precios, setPrecios] = useState(null)
+  const [margenObjetivo, setMargenObjetivo] = useState(20)
 
   useEffect(() => { fetchData() }, [])
 
@@ -120,6 +122,31 @@ const GestionCombos = () => {
     })
   }
 
+  const fetchPrecios = async (margen = margenObjetivo) => {
+    try {
+      const res = await api.get('/api/combos/precios', { params: { margen_objetivo: margen / 100 } })
+      setPrecios(res.data)
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error al analizar precios' })
+    }
+  }
+
+  const aplicarSugeridos = async () => {
+    const cambios = precios.combos
+      .filter(c => c.activo && (c.bajo_costo || c.bajo_objetivo) && c.precio_sugerido > 0)
+      .map(c => ({ combo_id: c.combo_id, precio_total: c.precio_sugerido }))
+    if (!cambios.length) return
+    if (!confirm(`¿Aplicar el precio sugerido a ${cambios.length} combo(s) bajo el margen objetivo?`)) return
+    try {
+      const res = await api.put('/api/combos/precios', { precios: cambios })
+      setMessage({ type: 'success', text: res.data.message })
+      fetchData()
+      fetchPrecios()
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error al aplicar precios' })
+    }
+  }
+
   const resetForm = () => {
     setEditing(null)
     setFormData({ nombre: '', descripcion: '', precio_total: '', tipo: 'mixto', productos: [] })
@@ -132,9 +159,14 @@ const GestionCombos = () => {
           <h1 className="text-2xl font-bold text-gray-900 dark:text-white">Gestión de Combos</h1>
           <p className="text-gray-500 dark:text-gray-400">Crear y administrar combos de productos</p>
         </div>
-        <button onClick={() => { resetForm(); setShowModal(true) }} className="btn-primary flex items-center space-x-2">
-          <Plus size={20} /><span>Nuevo Combo</span>
-        </button>
+        <div className="flex gap-2">
+          <button onClick={() => (precios ? setPrecios(null) : fetchPrecios())} className="btn-secondary flex items-center space-x-2">
+            <DollarSign size={20} /><span>Márgenes</span>
+          </button>
+          <button onClick={() => { resetForm(); setShowModal(true) }} className="btn-primary flex items-center space-x-2">
+            <Plus size={20} /><span>Nuevo Combo</span>
+          </button>
+        </div>
       </div>
 
       {message.text && (
@@ -143,6 +175,53 @@ const GestionCombos = () => {
         </div>
       )}
 
+      {precios && (
+        <div className="card space-y-4">
+          <div className="flex flex-wrap items-center gap-4">
+            <h2 className="font-semibold flex-1">Márgenes de combos</h2>
+            <label className="text-sm flex items-center gap-2">
+              Margen objetivo (%)
+              <input
+                type="number" min="0" max="95" value={margenObjetivo}
+                onChange={(e) => setMargenObjetivo(e.target.value)}
+                onBlur={() => fetchPrecios()}
+                className="input w-20"
+              />
+            </label>
+            <button onClick={aplicarSugeridos} className="btn-primary text-sm" disabled={!precios.resumen.bajo_objetivo}>
+              Aplicar sugeridos ({precios.resumen.bajo_objetivo})
+            </button>
+          </div>
+          <p className="text-sm text-gray-500 dark:text-gray-400">
+            {precios.resumen.bajo_costo} combo(s) activo(s) bajo costo · {precios.resumen.bajo_objetivo} bajo el objetivo
+            {precios.resumen.margen_promedio !== null && ` · margen promedio ${(precios.resumen.margen_promedio * 100).toFixed(1)}%`}
+          </p>
+          <div className="overflow-x-auto">
+            <table className="w-full text-sm">
+              <thead>
+                <tr className="text-left text-gray-500 dark:text-gray-400">
+                  <th className="py-2">Combo</th><th>Costo</th><th>Valor lista</th><th>Precio</th><th>Margen</th><th>Sugerido</th>
+                </tr>
+              </thead>
+              <tbody>
+                {precios.combos.map((c) => (
+                  <tr key={c.combo_id} className={`border-t dark:border-gray-700 ${c.activo ? '' : 'opacity-50'}`}>
+                    <td className="py-2">{c.combo_nombre}</td>
+                    <td>${c.costo.toFixed(2)}</td>
+                    <td>${c.valor_lista.toFixed(2)}</td>
+                    <td>${c.precio_total.toFixed(2)}</td>
+                    <td className={c.bajo_costo ? 'text-red-600 font-semibold' : c.bajo_objetivo ? 'text-yellow-600' : 'text-green-600'}>
+                      {c.margen === null ? '-' : `${(c.margen * 100).toFixed(1)}%`}
+                    </td>
+                    <td>${c.precio_sugerido.toFixed(2)}</td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </div>
+        </div>
+      )}
+
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
         {combos.map((combo) => (
           <div key={combo.id} className="card">
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import api from '../../services/api'
+import api, { nuevaClaveIdempotencia } from '../../services/api'
 import { CreditCard, Check, X, Eye } from 'lucide-react'
 
 const Pagos = () => {
@@ -7,13 +7,21 @@ const Pagos = () => {
   const [loading, setLoading] = useState(true)
   const [selectedPago, setSelectedPago] = useState(null)
   const [message, setMessage] = useState({ type: '', text: '' })
+  const [filters, setFilters] = useState({ metodo_pago: '', banco: '', monto_min: '', monto_max: '', orden: 'antiguos' })
+  const [page, setPage] = useState(1)
+  const [pages, setPages] = useState(1)
+  const [total, setTotal] = useState(0)
 
-  useEffect(() => { fetchPagos() }, [])
+  useEffect(() => { fetchPagos() }, [filters, page])
 
   const fetchPagos = async () => {
     try {
-      const response = await api.get('/api/pagos/pendientes')
+      const params = new URLSearchParams({ page, per_page: 20 })
+      Object.entries(filters).forEach(([key, value]) => { if (value) params.append(key, value) })
+      const response = await api.get(`/api/pagos/cola?${params}`)
       setPagos(response.data.pagos || [])
+      setPages(response.data.pages || 1)
+      setTotal(response.data.total || 0)
     } catch (error) {
       console.error('Error:', error)
     } finally {
@@ -23,7 +31,9 @@ const Pagos = () => {
 
   const handleVerify = async (id, accion) => {
     try {
-      await api.post(`/api/pagos/${id}/verificar`, { accion })
+      await api.post(`/api/pagos/${id}/verificar`, { accion }, {
+        headers: { 'Idempotency-Key': nuevaClaveIdempotencia() }
+      })
       fetchPagos()
       setSelectedPago(null)
       setMessage({ type: 'success', text: `Pago ${accion === 'aprobar' ? 'aprobado' : 'rechazado'}` })
@@ -55,6 +65,22 @@ const Pagos = () => {
       )}
 
       <div className="card">
+        <div className="flex flex-wrap gap-4 mb-6">
+          <select value={filters.metodo_pago} onChange={(e) => { setPage(1); setFilters({...filters, metodo_pago: e.target.value}) }} className="input w-auto">
+            <option value="">Todos los métodos</option>
+            <option value="pago_movil">Pago móvil</option>
+            <option value="transferencia">Transferencia</option>
+          </select>
+          <input type="text" placeholder="Banco" value={filters.banco} onChange={(e) => { setPage(1); setFilters({...filters, banco: e.target.value}) }} className="input w-auto" />
+          <input type="number" step="0.01" placeholder="Monto mín." value={filters.monto_min} onChange={(e) => { setPage(1); setFilters({...filters, monto_min: e.target.value}) }} className="input w-32" />
+          <input type="number" step="0.01" placeholder="Monto máx." value={filters.monto_max} onChange={(e) => { setPage(1); setFilters({...filters, monto_max: e.target.value}) }} className="input w-32" />
+          <select value={filters.orden} onChange={(e) => { setPage(1); setFilters({...filters, orden: e.target.value}) }} className="input w-auto">
+            <option value="antiguos">Más antiguos primero</option>
+            <option value="recientes">Más recientes primero</option>
+          </select>
+          <span className="self-center text-sm text-gray-500 dark:text-gray-400">{total} en cola</span>
+        </div>
+
         {loading ? <div className="text-center py-8">Cargando...</div> : pagos.length === 0 ? (
           <div className="text-center py-12">
             <CreditCard size={48} className="mx-auto text-gray-300 mb-4" />
@@ -66,7 +92,8 @@ const Pagos = () => {
               <thead>
                 <tr className="border-b">
                   <th className="text-left py-3 px-4 font-medium text-gray-500">ID</th>
-                  <th className="text-left py-3 px-4 font-medium text-gray-500">Compra</th>
+                  <th className="text-left py-3 px-4 font-medium text-gray-500">Comprador</th>
+                  <th className="text-left py-3 px-4 font-medium text-gray-500">Combo</th>
                   <th className="text-left py-3 px-4 font-medium text-gray-500">Método</th>
                   <th className="text-left py-3 px-4 font-medium text-gray-500">Referencia</th>
                   <th className="text-right py-3 px-4 font-medium text-gray-500">Monto</th>
@@ -78,11 +105,25 @@ const Pagos = () => {
                 {pagos.map((pago) => (
                   <tr key={pago.id} className="border-b border-gray-200 dark:border-gray-700 hover:bg-gray-50 dark:hover:bg-gray-800">
                     <td className="py-3 px-4 font-medium">#{pago.id}</td>
-                    <td className="py-3 px-4">Compra #{pago.compra_id}</td>
+                    <td className="py-3 px-4">
+                      <p className="font-medium">{pago.usuario?.nombre} {pago.usuario?.apellido}</p>
+                      <p className="text-xs text-gray-500 dark:text-gray-400">
+                        {pago.usuario?.cedula}
+                        {pago.usuario?.tipo_usuario !== 'regular' && <span className="badge badge-warning ml-2">Prioritario</span>}
+                      </p>
+                    </td>
+                    <td className="py-3 px-4">{pago.combo?.nombre}</td>
                     <td className="py-3 px-4">
                       <span className="badge badge-info capitalize">{pago.metodo_pago?.replace('_', ' ')}</span>
                     </td>
-                    <td className="py-3 px-4 font-mono text-sm">{pago.numero_referencia}</td>
+                    <td className="py-3 px-4 font-mono text-sm">
+                      {pago.numero_referencia}
+                      {pago.posible_duplicado && (
+                        <span className="badge badge-danger ml-2 font-sans" title={`Misma referencia que el pago #${pago.duplicado_de ?? pago.referencia_repetida_en}`}>
+                          Posible duplicado
+                        </span>
+                      )}
+                    </td>
                     <td className="py-3 px-4 text-right font-bold">${parseFloat(pago.monto).toFixed(2)}</td>
                     <td className="py-3 px-4 text-gray-600 dark:text-gray-300">
                       {new Date(pago.fecha_pago).toLocaleDateString('es-VE')}
@@ -102,6 +143,13 @@ const Pagos = () => {
                 ))}
               </tbody>
             </table>
+            {pages > 1 && (
+              <div className="flex items-center justify-between pt-4">
+                <button onClick={() => setPage(page - 1)} disabled={page <= 1} className="btn-secondary disabled:opacity-50">Anterior</button>
+                <span className="text-sm text-gray-500 dark:text-gray-400">Página {page} de {pages}</span>
+                <button onClick={() => setPage(page + 1)} disabled={page >= pages} className="btn-secondary disabled:opacity-50">Siguiente</button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -119,7 +167,7 @@ const Pagos = () => {
               <div className="grid grid-cols-2 gap-4 text-sm">
                 <div>
                   <span className="text-gray-500 dark:text-gray-400">Compra:</span>
-                  <p className="font-medium">#{selectedPago.compra_id}</p>
+                  <p className="font-medium">#{selectedPago.compra_id} · {selectedPago.combo?.nombre}</p>
                 </div>
                 <div>
                   <span className="text-gray-500 dark:text-gray-400">Monto:</span>
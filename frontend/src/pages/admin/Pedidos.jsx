@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import api from '../../services/api'
-import { FileText, Plus, Eye, X } from 'lucide-react'
+import { FileText, Plus, Eye, X, RefreshCw } from 'lucide-react'
 
 const Pedidos = () => {
   const [pedidos, setPedidos] = useState([])
@@ -9,10 +9,12 @@ const Pedidos = () => {
   const [loading, setLoading] = useState(true)
   const [showModal, setShowModal] = useState(false)
   const [showDetail, setShowDetail] = useState(null)
+  const [recepcion, setRecepcion] = useState(null)
   const [formData, setFormData] = useState({
     proveedor_id: '', notas: '', detalles: []
   })
   const [selectedProduct, setSelectedProduct] = useState({ producto_id: '', cantidad: 1 })
+  const [archivoCsv, setArchivoCsv] = useState(null)
   const [message, setMessage] = useState({ type: '', text: '' })
 
   const productosFiltrados = formData.proveedor_id
@@ -62,12 +64,71 @@ const Pedidos = () => {
     }
   }
 
+  const handleCsvSubmit = async () => {
+    if (!formData.proveedor_id || !archivoCsv) {
+      setMessage({ type: 'error', text: 'Seleccione el proveedor y el archivo CSV' })
+      return
+    }
+    const datos = new FormData()
+    datos.append('archivo', archivoCsv)
+    datos.append('proveedor_id', formData.proveedor_id)
+    datos.append('notas', formData.notas)
+    try {
+      await api.post('/api/pedidos/csv', datos, {
+        headers: { 'Content-Type': 'multipart/form-data' }
+      })
+      setShowModal(false)
+      resetForm()
+      fetchData()
+      setMessage({ type: 'success', text: 'Pedido creado desde CSV' })
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error' })
+    }
+  }
+
+  const handlePlanificar = async () => {
+    if (!window.confirm('Se reemplazarán los borradores existentes por un nuevo plan de reposición. ¿Continuar?')) return
+    try {
+      const res = await api.post('/api/pedidos/reposicion')
+      fetchData()
+      setMessage({ type: 'success', text: res.data.message })
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error' })
+    }
+  }
+
   const handleStatusChange = async (id, estado) => {
+    if (estado === 'recibido') {
+      const pedido = pedidos.find(p => p.id === id)
+      setRecepcion({
+        pedido,
+        cantidades: Object.fromEntries((pedido.detalles || []).map(d => [d.id, d.cantidad]))
+      })
+      return
+    }
     try {
       await api.put(`/api/pedidos/${id}/estado`, { estado })
       fetchData()
     } catch (error) {
-      setMessage({ type: 'error', text: 'Error' })
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error' })
+    }
+  }
+
+  const handleRecepcionSubmit = async (e) => {
+    e.preventDefault()
+    try {
+      await api.put(`/api/pedidos/${recepcion.pedido.id}/estado`, {
+        estado: 'recibido',
+        recepcion: Object.entries(recepcion.cantidades).map(([detalle_id, cantidad]) => ({
+          detalle_id: parseInt(detalle_id),
+          cantidad_recibida: parseInt(cantidad) || 0
+        }))
+      })
+      setRecepcion(null)
+      fetchData()
+      setMessage({ type: 'success', text: 'Pedido recibido e inventario actualizado' })
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error' })
     }
   }
 
@@ -103,10 +164,12 @@ const Pedidos = () => {
 
   const resetForm = () => {
     setFormData({ proveedor_id: '', notas: '', detalles: [] })
+    setArchivoCsv(null)
   }
 
   const getStatusBadge = (estado) => {
     const classes = {
+      'borrador': 'badge-info',
       'pendiente': 'badge-warning',
       'enviado': 'badge-info',
       'recibido': 'badge-success',
@@ -122,9 +185,14 @@ const Pedidos = () => {
           <h1 className="text-2xl font-bold text-gray-900 dark:text-white">Pedidos a Proveedores</h1>
           <p className="text-gray-500 dark:text-gray-400">Gestión de órdenes de compra</p>
         </div>
-        <button onClick={() => { resetForm(); setShowModal(true) }} className="btn-primary flex items-center space-x-2">
-          <Plus size={20} /><span>Nuevo Pedido</span>
-        </button>
+        <div className="flex gap-2">
+          <button onClick={handlePlanificar} className="btn-secondary flex items-center space-x-2">
+            <RefreshCw size={20} /><span>Planificar Reposición</span>
+          </button>
+          <button onClick={() => { resetForm(); setShowModal(true) }} className="btn-primary flex items-center space-x-2">
+            <Plus size={20} /><span>Nuevo Pedido</span>
+          </button>
+        </div>
       </div>
 
       {message.text && (
@@ -160,8 +228,10 @@ const Pedidos = () => {
                       <select
                         value={pedido.estado}
                         onChange={(e) => handleStatusChange(pedido.id, e.target.value)}
+                        disabled={pedido.estado === 'recibido'}
                         className={`text-xs px-2 py-1 rounded-full border-0 ${getStatusBadge(pedido.estado)}`}
                       >
+                        {pedido.estado === 'borrador' && <option value="borrador">Borrador</option>}
                         <option value="pendiente">Pendiente</option>
                         <option value="enviado">Enviado</option>
                         <option value="recibido">Recibido</option>
@@ -256,6 +326,23 @@ const Pedidos = () => {
                 )}
               </div>
 
+              <div className="border-t pt-4">
+                <label className="block text-sm font-medium mb-2">O cargar desde CSV</label>
+                <div className="flex gap-2">
+                  <input
+                    type="file"
+                    accept=".csv,text/csv"
+                    onChange={(e) => setArchivoCsv(e.target.files[0] || null)}
+                    className="input flex-1"
+                    disabled={!formData.proveedor_id}
+                  />
+                  <button type="button" onClick={handleCsvSubmit} className="btn-secondary" disabled={!archivoCsv}>Cargar CSV</button>
+                </div>
+                <p className="text-xs text-gray-500 dark:text-gray-400 mt-1">
+                  Columnas: producto_id, cantidad. Las líneas repetidas se suman.
+                </p>
+              </div>
+
               <div className="flex space-x-3 pt-4">
                 <button type="submit" className="btn-primary flex-1">Crear Pedido</button>
                 <button type="button" onClick={() => setShowModal(false)} className="btn-secondary flex-1">Cancelar</button>
@@ -265,6 +352,45 @@ const Pedidos = () => {
         </div>
       )}
 
+      {/* Receipt Modal */}
+      {recepcion && (
+        <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50 p-4">
+          <div className="bg-white dark:bg-gray-900 rounded-xl max-w-lg w-full p-6 max-h-[90vh] overflow-y-auto">
+            <div className="flex items-center justify-between mb-4">
+              <h2 className="text-xl font-bold text-gray-900 dark:text-white">Recibir Pedido #{recepcion.pedido.id}</h2>
+              <button onClick={() => setRecepcion(null)}><X size={24} /></button>
+            </div>
+
+            <form onSubmit={handleRecepcionSubmit} className="space-y-4">
+              <p className="text-sm text-gray-500 dark:text-gray-400">
+                Indique la cantidad que llegó de cada producto. Se sumará al inventario y el pedido no podrá cambiar de estado.
+              </p>
+              <div className="space-y-2">
+                {(recepcion.pedido.detalles || []).map((d) => (
+                  <div key={d.id} className="flex items-center justify-between bg-gray-50 dark:bg-gray-800 p-2 rounded">
+                    <span>{d.producto_nombre} <span className="text-gray-500 dark:text-gray-400">(pedido {d.cantidad})</span></span>
+                    <input
+                      type="number"
+                      min="0"
+                      value={recepcion.cantidades[d.id]}
+                      onChange={(e) => setRecepcion({
+                        ...recepcion,
+                        cantidades: { ...recepcion.cantidades, [d.id]: e.target.value }
+                      })}
+                      className="input w-24"
+                    />
+                  </div>
+                ))}
+              </div>
+              <div className="flex space-x-3 pt-4">
+                <button type="submit" className="btn-primary flex-1">Confirmar Recepción</button>
+                <button type="button" onClick={() => setRecepcion(null)} className="btn-secondary flex-1">Cancelar</button>
+              </div>
+            </form>
+          </div>
+        </div>
+      )}
+
       {/* Detail Modal */}
       {showDetail && (
         <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50 p-4">
@@ -288,7 +414,12 @@ const Pedidos = () => {
                   <div className="space-y-2">
                     {showDetail.detalles.map((d, i) => (
                       <div key={i} className="flex justify-between bg-gray-50 dark:bg-gray-800 p-2 rounded text-sm">
-                        <span>{d.producto_nombre} x{d.cantidad}</span>
+                        <span>
+                          {d.producto_nombre} x{d.cantidad}
+                          {d.cantidad_recibida !== null && d.cantidad_recibida !== undefined && d.cantidad_recibida !== d.cantidad && (
+                            <span className="text-xs text-yellow-600 dark:text-yellow-400 ml-2">(recibido {d.cantidad_recibida})</span>
+                          )}
+                        </span>
                         <span>${parseFloat(d.subtotal).toFixed(2)}</span>
                       </div>
                     ))}
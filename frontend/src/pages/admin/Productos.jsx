@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import api from '../../services/api'
-import { Package, Plus, Edit, Power, Trash2, X } from 'lucide-react'
+import { Package, Plus, Edit, Power, Trash2, X, Search, Upload } from 'lucide-react'
 
 const Productos = () => {
   const [productos, setProductos] = useState([])
@@ -9,23 +9,33 @@ const Productos = () => {
   const [loading, setLoading] = useState(true)
   const [showModal, setShowModal] = useState(false)
   const [editing, setEditing] = useState(null)
-  const [filters, setFilters] = useState({ categoria: '', proveedor_id: '' })
+  const [filters, setFilters] = useState({ categoria: '', proveedor_id: '', q: '' })
+  const [busqueda, setBusqueda] = useState('')
   const [showInactivos, setShowInactivos] = useState(true)
   const [formData, setFormData] = useState({
     nombre: '', descripcion: '', precio_compra: '', precio_venta: '',
     unidad_medida: 'kg', categoria: '', proveedor_id: '', stock_inicial: 0
   })
   const [message, setMessage] = useState({ type: '', text: '' })
+  const [listaPrecios, setListaPrecios] = useState(null)
 
   useEffect(() => {
     fetchData()
   }, [filters, showInactivos])
 
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      if (busqueda.trim() !== filters.q) setFilters(f => ({ ...f, q: busqueda.trim() }))
+    }, 300)
+    return () => clearTimeout(timer)
+  }, [busqueda])
+
   const fetchData = async () => {
     try {
       const params = new URLSearchParams()
       if (filters.categoria) params.append('categoria', filters.categoria)
       if (filters.proveedor_id) params.append('proveedor_id', filters.proveedor_id)
+      if (filters.q) params.append('q', filters.q)
       params.append('activo', showInactivos ? 'all' : 'true')
       
       const [prodRes, provRes, catRes] = await Promise.all([
@@ -118,6 +128,37 @@ const Productos = () => {
     }
   }
 
+  const enviarListaPrecios = (archivo, simular) => {
+    const datos = new FormData()
+    datos.append('archivo', archivo)
+    return api.post(`/api/productos/masivo?simular=${simular}`, datos, {
+      headers: { 'Content-Type': 'multipart/form-data' }
+    })
+  }
+
+  const handleListaPrecios = async (e) => {
+    const archivo = e.target.files[0]
+    e.target.value = ''
+    if (!archivo) return
+    try {
+      const res = await enviarListaPrecios(archivo, true)
+      setListaPrecios({ archivo, resumen: res.data })
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error al leer la lista de precios' })
+    }
+  }
+
+  const aplicarListaPrecios = async () => {
+    try {
+      const res = await enviarListaPrecios(listaPrecios.archivo, false)
+      setListaPrecios(null)
+      fetchData()
+      setMessage({ type: 'success', text: res.data.message })
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error al aplicar la lista de precios' })
+    }
+  }
+
   const resetForm = () => {
     setEditing(null)
     setFormData({
@@ -133,11 +174,44 @@ const Productos = () => {
           <h1 className="text-2xl font-bold text-gray-900 dark:text-white">Productos</h1>
           <p className="text-gray-500 dark:text-gray-400">Gestión de productos e inventario</p>
         </div>
-        <button onClick={() => { resetForm(); setShowModal(true) }} className="btn-primary flex items-center space-x-2">
-          <Plus size={20} /><span>Nuevo Producto</span>
-        </button>
+        <div className="flex gap-2">
+          <label className="btn-secondary flex items-center space-x-2 cursor-pointer" title="CSV o XLSX con id, precio_compra, precio_venta, activo">
+            <Upload size={20} /><span>Lista de precios</span>
+            <input type="file" accept=".csv,.xlsx,text/csv" onChange={handleListaPrecios} className="hidden" />
+          </label>
+          <button onClick={() => { resetForm(); setShowModal(true) }} className="btn-primary flex items-center space-x-2">
+            <Plus size={20} /><span>Nuevo Producto</span>
+          </button>
+        </div>
       </div>
 
+      {listaPrecios && (
+        <div className="card space-y-3">
+          <div className="flex items-center justify-between">
+            <h2 className="font-semibold">Vista previa: {listaPrecios.resumen.message}</h2>
+            <button onClick={() => setListaPrecios(null)} className="text-gray-400 hover:text-gray-600"><X size={18} /></button>
+          </div>
+          <p className="text-sm text-gray-500 dark:text-gray-400">
+            {listaPrecios.resumen.recibidos} fila(s), {listaPrecios.resumen.sin_cambios} sin cambios, {listaPrecios.resumen.errores.length} con errores
+          </p>
+          {listaPrecios.resumen.combos.filter(c => c.bajo_costo).map(c => (
+            <p key={c.combo_id} className="text-sm text-red-600 dark:text-red-400">
+              {c.combo_nombre} quedaría bajo costo: costo ${c.costo.toFixed(2)} / precio ${c.precio_total.toFixed(2)}
+            </p>
+          ))}
+          {listaPrecios.resumen.errores.length > 0 && (
+            <ul className="text-sm text-red-600 dark:text-red-400 max-h-40 overflow-y-auto">
+              {listaPrecios.resumen.errores.map((e) => (
+                <li key={e.fila}>Fila {e.fila}: {Object.values(e.errores).join('; ')}</li>
+              ))}
+            </ul>
+          )}
+          <button onClick={aplicarListaPrecios} className="btn-primary" disabled={!listaPrecios.resumen.actualizados}>
+            Aplicar cambios
+          </button>
+        </div>
+      )}
+
       {message.text && (
         <div className={`px-4 py-3 rounded-lg ${message.type === 'success' ? 'bg-green-50 dark:bg-green-900/30 text-green-600 dark:text-green-400' : 'bg-red-50 dark:bg-red-900/30 text-red-600 dark:text-red-400'}`}>
           {message.text}
@@ -146,6 +220,16 @@ const Productos = () => {
 
       <div className="card">
         <div className="flex flex-wrap gap-4 mb-6">
+          <div className="relative flex-1 min-w-[200px]">
+            <Search size={18} className="absolute left-3 top-1/2 -translate-y-1/2 text-gray-400" />
+            <input
+              type="text"
+              value={busqueda}
+              onChange={(e) => setBusqueda(e.target.value)}
+              placeholder="Buscar por nombre, descripción o categoría..."
+              className="input pl-10"
+            />
+          </div>
           <select value={filters.categoria} onChange={(e) => setFilters({...filters, categoria: e.target.value})} className="input w-auto">
             <option value="">Todas las categorías</option>
             {categorias.map((cat) => <option key={cat} value={cat}>{cat}</option>)}
@@ -1,25 +1,45 @@
 import { useState, useEffect } from 'react'
 import api from '../../services/api'
-import { Users, Plus, Edit, Trash2, Power, X } from 'lucide-react'
+import { Users, Plus, Edit, Trash2, Power, X, Search, Upload } from 'lucide-react'
 
 const Usuarios = () => {
   const [usuarios, setUsuarios] = useState([])
   const [loading, setLoading] = useState(true)
   const [showModal, setShowModal] = useState(false)
   const [editingUser, setEditingUser] = useState(null)
-  const [filters, setFilters] = useState({ rol: '', tipo_usuario: '' })
+  const [filters, setFilters] = useState({ rol: '', tipo_usuario: '', q: '' })
+  const [busqueda, setBusqueda] = useState('')
   const [formData, setFormData] = useState({
     nombre: '', apellido: '', cedula: '', email: '', telefono: '',
     direccion: '', tipo_usuario: 'regular', rol: 'cliente', username: '', password: ''
   })
   const [message, setMessage] = useState({ type: '', text: '' })
+  const [importando, setImportando] = useState(false)
+  const [reporte, setReporte] = useState(null)
 
   useEffect(() => {
     fetchUsuarios()
   }, [filters])
 
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      const q = busqueda.trim().length >= 2 ? busqueda.trim() : ''
+      if (q !== filters.q) setFilters(f => ({ ...f, q }))
+    }, 300)
+    return () => clearTimeout(timer)
+  }, [busqueda])
+
   const fetchUsuarios = async () => {
     try {
+      if (filters.q) {
+        // El buscador retorna una proyección compacta; rol y tipo se filtran sobre sus resultados
+        const response = await api.get('/api/usuarios/buscar', { params: { q: filters.q, limite: 50 } })
+        setUsuarios(response.data.filter(u =>
+          (!filters.rol || u.rol === filters.rol) && (!filters.tipo_usuario || u.tipo_usuario === filters.tipo_usuario)
+        ))
+        return
+      }
+
       const params = new URLSearchParams()
       if (filters.rol) params.append('rol', filters.rol)
       if (filters.tipo_usuario) params.append('tipo_usuario', filters.tipo_usuario)
@@ -53,10 +73,15 @@ const Usuarios = () => {
     }
   }
 
-  const handleEdit = (user) => {
-    setEditingUser(user)
-    setFormData({ ...user, password: '' })
-    setShowModal(true)
+  const handleEdit = async (user) => {
+    try {
+      const response = await api.get(`/api/usuarios/${user.id}`)
+      setEditingUser(response.data)
+      setFormData({ ...response.data, password: '' })
+      setShowModal(true)
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error' })
+    }
   }
 
   const handleDelete = async (id) => {
@@ -95,6 +120,38 @@ const Usuarios = () => {
     }
   }
 
+  const handleImportar = async (e) => {
+    const archivo = e.target.files[0]
+    e.target.value = ''
+    if (!archivo) return
+    const datos = new FormData()
+    datos.append('archivo', archivo)
+    setImportando(true)
+    setReporte(null)
+    try {
+      const res = await api.post('/api/usuarios/importar', datos, {
+        headers: { 'Content-Type': 'multipart/form-data' }
+      })
+      setReporte(res.data)
+      setMessage({ type: res.data.errores.length ? 'error' : 'success', text: res.data.message })
+      fetchUsuarios()
+    } catch (error) {
+      setMessage({ type: 'error', text: error.response?.data?.error || 'Error al importar' })
+    } finally {
+      setImportando(false)
+    }
+  }
+
+  const descargarCredenciales = () => {
+    const filas = ['fila,username,password', ...reporte.credenciales.map(c => `${c.fila},${c.username},${c.password}`)]
+    const url = URL.createObjectURL(new Blob([filas.join('\n')], { type: 'text/csv' }))
+    const enlace = document.createElement('a')
+    enlace.href = url
+    enlace.download = 'credenciales.csv'
+    enlace.click()
+    URL.revokeObjectURL(url)
+  }
+
   const resetForm = () => {
     setEditingUser(null)
     setFormData({
@@ -115,10 +172,17 @@ const Usuarios = () => {
           <h1 className="text-2xl font-bold text-gray-900 dark:text-white">Gestión de Usuarios</h1>
           <p className="text-gray-500 dark:text-gray-400">Administrar usuarios del sistema</p>
         </div>
-        <button onClick={openNewModal} className="btn-primary flex items-center space-x-2">
-          <Plus size={20} />
-          <span>Nuevo Usuario</span>
-        </button>
+        <div className="flex gap-2">
+          <label className={`btn-secondary flex items-center space-x-2 cursor-pointer ${importando ? 'opacity-50 pointer-events-none' : ''}`}>
+            <Upload size={20} />
+            <span>{importando ? 'Importando...' : 'Importar'}</span>
+            <input type="file" accept=".csv,.xlsx,text/csv" onChange={handleImportar} className="hidden" />
+          </label>
+          <button onClick={openNewModal} className="btn-primary flex items-center space-x-2">
+            <Plus size={20} />
+            <span>Nuevo Usuario</span>
+          </button>
+        </div>
       </div>
 
       {message.text && (
@@ -127,8 +191,42 @@ const Usuarios = () => {
         </div>
       )}
 
+      {reporte && (reporte.errores.length > 0 || reporte.credenciales.length > 0) && (
+        <div className="card space-y-3">
+          <div className="flex items-center justify-between">
+            <h2 className="font-semibold">Resultado de la importación</h2>
+            <button onClick={() => setReporte(null)} className="text-gray-400 hover:text-gray-600"><X size={18} /></button>
+          </div>
+          {reporte.credenciales.length > 0 && (
+            <button onClick={descargarCredenciales} className="btn-secondary text-sm">
+              Descargar {reporte.credenciales.length} contraseña(s) generada(s)
+            </button>
+          )}
+          {reporte.errores.length > 0 && (
+            <ul className="text-sm text-red-600 dark:text-red-400 max-h-48 overflow-y-auto">
+              {reporte.errores.map((e) => (
+                <li key={e.fila}>Fila {e.fila}: {Object.values(e.errores).join('; ')}</li>
+              ))}
+            </ul>
+          )}
+          <p className="text-xs text-gray-500 dark:text-gray-400">
+            Columnas: nombre, apellido, cedula, email, username y opcionales telefono, direccion, tipo_usuario, password.
+          </p>
+        </div>
+      )}
+
       <div className="card">
         <div className="flex flex-wrap gap-4 mb-6">
+          <div className="relative flex-1 min-w-[200px]">
+            <Search size={18} className="absolute left-3 top-1/2 -translate-y-1/2 text-gray-400" />
+            <input
+              type="text"
+              value={busqueda}
+              onChange={(e) => setBusqueda(e.target.value)}
+              placeholder="Buscar por cédula, nombre, email o teléfono..."
+              className="input pl-10"
+            />
+          </div>
           <select
             value={filters.rol}
             onChange={(e) => setFilters({...filters, rol: e.target.value})}
@@ -7,19 +7,32 @@ const api = axios.create({
   }
 })
 
+// Read-your-writes con réplica: el backend marca hasta cuándo leer del primario tras una escritura
+const ENCABEZADO_PRIMARIO = 'X-DB-Primario-Hasta'
+
 api.interceptors.request.use(
   (config) => {
     const token = localStorage.getItem('access_token')
     if (token) {
       config.headers.Authorization = `Bearer ${token}`
     }
+    const primarioHasta = sessionStorage.getItem(ENCABEZADO_PRIMARIO)
+    if (primarioHasta) {
+      config.headers[ENCABEZADO_PRIMARIO] = primarioHasta
+    }
     return config
   },
   (error) => Promise.reject(error)
 )
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const primarioHasta = response.headers[ENCABEZADO_PRIMARIO.toLowerCase()]
+    if (primarioHasta) {
+      sessionStorage.setItem(ENCABEZADO_PRIMARIO, primarioHasta)
+    }
+    return response
+  },
   async (error) => {
     const originalRequest = error.config
     
@@ -52,4 +65,8 @@ api.interceptors.response.use(
   }
 )
 
+// Clave para el encabezado Idempotency-Key de los POST de pagos (crypto.randomUUID solo existe en HTTPS/localhost)
+export const nuevaClaveIdempotencia = () =>
+  crypto.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`
+
 export default api